@@ -8,10 +8,15 @@ from prometheus_client import make_wsgi_app
 import sentry_sdk
 from nova.app.core.config import settings
 from nova.app.core.monitoring import MetricsMiddleware
+from nova.app.core.models import registry
 from nova.app.routes import api, admin
-from nova.app.search.engine import SearchEngine
+from nova.app.search.engine import get_search_engine
+from nova.app.search.client import get_es_client
+from nova.app.crawler.fetcher import get_fetcher
+from nova.app.core.embeddings import get_embedding_service
 import uvicorn
 import logging
+import logging.config
 import asyncio
 from datetime import datetime
 import os
@@ -22,24 +27,35 @@ logger = logging.getLogger(__name__)
 
 # Initialize Sentry
 sentry_sdk.init(dsn=settings.SENTRY_DSN, environment=settings.ENVIRONMENT)
-search_engine = SearchEngine()
+search_engine = get_search_engine()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Starting up application...")
-    # Start background tasks
-    crawler_task = asyncio.create_task(start_background_jobs())
+    # Warm up models after startup instead of on the first request
+    if settings.PRELOAD_MODELS:
+        registry.preload()
+
+    # The crawler and the vector index files have a single writer: every
+    # uvicorn worker runs this hook, so only the designated process crawls
+    crawler_task = None
+    if settings.CRAWL_SCHEDULER_ENABLED:
+        crawler_task = asyncio.create_task(start_background_jobs())
     
     yield  # Application running
     
     # Shutdown
     logger.info("Shutting down application...")
-    crawler_task.cancel()
-    try:
-        await crawler_task
-    except asyncio.CancelledError:
-        pass
+    if crawler_task:
+        crawler_task.cancel()
+        try:
+            await crawler_task
+        except asyncio.CancelledError:
+            pass
+    await get_fetcher().close()
+    await get_es_client().close()
+    get_embedding_service().close(timeout=5)
 
 
 
@@ -48,7 +64,8 @@ app = FastAPI(
     description="Production-grade search engine API",
     version="1.0.0",
     docs_url="/api/docs" if settings.ENVIRONMENT != "production" else None,
-    redoc_url="/api/redoc" if settings.ENVIRONMENT != "production" else None
+    redoc_url="/api/redoc" if settings.ENVIRONMENT != "production" else None,
+    lifespan=lifespan
 )
 
 # Add middleware
@@ -135,8 +152,15 @@ async def health_check():
 
 async def start_background_jobs():
     # Start crawler manager
-    from nova.app.crawler.manager import CrawlerManager
-    crawler = CrawlerManager()
+    from nova.app.crawler.manager import get_crawler_manager
+    if settings.VECTOR_INDEX_ENABLED:
+        # Before crawling, so pages embedded from now on land after the stored ones
+        from nova.app.search.vector_index import build_from_database
+        try:
+            await build_from_database()
+        except Exception as e:
+            logger.error(f"Vector index build error: {str(e)}")
+    crawler = get_crawler_manager()
     await crawler.schedule_crawls()
 
 
@@ -0,0 +1,85 @@
+"""Embedding inference on CPU: fp32 torch vs. dynamic int8 vs. ONNX Runtime.
+
+Loads the embedding model once and, for each backend, reports:
+
+* parity: lowest cosine similarity to the fp32 embeddings over a sample
+  of queries and page-length texts (what EMBEDDING_PARITY_MIN_COSINE
+  guards at load time);
+* query latency: p50/p99 for embedding one short query at a time;
+* throughput: page texts per second embedded in batches of ``--batch``.
+
+Usage: python benchmarks/bench_embeddings.py [--backends torch,int8,onnx] [--threads 4]
+       [--model distilbert-base-uncased] [--onnx-path /tmp/distilbert.onnx]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nova.app.core import models  # noqa: E402
+from nova.app.core.config import settings  # noqa: E402
+
+WORDS = ("search engine crawler index page query ranking result web document text model vector "
+         "news article product blog science market science health travel code python data").split()
+
+
+def texts(count: int, length: int, rng: random.Random):
+    return [" ".join(rng.choice(WORDS) for _ in range(length)) for _ in range(count)]
+
+
+def main(args):
+    from transformers import AutoTokenizer
+
+    rng = random.Random(0)
+    queries = texts(args.queries, 6, rng)
+    pages = texts(args.pages, 300, rng)
+    settings.EMBEDDING_ONNX_PATH = args.onnx_path or os.path.join(tempfile.mkdtemp(), "model.onnx")
+
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    reference = models.load_torch_encoder(args.model, threads=args.threads)
+    print(f"model={args.model} threads={args.threads or 'default'} "
+          f"queries={len(queries)} pages={len(pages)} batch={args.batch}")
+
+    for backend in args.backends.split(','):
+        start = time.perf_counter()
+        encoder = models.build_encoder(backend, reference, threads=args.threads)
+        loaded = time.perf_counter() - start
+        parity = models.encoder_parity(tokenizer, encoder, reference, queries[:20] + pages[:12])
+
+        def embed(batch):
+            return models.embed_texts(batch, settings.EMBEDDING_MAX_LENGTH, settings.EMBEDDING_MAX_BATCH_TOKENS,
+                                      tokenizer=tokenizer, encoder=encoder)
+
+        embed(queries[:4])  # warm-up
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            embed([query])
+            latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for offset in range(0, len(pages), args.batch):
+            embed(pages[offset:offset + args.batch])
+        throughput = len(pages) / (time.perf_counter() - start)
+
+        print(f"{backend:>6}: parity {parity:.4f}  query p50 {np.percentile(latencies, 50) * 1000:6.1f} ms  "
+              f"p99 {np.percentile(latencies, 99) * 1000:6.1f} ms  {throughput:6.1f} pages/s  "
+              f"(setup {loaded:.1f}s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", default="torch,int8,onnx")
+    parser.add_argument("--model", default=settings.EMBEDDING_MODEL)
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--pages", type=int, default=128)
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("--onnx-path", default=None)
+    main(parser.parse_args())
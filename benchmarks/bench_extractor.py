@@ -0,0 +1,84 @@
+"""Pages/sec of the BeautifulSoup extraction vs. the single-pass lxml extractor.
+
+Runs ``parsing.parse_page`` over a fixed corpus with HTML_EXTRACTOR set to
+"bs4" and then "lxml".  Point it at a directory of saved ``*.html`` pages;
+without one, a synthetic corpus is generated so runs stay comparable.
+
+Usage: python benchmarks/bench_extractor.py [--corpus DIR] [--repeat 3]
+"""
+import argparse
+import glob
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nova.app.core.config import settings  # noqa: E402
+from nova.app.crawler import parsing  # noqa: E402
+
+WORDS = ("search engine crawler index python content article important page "
+         "network latency throughput parser metadata ranking query").split()
+
+
+def synthetic_page(rng: random.Random) -> str:
+    def sentence():
+        return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))).capitalize() + '.'
+
+    nav = ''.join(f'<li><a href="/section/{i}">Section {i}</a></li>' for i in range(30))
+    paragraphs = ''.join(f'<p>{" ".join(sentence() for _ in range(5))}</p>' for _ in range(40))
+    sidebar = ''.join(f'<div class="widget"><a href="/tag/{i}?utm_source=x">tag {i}</a></div>' for i in range(50))
+    return f"""<!DOCTYPE html><html lang="en"><head>
+<title>{sentence()}</title>
+<meta name="description" content="{sentence()}"><meta name="keywords" content="a,b,c">
+<meta name="author" content="Nova"><meta property="og:title" content="OG title">
+<meta property="og:type" content="article"><meta property="article:published_time" content="2024-01-01">
+<script type="application/ld+json">{{"@type": "Article", "headline": "x"}}</script>
+<style>body {{ color: red }}</style><script>var tracking = 1;</script>
+</head><body><nav><ul>{nav}</ul></nav>
+<main><article class="post-content">{paragraphs}</article></main>
+<aside>{sidebar}</aside><footer>Copyright</footer></body></html>"""
+
+
+def load_corpus(directory: str, size: int):
+    if directory:
+        pages = []
+        for path in sorted(glob.glob(os.path.join(directory, '*.html'))):
+            with open(path, encoding='utf-8', errors='replace') as f:
+                pages.append(f.read())
+        return pages
+    rng = random.Random(42)
+    return [synthetic_page(rng) for _ in range(size)]
+
+
+def run(pages, extractor: str, repeat: int) -> float:
+    settings.HTML_EXTRACTOR = extractor
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for i, html in enumerate(pages):
+            parsing.parse_page(html, f'http://example.com/{i}')
+        best = min(best, time.perf_counter() - start)
+    return len(pages) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--corpus', help='directory of saved *.html pages')
+    parser.add_argument('--size', type=int, default=200, help='synthetic corpus size')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    pages = load_corpus(args.corpus, args.size)
+    total_mb = sum(len(html) for html in pages) / 1e6
+    print(f"{len(pages)} pages, {total_mb:.1f} MB")
+
+    results = {name: run(pages, name, args.repeat) for name in ('bs4', 'lxml')}
+    for name, pages_per_sec in results.items():
+        print(f"{name:>5}: {pages_per_sec:8.1f} pages/s")
+    print(f"speedup: {results['lxml'] / results['bs4']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""URL prioritization throughput: per-URL regex loop vs. URLPrioritizer.score_batch.
+
+Generates synthetic crawl-frontier URLs and scores them with:
+
+* ``legacy``: the previous ``calculate_priority`` body, one ``re.search``
+  per section pattern per URL;
+* ``batch``: ``URLPrioritizer.score_batch`` (one feature-extraction pass
+  and a vectorized heuristic);
+* ``model``: with ``--model``, ``score_batch`` on a small RandomForest
+  fitted on the heuristic scores (one ``predict_proba`` call).
+
+The legacy and batch heuristics must agree exactly; the benchmark checks it.
+
+Usage: python benchmarks/bench_prioritizer.py [--urls 1000000] [--model]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nova.app.crawler.url_prioritizer import URLPrioritizer  # noqa: E402
+
+LEGACY_PATTERNS = [
+    (r'/article/', 0.8),
+    (r'/blog/', 0.7),
+    (r'/news/', 0.9),
+    (r'/product/', 0.6)
+]
+SEGMENTS = ['article', 'blog', 'news', 'product', 'category', 'tag', 'page', 'docs', 'about', '2024']
+TLDS = ['com', 'org', 'net', 'edu', 'gov', 'io', 'co.uk']
+
+
+def legacy_priority(url: str) -> float:
+    base_priority = 0.5
+    for pattern, score in LEGACY_PATTERNS:
+        if re.search(pattern, url):
+            base_priority = max(base_priority, score)
+    depth = url.count('/')
+    depth_penalty = max(0, (depth - 3) * 0.1)
+    return max(0.1, base_priority - depth_penalty)
+
+
+def generate_urls(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    urls = []
+    for i in range(count):
+        host = f"site{rng.randrange(5000)}.{rng.choice(TLDS)}"
+        path = '/'.join(rng.choice(SEGMENTS) for _ in range(rng.randrange(0, 5)))
+        query = f"?id={i}" if rng.random() < 0.2 else ''
+        urls.append(f"https://{host}/{path}/item-{i}{query}")
+    return urls
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main(args):
+    urls = generate_urls(args.urls)
+    prioritizer = URLPrioritizer()
+    print(f"{len(urls)} URLs")
+
+    legacy, elapsed = timed(lambda batch: [legacy_priority(url) for url in batch], urls)
+    print(f"{'legacy':>8}: {elapsed:7.2f}s  {len(urls) / elapsed:12.0f} urls/s")
+
+    batch, elapsed = timed(prioritizer.score_batch, urls)
+    print(f"{'batch':>8}: {elapsed:7.2f}s  {len(urls) / elapsed:12.0f} urls/s")
+    mismatches = int(np.count_nonzero(~np.isclose(batch, np.asarray(legacy, dtype=np.float32))))
+    print(f"{'':>8}  heuristic mismatches vs legacy: {mismatches}")
+
+    if args.model:
+        from sklearn.ensemble import RandomForestClassifier
+
+        sample = urls[:args.train]
+        features = prioritizer.extract_features(sample)
+        labels = prioritizer.score_batch(sample) >= 0.5
+        prioritizer.model = RandomForestClassifier(n_estimators=50, max_depth=8, n_jobs=-1).fit(features, labels)
+
+        _, elapsed = timed(prioritizer.score_batch, urls)
+        print(f"{'model':>8}: {elapsed:7.2f}s  {len(urls) / elapsed:12.0f} urls/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--urls", type=int, default=1_000_000)
+    parser.add_argument("--model", action="store_true")
+    parser.add_argument("--train", type=int, default=20000)
+    main(parser.parse_args())
@@ -0,0 +1,122 @@
+"""Crawl throughput: single shared queue vs. per-host HostScheduler.
+
+Starts a local fake HTTP server listening on many ports (one "host" per
+port) and fetches the same URL set twice:
+
+* ``legacy``: one ``asyncio.Queue`` where every worker sleeps the crawl
+  delay after each fetch (the previous ``WebCrawler.worker`` behaviour).
+* ``scheduler``: ``HostScheduler`` with the same per-host delay.
+
+Usage: python benchmarks/bench_scheduler.py [--hosts 50] [--pages 10]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import aiohttp
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nova.app.crawler.scheduler import HostScheduler  # noqa: E402
+
+
+async def start_fake_hosts(num_hosts: int, latency: float):
+    async def handler(request):
+        await asyncio.sleep(latency)
+        return web.Response(text="<html><body>ok</body></html>", content_type="text/html")
+
+    app = web.Application()
+    app.router.add_get("/{tail:.*}", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+
+    ports = []
+    for _ in range(num_hosts):
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        ports.append(site._server.sockets[0].getsockname()[1])
+    return runner, ports
+
+
+async def fetch(session, url):
+    async with session.get(url) as response:
+        await response.read()
+
+
+async def run_legacy(urls, workers: int, delay: float) -> float:
+    queue: asyncio.Queue = asyncio.Queue()
+    for url in urls:
+        queue.put_nowait(url)
+
+    async with aiohttp.ClientSession() as session:
+        async def worker():
+            while True:
+                url = await queue.get()
+                try:
+                    await fetch(session, url)
+                    await asyncio.sleep(delay)
+                finally:
+                    queue.task_done()
+
+        start = time.perf_counter()
+        tasks = [asyncio.create_task(worker()) for _ in range(workers)]
+        await queue.join()
+        elapsed = time.perf_counter() - start
+        for task in tasks:
+            task.cancel()
+    return elapsed
+
+
+async def run_scheduler(urls, workers: int, delay: float) -> float:
+    scheduler = HostScheduler(crawl_delay=delay, host_concurrency=1)
+    for url in urls:
+        scheduler.put_nowait((url, 0))
+
+    async with aiohttp.ClientSession() as session:
+        async def worker():
+            while True:
+                url, _ = await scheduler.get()
+                try:
+                    await fetch(session, url)
+                finally:
+                    scheduler.task_done(url)
+
+        start = time.perf_counter()
+        tasks = [asyncio.create_task(worker()) for _ in range(workers)]
+        await scheduler.join()
+        elapsed = time.perf_counter() - start
+        for task in tasks:
+            task.cancel()
+    return elapsed
+
+
+async def main(args):
+    runner, ports = await start_fake_hosts(args.hosts, args.latency)
+    try:
+        # Interleave hosts the way a breadth-first crawl would discover them
+        urls = [
+            f"http://127.0.0.1:{port}/page/{i}"
+            for i in range(args.pages)
+            for port in ports
+        ]
+        print(f"{len(urls)} URLs over {len(ports)} hosts, "
+              f"delay={args.delay}s latency={args.latency}s workers={args.workers}")
+
+        for name, runner_fn in (("legacy", run_legacy), ("scheduler", run_scheduler)):
+            elapsed = await runner_fn(urls, args.workers, args.delay)
+            print(f"{name:>10}: {elapsed:7.2f}s  {len(urls) / elapsed:8.1f} pages/s")
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hosts", type=int, default=50)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=5)
+    parser.add_argument("--delay", type=float, default=0.2)
+    parser.add_argument("--latency", type=float, default=0.01)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,137 @@
+"""Search latency under concurrency: blocking sync client vs. shared AsyncElasticsearch.
+
+Starts a local stub that answers like an Elasticsearch node (info, ping and
+``_search`` with a fixed service time) and fires searches at increasing
+concurrency through:
+
+* ``sync``: a synchronous ``Elasticsearch`` client called from the event
+  loop, as ``SearchEngine`` used to do;
+* ``async``: ``SearchEngine._search_backend`` on the shared, pooled
+  ``AsyncElasticsearch`` client.
+
+The result cache is bypassed so every request reaches the stub.
+
+Usage: python benchmarks/bench_search_load.py [--levels 1,8,32,128] [--requests 400]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+import warnings
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nova.app.core.config import settings  # noqa: E402
+
+HEADERS = {'X-Elastic-Product': 'Elasticsearch', 'Content-Type': 'application/json'}
+INFO = {
+    'name': 'stub', 'cluster_name': 'stub', 'tagline': 'You Know, for Search',
+    'version': {'number': '7.17.0', 'build_flavor': 'default'}
+}
+
+
+def stub_response(size: int):
+    hits = [
+        {
+            '_id': str(i), '_score': 1.0 / (i + 1),
+            '_source': {'url': f'http://example.com/{i}', 'title': f'Result {i}', 'content': 'lorem ipsum ' * 20},
+            'highlight': {'content': ['<em>lorem</em> ipsum']}
+        }
+        for i in range(size)
+    ]
+    return json.dumps({'took': 1, 'hits': {'total': {'value': 1000}, 'hits': hits}})
+
+
+async def serve_stub(latency: float):
+    body = stub_response(10)
+
+    async def info(request):
+        return web.json_response(INFO, headers={'X-Elastic-Product': 'Elasticsearch'})
+
+    async def search(request):
+        await request.read()
+        await asyncio.sleep(latency)
+        return web.Response(text=body, headers=HEADERS)
+
+    app = web.Application()
+    app.router.add_get('/', info)
+    app.router.add_route('*', '/{index}/_search', search)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    return runner, site._server.sockets[0].getsockname()[1]
+
+
+def start_stub(latency: float):
+    """Run the stub on its own loop so a blocking client can't stall it"""
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    runner, port = asyncio.run_coroutine_threadsafe(serve_stub(latency), loop).result()
+    return loop, runner, port
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def measure(call, concurrency: int, total: int):
+    """Send bursts of `concurrency` simultaneous searches; latency is measured from the burst start"""
+    latencies = []
+
+    async def one(i, burst_start):
+        await call(i)
+        latencies.append(time.perf_counter() - burst_start)
+
+    start = time.perf_counter()
+    for offset in range(0, total, concurrency):
+        burst_start = time.perf_counter()
+        await asyncio.gather(*(one(i, burst_start) for i in range(offset, min(total, offset + concurrency))))
+    elapsed = time.perf_counter() - start
+    return percentile(latencies, 0.5), percentile(latencies, 0.99), total / elapsed
+
+
+async def main(args):
+    warnings.simplefilter('ignore', DeprecationWarning)
+    stub_loop, runner, port = start_stub(args.latency)
+    settings.ELASTICSEARCH_HOSTS = [f'http://127.0.0.1:{port}']
+
+    from elasticsearch import Elasticsearch
+    from nova.app.search.engine import SearchEngine
+
+    engine = SearchEngine()
+    engine.embedding_cache.redis = engine.result_cache.redis = None
+    sync_es = Elasticsearch(settings.ELASTICSEARCH_HOSTS)
+
+    async def sync_call(i):
+        # The old code path: a blocking request made on the event loop
+        sync_es.search(index='web_pages', body=engine._build_query(f'query {i}'))
+
+    async def async_call(i):
+        await engine._search_backend(f'query {i}', 1, 10, {})
+
+    try:
+        print(f"stub service time {args.latency * 1000:.0f} ms, {args.requests} requests per level")
+        print(f"{'client':>6} {'conc':>5} {'p50 ms':>8} {'p99 ms':>8} {'req/s':>8}")
+        for level in args.levels:
+            for name, call in (('sync', sync_call), ('async', async_call)):
+                p50, p99, rate = await measure(call, level, args.requests)
+                print(f"{name:>6} {level:>5} {p50 * 1000:8.1f} {p99 * 1000:8.1f} {rate:8.1f}")
+    finally:
+        sync_es.close()
+        await engine.es_client.close()
+        asyncio.run_coroutine_threadsafe(runner.cleanup(), stub_loop).result()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--levels', type=lambda v: [int(x) for x in v.split(',')], default=[1, 8, 32, 128])
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--latency', type=float, default=0.01)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,68 @@
+"""Process startup cost of ``import app``.
+
+Imports the application in fresh interpreters and reports wall time and
+peak RSS, plus the slowest modules from ``python -X importtime``.  Models
+are loaded lazily, so neither number should include transformer weights.
+
+Usage: python benchmarks/bench_startup.py [--runs 5] [--top 10]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import resource, time
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def run_once(env):
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE], cwd=ROOT, env=env,
+        capture_output=True, text=True, check=True
+    ).stdout.split()
+    return float(output[-2]), int(output[-1]) / 1024
+
+
+def slowest_imports(env, top: int):
+    stderr = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app'], cwd=ROOT, env=env,
+        capture_output=True, text=True, check=True
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    env = dict(os.environ, PRELOAD_MODELS='false')
+    samples = [run_once(env) for _ in range(args.runs)]
+    times = [elapsed for elapsed, _ in samples]
+    rss = [mb for _, mb in samples]
+
+    print(f"import app over {args.runs} runs: "
+          f"median {statistics.median(times):.2f}s, min {min(times):.2f}s, "
+          f"peak RSS {max(rss):.0f} MB")
+    print(f"\nslowest imports (cumulative):")
+    for cumulative, name in slowest_imports(env, args.top):
+        print(f"  {cumulative / 1e6:6.2f}s  {name}")
+
+
+if __name__ == '__main__':
+    main()
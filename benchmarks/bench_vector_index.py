@@ -0,0 +1,87 @@
+"""Semantic retrieval: VectorIndex (IVF over memory-mapped files) vs. brute force.
+
+Builds a synthetic clustered corpus of unit vectors (topics plus noise, as
+page embeddings tend to be), adds it to a ``VectorIndex`` in a temporary
+directory in indexer-sized batches, then runs queries drawn near corpus
+points.  Brute force is one exact matmul over the whole in-memory matrix;
+recall@k is the fraction of its top k that the index also returns.
+
+Usage: python benchmarks/bench_vector_index.py [--vectors 200000] [--dim 768] [--probes 4,8,16,32]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nova.app.search.vector_index import VectorIndex, normalize  # noqa: E402
+
+
+def synthetic_corpus(count: int, dim: int, topics: int, spread: float, rng) -> np.ndarray:
+    centers = rng.standard_normal((topics, dim)).astype(np.float32)
+    labels = rng.integers(0, topics, count)
+    vectors = np.empty((count, dim), dtype=np.float32)
+    for start in range(0, count, 50000):
+        end = min(count, start + 50000)
+        noise = rng.standard_normal((end - start, dim)).astype(np.float32)
+        vectors[start:end] = centers[labels[start:end]] + spread * noise
+    return normalize(vectors)
+
+
+def percentile_ms(samples, q):
+    return np.percentile(samples, q) * 1000
+
+
+def main(args):
+    rng = np.random.default_rng(args.seed)
+    corpus = synthetic_corpus(args.vectors, args.dim, args.topics, args.spread, rng)
+    picks = rng.choice(args.vectors, args.queries, replace=False)
+    queries = normalize(corpus[picks] + 0.5 * rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+                        / np.sqrt(args.dim))
+    urls = [f"https://example.com/page/{i}" for i in range(args.vectors)]
+    print(f"{args.vectors} vectors x {args.dim} dims, {args.queries} queries, k={args.k}")
+
+    with tempfile.TemporaryDirectory() as path:
+        index = VectorIndex(path, dim=args.dim, train_size=min(args.vectors, 20000))
+        start = time.perf_counter()
+        for offset in range(0, args.vectors, args.batch):
+            index.add(urls[offset:offset + args.batch], corpus[offset:offset + args.batch])
+        print(f"build: {time.perf_counter() - start:.1f}s ({len(index.centroids)} lists)")
+
+        truth, latencies = [], []
+        for query in queries:
+            start = time.perf_counter()
+            scores = corpus @ query
+            top = np.argpartition(-scores, args.k - 1)[:args.k]
+            latencies.append(time.perf_counter() - start)
+            truth.append({urls[i] for i in top})
+        print(f"{'brute':>10}: p50 {percentile_ms(latencies, 50):7.2f} ms  "
+              f"p99 {percentile_ms(latencies, 99):7.2f} ms  recall@{args.k} 1.000")
+
+        for probes in (int(p) for p in args.probes.split(',')):
+            latencies, recall = [], []
+            for query, expected in zip(queries, truth):
+                start = time.perf_counter()
+                hits = index.search(query, args.k, probes=probes)
+                latencies.append(time.perf_counter() - start)
+                recall.append(len(expected & {url for url, _ in hits}) / args.k)
+            print(f"{f'probes={probes}':>10}: p50 {percentile_ms(latencies, 50):7.2f} ms  "
+                  f"p99 {percentile_ms(latencies, 99):7.2f} ms  recall@{args.k} {np.mean(recall):.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=200000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--topics", type=int, default=1000)
+    parser.add_argument("--spread", type=float, default=1.5, help="noise around each topic")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--probes", default="4,8,16,32")
+    parser.add_argument("--seed", type=int, default=0)
+    main(parser.parse_args())
@@ -31,16 +31,113 @@ class Settings(BaseSettings):
     # Database
     MONGODB_URL: str = "mongodb://localhost:27017"
     ELASTICSEARCH_HOSTS: List[str] = ["http://localhost:9200"]
+    ES_REQUEST_TIMEOUT: int = 30
+    ES_POOL_MAXSIZE: int = 25  # pooled keep-alive connections per node
+    ES_RECONNECT_MAX_BACKOFF: int = 60
     REDIS_URL: str = "redis://localhost:6379"
     
     # Search Engine
     MAX_SEARCH_RESULTS: int = 100
     CACHE_EXPIRY: int = 3600
+    SEARCH_CACHE_SIZE: int = 10000
+    SEARCH_CACHE_GENERATION_TTL: float = 1.0
+    SEARCH_DEFAULT_MODE: str = "lexical"  # "lexical", "semantic" or "hybrid" (needs VECTOR_INDEX_ENABLED)
+    SEARCH_RRF_K: int = 60
+    HYBRID_CANDIDATES: int = 50  # results fused from each stage
+    SEARCH_LEXICAL_BUDGET: float = 1.0  # seconds before a hybrid search drops a stage
+    SEARCH_VECTOR_BUDGET: float = 0.25
+    SEARCH_RERANK: bool = False  # default for requests that don't ask
+    SEARCH_DEADLINE: float = 0.75  # seconds per request; re-ranking is skipped past it
+    RERANK_TOP_K: int = 100
+    RERANK_RETRIEVAL_WEIGHT: float = 1.0
+    RERANK_SEMANTIC_WEIGHT: float = 1.0
+    RERANK_FRESHNESS_WEIGHT: float = 0.2
+    RERANK_PRIORITY_WEIGHT: float = 0.1
+    RERANK_FRESHNESS_HALF_LIFE: int = 30 * 86400
+    PRELOAD_MODELS: bool = True
+    EMBEDDING_CACHE_SIZE: int = 10000
+    EMBEDDING_CACHE_TTL: int = 86400
+    EMBEDDING_MODEL: str = "distilbert-base-uncased"
+    EMBEDDING_DIM: int = 768
+    EMBEDDING_BACKEND: str = "torch"  # "torch" (fp32), "int8" (dynamic quantization) or "onnx"
+    EMBEDDING_THREADS: int = 0  # intra-op threads for inference; 0 = library default
+    EMBEDDING_ONNX_PATH: str = "models/distilbert.onnx"  # exported on first use
+    EMBEDDING_PARITY_CHECK: bool = True  # compare int8/onnx output with fp32 at load time
+    EMBEDDING_PARITY_MIN_COSINE: float = 0.99
+    EMBEDDING_MAX_BATCH_SIZE: int = 32
+    EMBEDDING_MAX_WAIT: float = 0.005  # how long a batch waits to fill after its first text
+    EMBEDDING_MAX_LENGTH: int = 512  # tokens
+    EMBEDDING_MAX_BATCH_TOKENS: int = 16384  # padded tokens per forward pass
+    EMBEDDING_QUEUE_SIZE: int = 10000
+    VECTOR_INDEX_ENABLED: bool = False  # embed crawled pages and serve semantic/hybrid search
+    VECTOR_INDEX_PATH: str = "data/vectors"
+    VECTOR_INDEX_LISTS: int = 0  # IVF lists; 0 = about 4 * sqrt(vectors) at training time
+    VECTOR_INDEX_PROBES: int = 16  # lists scanned per query (recall vs. latency)
+    VECTOR_INDEX_TRAIN_SIZE: int = 20000  # exact scan until this many vectors
+    VECTOR_INDEX_MERGE_SIZE: int = 4096
+    VECTOR_INDEX_COMPACT_RATIO: float = 0.25  # rewrite the files once this share of rows is superseded
+    VECTOR_INDEX_BUILD_BATCH: int = 1000
     
     # Crawler Settings
-    CRAWLER_WORKERS: int = 4
-    CRAWL_DELAY: int = 1
+    CRAWL_SCHEDULER_ENABLED: bool = False  # run scheduled crawls in this process; enable in exactly one
+    CRAWLER_WORKERS: int = 32  # cap on concurrent fetches across all hosts
+    CRAWL_DELAY: int = 1  # seconds between fetch starts per host; caps it at 1/CRAWL_DELAY pages/s
+    CRAWLER_HOST_CONCURRENCY: int = 1  # starting limit when adaptive
+    ADAPTIVE_CONCURRENCY: bool = True
+    HOST_MIN_CONCURRENCY: int = 1
+    HOST_MAX_CONCURRENCY: int = 8
+    HOST_LATENCY_TOLERANCE: float = 2.0  # back off once latency exceeds this multiple of the baseline
+    HOST_BASELINE_DECAY: float = 0.02  # per response, how far the baseline drifts towards slower samples
+    HOST_IDLE_RESET: int = 60  # seconds idle before a host's latency baseline is relearned
+    HOST_MAX_BACKOFF: int = 300
+    HOST_STATE_TTL: int = 600
+    FETCH_MAX_CONNECTIONS: int = 200
+    FETCH_CONNECTIONS_PER_HOST: int = 8
+    FETCH_DNS_CACHE_TTL: int = 300
+    FETCH_KEEPALIVE_TIMEOUT: int = 30
+    FETCH_TIMEOUT: int = 30
+    FETCH_CONNECT_TIMEOUT: int = 10
+    FETCH_MAX_BYTES: int = 10 * 1024 * 1024  # decoded body size cutoff
+    ROBOTS_CACHE_TTL: int = 3600
+    ROBOTS_NEGATIVE_TTL: int = 300  # unreachable or 5xx robots.txt
+    ROBOTS_LOCAL_CACHE_SIZE: int = 10000
+    ROBOTS_MAX_BYTES: int = 512 * 1024
+    SITEMAP_TIMEOUT: int = 300
+    SITEMAP_MAX_BYTES: int = 50 * 1024 * 1024  # protocol limit for one uncompressed sitemap
+    FRONTIER_PATH: str = "data/frontier.db"
+    FRONTIER_BATCH_SIZE: int = 1000
+    FRONTIER_CHECKPOINT_INTERVAL: int = 60
+    FINGERPRINT_PATH: str = "data/fingerprints.db"
+    RECRAWL_PATH: str = "data/recrawl.db"
+    RECRAWL_CHECK_INTERVAL: int = 300
+    RECRAWL_MIN_INTERVAL: int = 3600
+    RECRAWL_MAX_INTERVAL: int = 30 * 86400
+    RECRAWL_LEASE: int = 6 * 3600  # how long a handed-out URL waits for its crawl outcome
+    SITEMAP_REFRESH_INTERVAL: int = 3600
+    DEDUP_ENABLED: bool = True
+    DEDUP_ACTION: str = "link"  # "link" to the canonical page or "drop"
+    DEDUP_THRESHOLD: int = 3  # max SimHash bits apart
+    DEDUP_MIN_WORDS: int = 50
+    SEEN_SET_BACKEND: str = "exact"  # "exact" or "bloom"
+    SEEN_SET_CAPACITY: int = 50_000_000
+    SEEN_SET_FP_RATE: float = 0.001
+    SEEN_SET_PATH: Optional[str] = None
+    PARSE_WORKERS: int = 0  # 0 = one per CPU core
+    PARSE_QUEUE_SIZE: int = 100
+    HTML_EXTRACTOR: str = "lxml"  # "lxml" (single pass) or "bs4"
+    ENRICHMENT_ENABLED: bool = True
+    ENRICHMENT_BATCH_SIZE: int = 16
+    ENRICHMENT_MAX_WAIT: float = 2.0
+    ENRICHMENT_QUEUE_SIZE: int = 10000
+    ENRICHMENT_CATEGORY_MIN_SCORE: float = 0.3  # besides the top label, for the search filter
+    INDEX_BATCH_SIZE: int = 500
+    INDEX_MAX_WAIT: float = 1.0
+    INDEX_QUEUE_SIZE: int = 5000
+    INDEX_MAX_RETRIES: int = 3
     MAX_PAGES_PER_DOMAIN: int = 1000
+    HOST_AUTHORITY_SATURATION: int = 1000  # referring hosts for full authority in URL priorities
+    HOST_AUTHORITY_CACHE_SIZE: int = 100000
+    HOST_AUTHORITY_CACHE_TTL: int = 3600
     
     # Monitoring
     SENTRY_DSN: Optional[str] = None
@@ -0,0 +1,157 @@
+import asyncio
+import itertools
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from functools import lru_cache
+from typing import Callable, List, NamedTuple, Optional
+import numpy as np
+from prometheus_client import Counter, Histogram
+from nova.app.core.config import settings
+from nova.app.core.models import embed_texts
+
+EMBEDDING_BATCH = Histogram(
+    'embedding_batch_size', 'Texts per embedding inference batch',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+EMBEDDING_QUEUE_WAIT = Histogram(
+    'embedding_queue_wait_seconds', 'Time a text waited before its batch ran', ['kind'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+)
+EMBEDDING_LATENCY = Histogram('embedding_batch_seconds', 'Embedding inference time per batch')
+EMBEDDING_REJECTED = Counter('embedding_rejected_total', 'Texts refused because the embedding queue was full')
+
+# Lower runs first: a search waiting on its query vector jumps ahead of page embeddings
+QUERY = 0
+DOCUMENT = 1
+KINDS = {QUERY: 'query', DOCUMENT: 'document'}
+STOP = 2
+
+
+class EmbeddingRequest(NamedTuple):
+    priority: int
+    sequence: int
+    text: str
+    future: Optional[Future]
+    enqueued_at: float
+
+
+class EmbeddingService:
+    """In-process embedding server shared by search and indexing.
+
+    Callers queue texts and get a future per text.  One dedicated
+    inference thread takes them off a priority queue (queries before
+    documents) in dynamic batches: a batch closes at
+    EMBEDDING_MAX_BATCH_SIZE texts or EMBEDDING_MAX_WAIT seconds after
+    its first text, whichever comes first, and is padded only to its
+    longest text.  Concurrent searches therefore share forward passes
+    instead of each paying for one.
+    """
+
+    def __init__(self, embed: Optional[Callable[[List[str]], np.ndarray]] = None,
+                 max_batch_size: Optional[int] = None, max_wait: Optional[float] = None):
+        self.encoder = embed or self._embed
+        self.max_batch_size = max_batch_size or settings.EMBEDDING_MAX_BATCH_SIZE
+        self.max_wait = max_wait if max_wait is not None else settings.EMBEDDING_MAX_WAIT
+        self.queue: queue.PriorityQueue = queue.PriorityQueue(maxsize=settings.EMBEDDING_QUEUE_SIZE)
+        self.sequence = itertools.count()
+        self.lock = threading.Lock()
+        self.thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _embed(texts: List[str]) -> np.ndarray:
+        return embed_texts(texts, settings.EMBEDDING_MAX_LENGTH, settings.EMBEDDING_MAX_BATCH_TOKENS)
+
+    def start(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name="embedding-inference", daemon=True)
+                self.thread.start()
+
+    def submit(self, texts: List[str], priority: int = QUERY) -> List[Future]:
+        """Queue texts for embedding; each future resolves to a float32 vector"""
+        self.start()
+        futures = []
+        now = time.monotonic()
+        for text in texts:
+            future = Future()
+            try:
+                self.queue.put_nowait(EmbeddingRequest(priority, next(self.sequence), text, future, now))
+            except queue.Full:
+                EMBEDDING_REJECTED.inc()
+                future.set_exception(RuntimeError("Embedding queue is full"))
+            futures.append(future)
+        return futures
+
+    async def embed(self, texts: List[str], priority: int = QUERY) -> np.ndarray:
+        """Embed texts from the event loop without blocking it"""
+        if not texts:
+            return np.empty((0, settings.EMBEDDING_DIM), dtype=np.float32)
+        vectors = await asyncio.gather(*[asyncio.wrap_future(future) for future in self.submit(texts, priority)])
+        return np.stack(vectors)
+
+    async def embed_one(self, text: str, priority: int = QUERY) -> np.ndarray:
+        return (await self.embed([text], priority))[0]
+
+    def close(self, timeout: Optional[float] = None):
+        """Finish queued texts, then stop the inference thread"""
+        with self.lock:
+            thread, self.thread = self.thread, None
+        if thread is not None and thread.is_alive():
+            self.queue.put(EmbeddingRequest(STOP, next(self.sequence), '', None, time.monotonic()))
+            thread.join(timeout)
+
+    def _run(self):
+        while True:
+            batch, stop = self._next_batch()
+            if batch:
+                self._infer(batch)
+            if stop:
+                return
+
+    def _next_batch(self):
+        first = self.queue.get()
+        if first.priority == STOP:
+            return [], True
+
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                request = self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if request.priority == STOP:
+                return batch, True
+            batch.append(request)
+        return batch, False
+
+    def _infer(self, batch: List[EmbeddingRequest]):
+        started = time.monotonic()
+        # Futures cancelled by their caller in the meantime are skipped
+        batch = [request for request in batch if request.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        for request in batch:
+            EMBEDDING_QUEUE_WAIT.labels(kind=KINDS[request.priority]).observe(started - request.enqueued_at)
+        EMBEDDING_BATCH.observe(len(batch))
+
+        try:
+            with EMBEDDING_LATENCY.time():
+                vectors = self.encoder([request.text for request in batch])
+        except Exception as e:
+            logging.error(f"Embedding batch of {len(batch)} failed: {str(e)}")
+            for request in batch:
+                request.future.set_exception(e)
+            return
+        for request, vector in zip(batch, vectors):
+            request.future.set_result(vector)
+
+
+@lru_cache()
+def get_embedding_service() -> EmbeddingService:
+    """Shared EmbeddingService for the whole process"""
+    return EmbeddingService()
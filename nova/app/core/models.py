@@ -0,0 +1,296 @@
+import importlib.util
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import numpy as np
+from nova.app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LazyModel:
+    """Handle to a model that is loaded on first use, once per process"""
+
+    def __init__(self, name: str, loader: Callable[[], Any]):
+        self.name = name
+        self.loader = loader
+        self.lock = threading.Lock()
+        self.value: Any = None
+        self.error: Optional[Exception] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.value is not None
+
+    def get(self) -> Any:
+        if self.value is not None:
+            return self.value
+        with self.lock:
+            if self.value is None:
+                if self.error is not None:
+                    raise self.error
+                try:
+                    logger.info(f"Loading model {self.name}")
+                    self.value = self.loader()
+                except Exception as e:
+                    # Remember the failure so every caller doesn't retry the download
+                    self.error = e
+                    raise
+        return self.value
+
+
+class ModelRegistry:
+    """Process-wide registry of lazily loaded ML models"""
+
+    def __init__(self):
+        self.models: Dict[str, LazyModel] = {}
+
+    def register(self, name: str, loader: Callable[[], Any]) -> LazyModel:
+        handle = LazyModel(name, loader)
+        self.models[name] = handle
+        return handle
+
+    def handle(self, name: str) -> LazyModel:
+        return self.models[name]
+
+    def get(self, name: str) -> Any:
+        return self.models[name].get()
+
+    def preload(self, names: Optional[Iterable[str]] = None) -> threading.Thread:
+        """Load models in a background thread so the first request doesn't pay for it"""
+        names = list(names) if names is not None else list(self.models)
+
+        def load_all():
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception as e:
+                    logger.warning(f"Preloading {name} failed: {str(e)}")
+
+        thread = threading.Thread(target=load_all, name="model-preload", daemon=True)
+        thread.start()
+        return thread
+
+
+EMBEDDING_BACKENDS = ('torch', 'int8', 'onnx')
+
+# Checked against the fp32 model when a faster backend is loaded
+PARITY_SAMPLES = [
+    "how to bake sourdough bread at home",
+    "Quarterly earnings beat analyst expectations as cloud revenue grew 30 percent.",
+    "The mitochondria is the membrane-bound organelle that produces most of the cell's ATP.",
+    "best laptop for programming 2024",
+    " ".join(["Search engines crawl, index and rank documents so that queries return relevant pages."] * 20),
+]
+
+
+class TorchEncoder:
+    """DistilBERT forward pass in PyTorch, fp32 or dynamically quantized to int8"""
+
+    def __init__(self, model, device):
+        self.model = model
+        self.device = device
+        self.hidden_size = model.config.hidden_size
+
+    def __call__(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        import torch
+
+        with torch.no_grad():
+            outputs = self.model(
+                input_ids=torch.from_numpy(input_ids).to(self.device),
+                attention_mask=torch.from_numpy(attention_mask).to(self.device)
+            )
+            return outputs.last_hidden_state.float().cpu().numpy()
+
+
+class OnnxEncoder:
+    """DistilBERT forward pass on an exported ONNX graph in onnxruntime"""
+
+    def __init__(self, session, hidden_size: int):
+        self.session = session
+        self.hidden_size = hidden_size
+
+    def __call__(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        return self.session.run(['last_hidden_state'], {
+            'input_ids': input_ids.astype(np.int64),
+            'attention_mask': attention_mask.astype(np.int64)
+        })[0]
+
+
+def load_torch_encoder(name: Optional[str] = None, threads: Optional[int] = None) -> TorchEncoder:
+    from transformers import AutoModel
+    import torch
+
+    threads = settings.EMBEDDING_THREADS if threads is None else threads
+    if threads:
+        torch.set_num_threads(threads)
+    model = AutoModel.from_pretrained(name or settings.EMBEDDING_MODEL)
+    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    model.to(device)
+    model.eval()
+    return TorchEncoder(model, device)
+
+
+def quantize_encoder(reference: TorchEncoder) -> TorchEncoder:
+    """int8 weights for every Linear layer, activations quantized on the fly (CPU only)"""
+    import copy
+    import torch
+
+    model = copy.deepcopy(reference.model).to('cpu')
+    quantized = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return TorchEncoder(quantized, torch.device('cpu'))
+
+
+def export_onnx(reference: TorchEncoder, path: str):
+    """Export the fp32 model to ONNX with dynamic batch and sequence axes"""
+    import torch
+
+    class LastHiddenState(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask):
+            return self.model(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    dummy = torch.ones((2, 16), dtype=torch.long)
+    temporary = path + '.tmp'
+    torch.onnx.export(
+        LastHiddenState(reference.model.to('cpu')).eval(), (dummy, dummy), temporary,
+        input_names=['input_ids', 'attention_mask'], output_names=['last_hidden_state'],
+        dynamic_axes={name: {0: 'batch', 1: 'sequence'}
+                      for name in ('input_ids', 'attention_mask', 'last_hidden_state')},
+        opset_version=17, dynamo=False
+    )
+    reference.model.to(reference.device)
+    os.replace(temporary, path)
+
+
+def load_onnx_encoder(path: str, hidden_size: int, threads: Optional[int] = None) -> OnnxEncoder:
+    import onnxruntime
+
+    threads = settings.EMBEDDING_THREADS if threads is None else threads
+    options = onnxruntime.SessionOptions()
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if threads:
+        options.intra_op_num_threads = threads
+    # Batches already run one at a time on the inference thread
+    options.inter_op_num_threads = 1
+    options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+    session = onnxruntime.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+    return OnnxEncoder(session, hidden_size)
+
+
+def build_encoder(backend: str, reference: Optional[TorchEncoder] = None,
+                  threads: Optional[int] = None):
+    """Encoder for a backend; ``reference`` is the fp32 model, loaded when needed"""
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend: {backend}")
+    if backend == 'onnx':
+        missing = [name for name in ('onnxruntime', 'onnx') if importlib.util.find_spec(name) is None]
+        path = settings.EMBEDDING_ONNX_PATH
+        if 'onnxruntime' in missing or (missing and not os.path.exists(path)):
+            raise RuntimeError(f"The onnx embedding backend needs {', '.join(missing)} "
+                               "(pip install nova-search[onnx])")
+        if not os.path.exists(path):
+            export_onnx(reference or load_torch_encoder(threads=threads), path)
+        hidden_size = reference.hidden_size if reference else settings.EMBEDDING_DIM
+        return load_onnx_encoder(path, hidden_size, threads)
+
+    reference = reference or load_torch_encoder(threads=threads)
+    return reference if backend == 'torch' else quantize_encoder(reference)
+
+
+def encoder_parity(tokenizer, encoder, reference, texts: Optional[List[str]] = None) -> float:
+    """Lowest cosine similarity between an encoder's embeddings and the fp32 reference's"""
+    texts = texts or PARITY_SAMPLES
+    candidate = embed_texts(texts, tokenizer=tokenizer, encoder=encoder)
+    expected = embed_texts(texts, tokenizer=tokenizer, encoder=reference)
+    cosine = (candidate * expected).sum(axis=1) / (
+        np.linalg.norm(candidate, axis=1) * np.linalg.norm(expected, axis=1) + 1e-12
+    )
+    return float(cosine.min())
+
+
+def _load_distilbert():
+    from transformers import AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(settings.EMBEDDING_MODEL)
+    backend = settings.EMBEDDING_BACKEND
+    check = settings.EMBEDDING_PARITY_CHECK and backend != 'torch'
+    needs_reference = backend != 'onnx' or check or not os.path.exists(settings.EMBEDDING_ONNX_PATH)
+    reference = load_torch_encoder() if needs_reference else None
+
+    try:
+        encoder = build_encoder(backend, reference)
+    except Exception as e:
+        if backend == 'torch':
+            raise
+        logger.error(f"Embedding backend {backend} unavailable, using fp32 torch: {str(e)}")
+        return tokenizer, reference or load_torch_encoder()
+
+    if check:
+        parity = encoder_parity(tokenizer, encoder, reference)
+        if parity < settings.EMBEDDING_PARITY_MIN_COSINE:
+            logger.error(f"Embedding backend {backend} parity {parity:.4f} is below "
+                         f"{settings.EMBEDDING_PARITY_MIN_COSINE}, using fp32 torch")
+            return tokenizer, reference
+        logger.info(f"Embedding backend {backend}: min cosine vs fp32 {parity:.4f}")
+    return tokenizer, encoder
+
+
+def embed_texts(texts: List[str], max_length: int = 512, max_batch_tokens: Optional[int] = None,
+                tokenizer=None, encoder=None) -> np.ndarray:
+    """Mean-pooled DistilBERT embeddings, one row per text.
+
+    Texts are tokenized once, sorted by length and run in groups padded
+    only to their longest member; ``max_batch_tokens`` caps the padded
+    size of a group, so a long document doesn't pad many short queries.
+    """
+    if tokenizer is None or encoder is None:
+        tokenizer, encoder = registry.get('distilbert')
+    encoded = tokenizer(texts, truncation=True, max_length=max_length)
+    lengths = [len(ids) for ids in encoded['input_ids']]
+    order = sorted(range(len(texts)), key=lengths.__getitem__)
+
+    groups, group = [], []
+    for position in order:
+        # Sorted ascending, so this item sets the group's padded length
+        if group and max_batch_tokens and (len(group) + 1) * lengths[position] > max_batch_tokens:
+            groups.append(group)
+            group = []
+        group.append(position)
+    if group:
+        groups.append(group)
+
+    result = np.empty((len(texts), encoder.hidden_size), dtype=np.float32)
+    for group in groups:
+        inputs = tokenizer.pad(
+            {key: [encoded[key][i] for i in group] for key in ('input_ids', 'attention_mask')},
+            return_tensors="np"
+        )
+        hidden = encoder(inputs['input_ids'], inputs['attention_mask'])
+        # Average over real tokens only, so padding doesn't change a text's vector
+        mask = inputs['attention_mask'][..., None].astype(np.float32)
+        result[group] = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1.0)
+    return result
+
+
+def _load_summarizer():
+    from transformers import pipeline
+    return pipeline("summarization", model="facebook/bart-large-cnn")
+
+
+def _load_zero_shot():
+    from transformers import pipeline
+    return pipeline("zero-shot-classification")
+
+
+registry = ModelRegistry()
+registry.register('distilbert', _load_distilbert)
+registry.register('summarizer', _load_summarizer)
+registry.register('zero-shot', _load_zero_shot)
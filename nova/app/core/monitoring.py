@@ -10,6 +10,12 @@ from starlette.responses import Response
 SEARCH_REQUESTS = Counter('search_requests_total', 'Total search requests')
 SEARCH_LATENCY = Histogram('search_latency_seconds', 'Search request latency')
 CACHE_HITS = Counter('cache_hits_total', 'Total cache hits')
+EMBEDDING_CACHE_HITS = Counter('embedding_cache_hits_total', 'Query embedding cache hits', ['tier'])
+EMBEDDING_CACHE_MISSES = Counter('embedding_cache_misses_total', 'Query embedding cache misses')
+SEARCH_STAGE_LATENCY = Histogram('search_stage_seconds', 'Retrieval stage latency', ['stage'])
+SEARCH_STAGE_SKIPPED = Counter(
+    'search_stage_skipped_total', 'Hybrid retrieval stages dropped from a response', ['stage', 'reason']
+)
 CRAWL_ERRORS = Counter('crawl_errors_total', 'Total crawling errors')
 DB_CONNECTIONS = Gauge('db_connections', 'Number of database connections')
 
@@ -0,0 +1,21 @@
+import hashlib
+from datetime import datetime, timezone
+from typing import Optional
+
+
+def document_id(url: str) -> str:
+    """Elasticsearch _id of a page"""
+    return hashlib.sha256(url.encode()).hexdigest()
+
+
+def parse_lastmod(value: Optional[str]) -> Optional[float]:
+    """W3C datetime (a sitemap <lastmod>, a stored indexed_at) as a UTC timestamp"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
@@ -0,0 +1,153 @@
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from prometheus_client import Counter, Gauge
+from nova.app.core.config import settings
+
+HOST_LIMIT = Gauge('crawler_host_concurrency_limit', 'Current concurrency limit per host', ['host'])
+HOST_LATENCY = Gauge('crawler_host_latency_seconds', 'Smoothed response latency per host', ['host'])
+HOST_DECISIONS = Counter('crawler_host_decisions_total', 'Adaptive concurrency decisions', ['decision'])
+
+# Responses that mean "slow down"; timeouts are treated the same way
+OVERLOAD_STATUS = {429, 503}
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class HostState:
+    def __init__(self, limit: float):
+        self.limit = limit
+        self.latency: Optional[float] = None  # EWMA
+        self.baseline: Optional[float] = None  # decaying minimum of the latencies seen
+        self.errors = 0
+        self.blocked_until = 0.0
+        self.last_decrease = 0.0
+        self.last_seen = time.monotonic()
+
+
+class AdaptiveConcurrency:
+    """AIMD concurrency control per host.
+
+    Each host starts at CRAWLER_HOST_CONCURRENCY parallel fetches.  While
+    responses come back within HOST_LATENCY_TOLERANCE times the host's
+    baseline latency, the limit grows by about one per round trip, up to
+    HOST_MAX_CONCURRENCY.  429/503 responses, timeouts and rising latency
+    halve it (at most once per round trip).  Overload
+    responses also pause the host, for Retry-After seconds when given or
+    an exponential backoff otherwise.
+
+    The baseline follows faster samples halfway and drifts up towards
+    slower ones by HOST_BASELINE_DECAY per response, so one unusually
+    fast answer (a cached 304, say) cannot make every later response look
+    slow; it starts over once a host has been idle for HOST_IDLE_RESET.
+
+    The scheduler still starts fetches from a host no closer together
+    than its crawl delay (CRAWL_DELAY or robots.txt), so a host's
+    throughput is at most min(limit / latency, 1 / delay): a limit above
+    one only helps hosts that take longer than the delay to respond.
+    """
+
+    def __init__(self, min_limit: Optional[int] = None, max_limit: Optional[int] = None,
+                 initial: Optional[int] = None):
+        self.min_limit = min_limit or settings.HOST_MIN_CONCURRENCY
+        self.max_limit = max_limit or settings.HOST_MAX_CONCURRENCY
+        self.initial = initial or settings.CRAWLER_HOST_CONCURRENCY
+        self.tolerance = settings.HOST_LATENCY_TOLERANCE
+        self.baseline_decay = settings.HOST_BASELINE_DECAY
+        self.max_backoff = settings.HOST_MAX_BACKOFF
+        self.hosts: Dict[str, HostState] = {}
+        self.last_prune = time.monotonic()
+
+    def _state(self, host: str) -> HostState:
+        state = self.hosts.get(host)
+        if state is None:
+            state = self.hosts[host] = HostState(float(self.initial))
+        now = time.monotonic()
+        if now - state.last_seen > settings.HOST_IDLE_RESET:
+            # Conditions may have changed while idle; keep the limit, relearn the latencies
+            state.latency = state.baseline = None
+        state.last_seen = now
+        return state
+
+    def limit(self, host: str) -> int:
+        state = self.hosts.get(host)
+        return int(state.limit) if state else self.initial
+
+    def blocked_until(self, host: str) -> float:
+        """Monotonic time before which the host must not be fetched"""
+        state = self.hosts.get(host)
+        return state.blocked_until if state else 0.0
+
+    def on_response(self, host: str, status: int, latency: float, retry_after: Optional[str] = None):
+        state = self._state(host)
+        if status in OVERLOAD_STATUS:
+            self._overload(host, state, parse_retry_after(retry_after))
+            return
+
+        state.errors = 0
+        state.latency = latency if state.latency is None else 0.8 * state.latency + 0.2 * latency
+        state.baseline = self._baseline(state.baseline, latency)
+        HOST_LATENCY.labels(host=host).set(state.latency)
+
+        if state.latency > state.baseline * self.tolerance:
+            self._decrease(host, state, 'latency')
+        elif state.limit < self.max_limit:
+            # Additive increase: roughly +1 once a full window of fetches succeeded
+            state.limit = min(self.max_limit, state.limit + 1.0 / state.limit)
+            HOST_DECISIONS.labels(decision='increase').inc()
+            HOST_LIMIT.labels(host=host).set(int(state.limit))
+        self._prune()
+
+    def _baseline(self, baseline: Optional[float], latency: float) -> float:
+        if baseline is None:
+            return latency
+        if latency < baseline:
+            return (baseline + latency) / 2
+        return baseline + self.baseline_decay * (latency - baseline)
+
+    def on_timeout(self, host: str):
+        self._overload(host, self._state(host), None)
+
+    def _overload(self, host: str, state: HostState, retry_after: Optional[float]):
+        state.errors += 1
+        if retry_after is None:
+            retry_after = min(self.max_backoff, 2.0 ** state.errors)
+        state.blocked_until = max(state.blocked_until, time.monotonic() + min(retry_after, self.max_backoff))
+        HOST_DECISIONS.labels(decision='backoff').inc()
+        self._decrease(host, state, 'overload')
+
+    def _decrease(self, host: str, state: HostState, reason: str):
+        now = time.monotonic()
+        # One cut per round trip, or a burst of slow responses would collapse the limit
+        if now - state.last_decrease < (state.latency or 0.0):
+            return
+        state.last_decrease = now
+        state.limit = max(float(self.min_limit), state.limit / 2)
+        HOST_DECISIONS.labels(decision=f'decrease_{reason}').inc()
+        HOST_LIMIT.labels(host=host).set(int(state.limit))
+
+    def _prune(self):
+        """Drop state (and metric series) for hosts not fetched from in a while"""
+        now = time.monotonic()
+        if now - self.last_prune < 60:
+            return
+        self.last_prune = now
+        cutoff = now - settings.HOST_STATE_TTL
+        for host in [h for h, s in self.hosts.items() if s.last_seen < cutoff and s.blocked_until < now]:
+            del self.hosts[host]
+            for gauge in (HOST_LIMIT, HOST_LATENCY):
+                try:
+                    gauge.remove(host)
+                except KeyError:
+                    pass
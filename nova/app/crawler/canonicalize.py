@@ -0,0 +1,115 @@
+import re
+from functools import lru_cache
+from typing import Iterable, List, Optional
+from urllib.parse import parse_qsl, quote, urlencode, urljoin, urlsplit, urlunsplit
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+TRACKING_PARAMS = {
+    'gclid', 'dclid', 'fbclid', 'msclkid', 'yclid', 'mc_cid', 'mc_eid',
+    '_ga', '_gl', 'igshid', 'ref_src', 'spm', 'sessionid', 'phpsessid', 'jsessionid'
+}
+TRACKING_PREFIXES = ('utm_', 'pk_', 'hsa_')
+
+SKIPPED_SCHEMES = ('mailto:', 'javascript:', 'tel:', 'data:', 'ftp:')
+PERCENT_ESCAPE = re.compile(r'%[0-9a-fA-F]{2}')
+PATH_SAFE = "/:@!$&'()*+,;=-._~%"
+
+
+def remove_dot_segments(path: str) -> str:
+    """Resolve '.' and '..' path segments (RFC 3986, section 5.2.4)"""
+    if '.' not in path:
+        return path
+
+    output: List[str] = []
+    segments = path.split('/')
+    for i, segment in enumerate(segments):
+        if segment == '.':
+            if i == len(segments) - 1:
+                output.append('')
+        elif segment == '..':
+            if len(output) > 1:
+                output.pop()
+            if i == len(segments) - 1:
+                output.append('')
+        else:
+            output.append(segment)
+
+    result = '/'.join(output)
+    if path.startswith('/') and not result.startswith('/'):
+        result = '/' + result
+    return result
+
+
+class URLCanonicalizer:
+    """Normalize URLs so that trivially different spellings dedup together.
+
+    Lowercases scheme and host, drops default ports, fragments and
+    tracking parameters, sorts the query string, resolves dot-segments and
+    strips trailing slashes.  Results are memoized both per absolute URL
+    and per (base URL, href) pair, and a page's whole link list is resolved
+    in one call.
+    """
+
+    def __init__(self, cache_size: int = 100_000, strip_trailing_slash: bool = True):
+        self.strip_trailing_slash = strip_trailing_slash
+        self.canonicalize = lru_cache(maxsize=cache_size)(self._canonicalize)
+        # Relative links (navigation, footers) repeat on every page under a base URL
+        self.resolve = lru_cache(maxsize=cache_size)(self._resolve)
+
+    def _canonicalize(self, url: str) -> Optional[str]:
+        """Return the canonical form of an absolute URL, or None if it isn't crawlable"""
+        try:
+            parts = urlsplit(url.strip())
+            scheme = parts.scheme.lower()
+            if scheme not in DEFAULT_PORTS or not parts.hostname:
+                return None
+
+            host = parts.hostname.rstrip('.')
+            port = parts.port
+        except ValueError:
+            return None
+
+        # hostname drops the brackets around an IPv6 literal
+        netloc = f"[{host}]" if ':' in host else host
+        if parts.username:
+            netloc = f"{parts.username}@{netloc}"
+        if port and port != DEFAULT_PORTS[scheme]:
+            netloc = f"{netloc}:{port}"
+
+        path = quote(remove_dot_segments(parts.path), safe=PATH_SAFE)
+        path = PERCENT_ESCAPE.sub(lambda m: m.group().upper(), path) or '/'
+        if self.strip_trailing_slash and len(path) > 1:
+            path = path.rstrip('/') or '/'
+
+        query = ''
+        if parts.query:
+            params = [
+                (key, value)
+                for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+            ]
+            query = urlencode(sorted(params))
+
+        return urlunsplit((scheme, netloc, path, query, ''))
+
+    def _resolve(self, base_url: str, href: str) -> Optional[str]:
+        href = href.strip()
+        if not href or href.startswith('#') or href.lower().startswith(SKIPPED_SCHEMES):
+            return None
+        if not href.lower().startswith(('http://', 'https://')):
+            href = urljoin(base_url, href)
+        return self.canonicalize(href)
+
+    def canonicalize_links(self, base_url: str, hrefs: Iterable[str]) -> List[str]:
+        """Resolve and canonicalize a page's hrefs, dropping duplicates and non-HTTP links"""
+        seen = set()
+        urls = []
+
+        for href in hrefs:
+            url = self.resolve(base_url, href)
+            if url and url not in seen:
+                seen.add(url)
+                urls.append(url)
+
+        return urls
@@ -1,176 +1,393 @@
 import asyncio
-import aiohttp
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
+import os
+import time
+from urllib.parse import urlparse
 from nova.app.crawler.robots import RobotsParser
-from datetime import datetime
+from nova.app.crawler.fetcher import get_fetcher
+from nova.app.crawler.adaptive import OVERLOAD_STATUS, AdaptiveConcurrency
+from nova.app.crawler.scheduler import HostScheduler
+from nova.app.crawler.frontier import DiskFrontier
+from nova.app.crawler.fingerprints import RECRAWL_SKIPPED, Fingerprint, FingerprintStore
+from nova.app.crawler.dedup import NEAR_DUPLICATES, NearDuplicateDetector
+from nova.app.crawler.recrawl import RecrawlScheduler
+from nova.app.crawler.seen import SeenSet, create_seen_set
+from nova.app.crawler.canonicalize import URLCanonicalizer
+from nova.app.crawler import parsing
+from nova.app.core.config import settings
 import logging
-import json
-import hashlib
-from typing import Set, Dict, List
-import re
-from concurrent.futures import ThreadPoolExecutor
+from typing import Set, Dict, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
 import nltk
-from nltk.tokenize import sent_tokenize
-from nova.app.storage.metadata import MetadataExtractor
+from nova.app.storage.enrichment import MetadataEnricher
+from nova.app.storage.indexer import BulkIndexer, build_document
+
+# What became of a URL taken off the scheduler
+FINISHED = 'finished'  # completed on the frontier
+HANDED_OFF = 'handed_off'  # the parse worker finishes it
+DEFERRED = 'deferred'  # left pending on the frontier for the next crawl
+REQUEUED = 'requeued'  # back on the scheduler for another attempt
 
 class WebCrawler:
-    def __init__(self, max_pages: int = 1000, max_depth: int = 3):
-        self.max_pages = max_pages
+    def __init__(self, max_pages: int = 1000, max_depth: int = 3,
+                 frontier: Optional[DiskFrontier] = None, prioritizer=None,
+                 fingerprints: Optional[FingerprintStore] = None,
+                 recrawl: Optional[RecrawlScheduler] = None):
+        self.max_pages = max_pages  # per crawl() call
         self.max_depth = max_depth
-        self.visited_urls: Set[str] = set()
-        self.url_queue: asyncio.Queue = asyncio.Queue()
+        self.pages_crawled = 0
+        self.visited_urls: SeenSet = create_seen_set()
+        self.concurrency = AdaptiveConcurrency() if settings.ADAPTIVE_CONCURRENCY else None
+        self.url_queue = HostScheduler(controller=self.concurrency)
+        self.canonicalizer = URLCanonicalizer()
         self.robots_parser = RobotsParser()
-        self.metadata_extractor = MetadataExtractor()
-        self.session = None
-        self.download_delay = 1  # Respect websites by waiting between requests
+        self.indexer = BulkIndexer()
+        # Enrichment also embeds pages for the semantic index
+        self.enricher = MetadataEnricher(indexer=self.indexer) \
+            if settings.ENRICHMENT_ENABLED or settings.VECTOR_INDEX_ENABLED else None
+        self.fetcher = get_fetcher()
+        self.num_workers = settings.CRAWLER_WORKERS  # per-host parallelism is capped by the scheduler
+        self.known_hosts: Set[str] = set()
+        self.retried: Set[str] = set()  # URLs with an overload retry still queued
+
+        # Optional durable frontier; the scheduler then only holds a window of it
+        self.frontier = frontier
+        self.prioritizer = prioritizer
+        self.completed_urls: List[str] = []
+        self.deferred_urls: List[str] = []
+
+        # Optional change detection: conditional GETs and content hashes on recrawl
+        self.fingerprints = fingerprints
+        self.dedup = NearDuplicateDetector(store=fingerprints) if settings.DEDUP_ENABLED else None
+
+        # Optional recrawl scheduling: (url, changed) outcomes feed its change-rate estimates
+        self.recrawl = recrawl
+        self.recrawl_outcomes: List[Tuple[str, bool]] = []
+
+        # CPU stage: fetch workers hand pages to parse workers through a
+        # bounded queue, so fetching blocks once the parsers fall behind
+        self.parse_workers = settings.PARSE_WORKERS or os.cpu_count() or 1
+        self.parse_queue: asyncio.Queue = asyncio.Queue(maxsize=settings.PARSE_QUEUE_SIZE)
+        self.parse_pool: Optional[ProcessPoolExecutor] = None
         
         # Initialize NLTK
         nltk.download('punkt')
         nltk.download('averaged_perceptron_tagger')
         
-    async def init_session(self):
-        if not self.session:
-            self.session = aiohttp.ClientSession(
-                headers={'User-Agent': 'NovaSearchBot/1.0 (+http://novasearch.com/bot)'}
-            )
-
     async def crawl(self, start_urls: List[str]):
-        await self.init_session()
+        if not self.parse_pool:
+            self.parse_pool = ProcessPoolExecutor(max_workers=self.parse_workers)
+        self.indexer.start()
+        if self.enricher:
+            self.enricher.start()
+        self.pages_crawled = 0
         
         # Initialize queue with start URLs
-        for url in start_urls:
-            await self.url_queue.put((url, 0))  # (url, depth)
+        start_urls = [self.canonicalizer.canonicalize(url) for url in start_urls]
+        await self.enqueue_urls([(url, 0) for url in start_urls if url])  # (url, depth)
 
         # Create worker tasks
         workers = [
             asyncio.create_task(self.worker())
-            for _ in range(5)  # Number of parallel workers
+            for _ in range(self.num_workers)
+        ]
+        workers += [
+            asyncio.create_task(self.parse_worker())
+            for _ in range(self.parse_workers)
         ]
 
-        # Wait for all workers to complete
-        await asyncio.gather(*workers)
+        # Wait until the frontier is drained, then stop the workers
+        if self.frontier:
+            await self._feed_from_frontier()
+        await self.url_queue.join()
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        # Retries the crawl never got to (e.g. out of page budget)
+        self.retried.clear()
+        await self._flush_outcomes()
+        await self.indexer.flush()
+        # Periodic frontier checkpoints snapshot it too; this covers every mode
+        await asyncio.get_event_loop().run_in_executor(None, self.visited_urls.snapshot)
 
     async def worker(self):
         while True:
             try:
                 url, depth = await self.url_queue.get()
-                
-                if depth > self.max_depth or len(self.visited_urls) >= self.max_pages:
-                    self.url_queue.task_done()
+            except asyncio.CancelledError:
+                break
+
+            outcome = FINISHED
+            try:
+                if depth > self.max_depth:
+                    continue
+                if self.budget_spent:
+                    outcome = DEFERRED
                     continue
 
-                if url in self.visited_urls or not self.robots_parser.can_fetch(url):
-                    self.url_queue.task_done()
+                # The frontier leases a URL once per enqueue or recrawl, so its
+                # leases skip the seen set, which would drop every recrawl
+                seen = not self.frontier and url in self.visited_urls
+                if seen or not await self.robots_parser.can_fetch(url):
                     continue
 
-                # Crawl the page
-                await self.process_url(url, depth)
-                
-                # Respect robots.txt delay
-                await asyncio.sleep(self.download_delay)
-                
-                self.url_queue.task_done()
-                
+                await self._apply_crawl_delay(url)
+
+                # Fetch the page; the scheduler enforces the per-host delay
+                outcome = await self.process_url(url, depth)
+
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 logging.error(f"Error processing {url}: {str(e)}")
-                self.url_queue.task_done()
+            finally:
+                # The host slot is free once the fetch is over; the parse worker
+                # finishes the task of a page handed off to it
+                self.url_queue.release(url)
+                if outcome != HANDED_OFF:
+                    self._finish(url, outcome)
+
+    async def parse_worker(self):
+        while True:
+            try:
+                url, depth, html, previous, validators = await self.parse_queue.get()
+            except asyncio.CancelledError:
+                break
+
+            try:
+                await self.process_page(url, depth, html, previous, validators)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logging.error(f"Error parsing {url}: {str(e)}")
+            finally:
+                self.parse_queue.task_done()
+                self._finish(url)
+
+    def _finish(self, url: str, outcome: str = FINISHED):
+        if self.frontier:
+            if outcome == FINISHED:
+                self.completed_urls.append(url)
+            elif outcome == DEFERRED:
+                self.deferred_urls.append(url)
+            # A requeued URL stays leased until its next attempt finishes
+        self.url_queue.task_done()
+
+    @property
+    def budget_spent(self) -> bool:
+        return self.pages_crawled >= self.max_pages
+
+    async def enqueue_urls(self, items: List[Tuple[str, int]]):
+        """Queue (url, depth) pairs on the durable frontier or the in-memory scheduler"""
+        if not self.frontier:
+            for item in items:
+                self.url_queue.put_nowait(item)
+            return
+
+        # Scoring may look up host authority in Redis, so it runs off the loop too
+        await asyncio.get_event_loop().run_in_executor(None, self._push_to_frontier, items)
+
+    def _push_to_frontier(self, items: List[Tuple[str, int]]):
+        priorities = self._priorities([url for url, _ in items])
+        self.frontier.push_many([(url, depth, priority) for (url, depth), priority in zip(items, priorities)])
 
-    async def process_url(self, url: str, depth: int):
+    def _priorities(self, urls: List[str]) -> List[float]:
+        if self.prioritizer:
+            return self.prioritizer.score_batch(urls).tolist()
+        return [0.5] * len(urls)
+
+    async def _feed_from_frontier(self):
+        """Keep the scheduler topped up from disk until both are empty"""
+        loop = asyncio.get_event_loop()
+        batch_size = settings.FRONTIER_BATCH_SIZE
+        last_checkpoint = loop.time()
+
+        while True:
+            await self._flush_completed()
+            await self._flush_outcomes()
+
+            if loop.time() - last_checkpoint >= settings.FRONTIER_CHECKPOINT_INTERVAL:
+                await self._checkpoint()
+                last_checkpoint = loop.time()
+
+            if self.budget_spent:
+                # Hand what is still queued back to the frontier and let in-flight pages finish
+                self.deferred_urls.extend(url for url, _ in self.url_queue.drain())
+                if self.url_queue.unfinished == 0:
+                    break
+            elif self.url_queue.qsize() < batch_size // 2:
+                batch = await loop.run_in_executor(None, self.frontier.pop_batch, batch_size)
+                for url, depth, _ in batch:
+                    self.url_queue.put_nowait((url, depth))
+                if not batch and self.url_queue.unfinished == 0:
+                    # A parse worker may have pushed links and finished while the pop
+                    # ran; once nothing is unfinished no more can arrive, so re-check
+                    if not await loop.run_in_executor(None, self.frontier.pending_count):
+                        break
+                    continue
+
+            await asyncio.sleep(0.1)
+
+        await self._flush_completed()
+        # crawl() snapshots the seen set once everything has finished
+        await loop.run_in_executor(None, self.frontier.checkpoint)
+
+    async def _checkpoint(self):
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self.frontier.checkpoint)
+        await loop.run_in_executor(None, self.visited_urls.snapshot)
+
+    async def _flush_completed(self):
+        loop = asyncio.get_event_loop()
+        if self.completed_urls:
+            urls, self.completed_urls = self.completed_urls, []
+            await loop.run_in_executor(None, self.frontier.complete_many, urls)
+        if self.deferred_urls:
+            urls, self.deferred_urls = self.deferred_urls, []
+            await loop.run_in_executor(None, self.frontier.release_many, urls)
+
+    def _record_outcome(self, url: str, changed: bool):
+        if self.recrawl:
+            self.recrawl_outcomes.append((url, changed))
+
+    async def _flush_outcomes(self):
+        if not self.recrawl_outcomes:
+            return
+        outcomes, self.recrawl_outcomes = self.recrawl_outcomes, []
+        await asyncio.get_event_loop().run_in_executor(None, self.recrawl.record_many, outcomes)
+
+    async def _apply_crawl_delay(self, url: str):
+        """Pick up the robots.txt crawl-delay the first time a host is seen"""
+        host = self.url_queue.host_of(url)
+        if host in self.known_hosts:
+            return
+        self.known_hosts.add(host)
+        delay = await self.robots_parser.get_crawl_delay(url)
+        if delay is not None:
+            self.url_queue.set_crawl_delay(host, delay)
+
+    async def process_url(self, url: str, depth: int) -> str:
+        """Fetch a page and hand it to the parse stage; returns the URL's outcome"""
+        host = self.url_queue.host_of(url)
+        retry = url in self.retried
+        self.retried.discard(url)
         try:
-            async with self.session.get(url) as response:
+            previous = await self._load_fingerprint(url)
+            started = time.monotonic()
+            async with self.fetcher.get(url, headers=self._conditional_headers(previous)) as response:
+                if self.concurrency:
+                    self.concurrency.on_response(
+                        host, response.status, time.monotonic() - started, response.headers.get('Retry-After')
+                    )
+                if response.status in OVERLOAD_STATUS and not retry:
+                    # Try once more after the host's backoff instead of dropping the URL
+                    self.retried.add(url)
+                    await self.url_queue.put((url, depth))
+                    return REQUEUED
+                if response.status == 304:
+                    RECRAWL_SKIPPED.labels(reason='not_modified').inc()
+                    self._record_outcome(url, False)
+                    self.visited_urls.add(url)
+                    self.pages_crawled += 1
+                    return FINISHED
                 if response.status != 200:
-                    return
+                    return FINISHED
 
-                html = await response.text()
-                soup = BeautifulSoup(html, 'lxml')
+                html = await self.fetcher.text(response)
+                validators = (response.headers.get('ETag'), response.headers.get('Last-Modified'))
 
-                # Extract and store content
-                content = self.extract_content(soup)
-                metadata = self.metadata_extractor.extract(soup, url)
-                
-                # Store the processed data
-                self.store_page_data(url, content, metadata)
-                
-                # Add to visited urls
-                self.visited_urls.add(url)
+            # Add to visited urls
+            self.visited_urls.add(url)
+            self.pages_crawled += 1
 
-                # Extract and queue new URLs
-                await self.extract_and_queue_links(soup, url, depth)
+            # Blocks while the parse stage is saturated (backpressure)
+            await self.parse_queue.put((url, depth, html, previous, validators))
+            return HANDED_OFF
 
+        except asyncio.TimeoutError:
+            if self.concurrency:
+                self.concurrency.on_timeout(host)
+            logging.error(f"Timeout fetching {url}")
+            return FINISHED
         except Exception as e:
             logging.error(f"Error fetching {url}: {str(e)}")
+            return FINISHED
+
+    async def _load_fingerprint(self, url: str) -> Optional[Fingerprint]:
+        if not self.fingerprints:
+            return None
+        return await asyncio.get_event_loop().run_in_executor(None, self.fingerprints.get, url)
+
+    @staticmethod
+    def _conditional_headers(previous: Optional[Fingerprint]) -> Dict[str, str]:
+        headers = {}
+        if previous:
+            if previous.etag:
+                headers['If-None-Match'] = previous.etag
+            if previous.last_modified:
+                headers['If-Modified-Since'] = previous.last_modified
+        return headers
+
+    async def process_page(self, url: str, depth: int, html: str,
+                           previous: Optional[Fingerprint] = None,
+                           validators: Tuple[Optional[str], Optional[str]] = (None, None)):
+        """Parse a fetched page in the process pool, then store it and queue its links"""
+        loop = asyncio.get_event_loop()
+        page = await loop.run_in_executor(self.parse_pool, parsing.parse_page, html, url)
+        content = page['content']
+
+        unchanged = previous is not None and previous.content_hash == page['content_hash']
+        self._record_outcome(url, not unchanged)
+
+        if self.fingerprints:
+            fingerprint = Fingerprint(*validators, page['content_hash'], page['simhash'])
+            await loop.run_in_executor(None, self.fingerprints.put, url, fingerprint)
+            if unchanged:
+                # Same content as last time: no re-indexing, enrichment or link extraction
+                RECRAWL_SKIPPED.labels(reason='unchanged').inc()
+                return
+
+        if self.dedup is not None:
+            canonical = await loop.run_in_executor(
+                None, self.dedup.check, url, page['simhash'], len(content['main_content'].split())
+            )
+            if canonical:
+                # Mirrors, print views and session variants: skip indexing, ML and their links
+                NEAR_DUPLICATES.labels(action=settings.DEDUP_ACTION).inc()
+                if settings.DEDUP_ACTION == 'link':
+                    await self.indexer.link_duplicate(url, canonical)
+                return
+
+        # Store the processed data; AI metadata is filled in later
+        await self.store_page_data(url, content, page['metadata'])
+        if self.enricher:
+            self.enricher.submit(url, content['main_content'], content.get('title', ''))
+
+        # Extract and queue new URLs
+        await self.extract_and_queue_links(page['links'], url, depth)
 
     def extract_content(self, soup) -> Dict:
-        # Remove unwanted elements
-        for element in soup(['script', 'style', 'nav', 'footer', 'iframe']):
-            element.decompose()
+        return parsing.extract_content(soup)
 
-        # Extract main content
-        main_content = ''
-        content_areas = soup.find_all(['article', 'main', 'div'], class_=re.compile(r'content|article|post'))
-        
-        if content_areas:
-            main_content = ' '.join(area.get_text(strip=True) for area in content_areas)
-        else:
-            main_content = soup.get_text(strip=True)
-
-        # Extract important sentences
-        sentences = sent_tokenize(main_content)
-        important_sentences = self.extract_important_sentences(sentences)
-
-        return {
-            'title': self.extract_title(soup),
-            'description': self.extract_description(soup),
-            'main_content': main_content,
-            'summary': ' '.join(important_sentences[:3]),
-            'keywords': self.extract_keywords(main_content)
-        }
-
-    def store_page_data(self, url: str, content: Dict, metadata: Dict):
-        page_data = {
-            'url': url,
-            'crawled_at': datetime.utcnow().isoformat(),
-            'content': content,
-            'metadata': metadata
-        }
-
-        # Generate unique ID for the page
-        page_id = hashlib.sha256(url.encode()).hexdigest()
-
-        # Save to JSON file (in production, use a proper database)
-        with open(f'data/pages/{page_id}.json', 'w') as f:
-            json.dump(page_data, f)
-
-    async def extract_and_queue_links(self, soup, base_url: str, depth: int):
-        links = soup.find_all('a', href=True)
-        
-        for link in links:
-            url = urljoin(base_url, link['href'])
-            
-            # Filter URLs
-            if self.should_crawl_url(url):
-                await self.url_queue.put((url, depth + 1))
+    async def store_page_data(self, url: str, content: Dict, metadata: Dict):
+        # Written to MongoDB and Elasticsearch in bulk by the indexer
+        await self.indexer.submit(build_document(url, content, metadata))
+
+    async def extract_and_queue_links(self, hrefs: List[str], base_url: str, depth: int):
+        urls = self.canonicalizer.canonicalize_links(base_url, hrefs)
+        if self.prioritizer and urls:
+            # Cross-host links feed the host_authority priority feature
+            await asyncio.get_event_loop().run_in_executor(None, self.prioritizer.record_links, base_url, urls)
+
+        # Filter URLs
+        await self.enqueue_urls([
+            (url, depth + 1) for url in urls
+            if url not in self.visited_urls and self.should_crawl_url(url)
+        ])
 
     def should_crawl_url(self, url: str) -> bool:
+        # URLs are canonical here, so fragments are already gone
         parsed = urlparse(url)
         return (
             parsed.scheme in ('http', 'https') and
-            not any(ext in url.lower() for ext in ['.pdf', '.jpg', '.png', '.gif']) and
-            '#' not in url
+            not parsed.path.lower().endswith(('.pdf', '.jpg', '.png', '.gif'))
         )
-
-    def extract_important_sentences(self, sentences: List[str]) -> List[str]:
-        # Simple importance scoring based on sentence length and keywords
-        scored_sentences = []
-        important_keywords = {'key', 'important', 'significant', 'primary', 'essential'}
-        
-        for sentence in sentences:
-            score = len(sentence.split())  # Basic length score
-            words = set(sentence.lower().split())
-            score += sum(2 for word in words if word in important_keywords)
-            scored_sentences.append((score, sentence))
-        
-        return [s[1] for s in sorted(scored_sentences, reverse=True)]
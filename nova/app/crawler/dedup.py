@@ -0,0 +1,190 @@
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from prometheus_client import Counter
+from nova.app.core.config import settings
+from nova.app.crawler.simhash import SIMHASH_BITS
+
+NEAR_DUPLICATES = Counter('near_duplicates_total', 'Pages detected as near-duplicates at crawl time', ['action'])
+
+
+def popcount(values: np.ndarray) -> np.ndarray:
+    """Number of set bits in each uint64"""
+    return np.unpackbits(values.view(np.uint8)).reshape(-1, SIMHASH_BITS).sum(axis=1)
+
+
+class SimHashIndex:
+    """Array-backed LSH index over 64-bit SimHashes.
+
+    Fingerprints are split into ``threshold + 1`` bands; by the pigeonhole
+    principle any two within ``threshold`` bits agree exactly on at least
+    one band, so candidates are the documents sharing a band value.  Each
+    band is a pair of sorted NumPy arrays (band value, document id)
+    searched with ``searchsorted``.  New documents sit in an unsorted tail
+    that is scanned directly and merged into the sorted arrays every
+    ``merge_size`` inserts, keeping inserts cheap and memory at roughly
+    56 bytes per document.  Removed documents are only masked out of
+    query results; the owner rebuilds the index once enough pile up.
+    """
+
+    def __init__(self, threshold: int = 3, capacity: int = 1024, merge_size: int = 8192):
+        self.threshold = threshold
+        self.merge_size = merge_size
+        num_bands = threshold + 1
+        widths = [SIMHASH_BITS // num_bands + (1 if i < SIMHASH_BITS % num_bands else 0) for i in range(num_bands)]
+        self.bands: List[Tuple[np.uint64, np.uint64]] = []
+        shift = 0
+        for width in widths:
+            self.bands.append((np.uint64(shift), np.uint64((1 << width) - 1)))
+            shift += width
+
+        self.hashes = np.zeros(capacity, dtype=np.uint64)
+        self.live = np.zeros(capacity, dtype=bool)
+        self.count = 0
+        self.removed = 0
+        self.merged = 0
+        self.band_keys = [np.empty(0, dtype=np.uint64) for _ in self.bands]
+        self.band_ids = [np.empty(0, dtype=np.uint32) for _ in self.bands]
+
+    def __len__(self) -> int:
+        return self.count
+
+    def add(self, simhash: int) -> int:
+        """Insert a fingerprint and return its document id"""
+        if self.count == len(self.hashes):
+            self._grow(self.count + 1)
+        doc_id = self.count
+        self.hashes[doc_id] = np.uint64(simhash)
+        self.live[doc_id] = True
+        self.count += 1
+        if self.count - self.merged >= self.merge_size:
+            self._merge()
+        return doc_id
+
+    def add_many(self, simhashes: np.ndarray) -> np.ndarray:
+        """Insert fingerprints in bulk with a single merge; returns their document ids"""
+        simhashes = np.asarray(simhashes, dtype=np.uint64)
+        self._grow(self.count + len(simhashes))
+        doc_ids = np.arange(self.count, self.count + len(simhashes), dtype=np.uint32)
+        self.hashes[doc_ids] = simhashes
+        self.live[doc_ids] = True
+        self.count += len(simhashes)
+        if self.count - self.merged >= self.merge_size:
+            self._merge()
+        return doc_ids
+
+    def remove(self, doc_id: int):
+        if self.live[doc_id]:
+            self.live[doc_id] = False
+            self.removed += 1
+
+    def _grow(self, size: int):
+        if size > len(self.hashes):
+            capacity = max(size, len(self.hashes) * 2)
+            self.hashes = np.resize(self.hashes, capacity)
+            self.live = np.resize(self.live, capacity)
+            self.live[self.count:] = False
+
+    def query(self, simhash: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Document ids within ``threshold`` bits of the fingerprint, nearest first, and their distances"""
+        value = np.uint64(simhash)
+        candidates = [np.arange(self.merged, self.count, dtype=np.uint32)]
+        for (shift, mask), keys, ids in zip(self.bands, self.band_keys, self.band_ids):
+            key = (value >> shift) & mask
+            lo = np.searchsorted(keys, key, side='left')
+            hi = np.searchsorted(keys, key, side='right')
+            candidates.append(ids[lo:hi])
+
+        candidates = np.unique(np.concatenate(candidates))
+        candidates = candidates[self.live[candidates]]
+        if not len(candidates):
+            return candidates, candidates
+        distances = popcount(self.hashes[candidates] ^ value)
+        close = distances <= self.threshold
+        candidates, distances = candidates[close], distances[close]
+        order = np.argsort(distances, kind='stable')
+        return candidates[order], distances[order]
+
+    def _merge(self):
+        """Fold the unsorted tail into each band's sorted arrays"""
+        new_ids = np.arange(self.merged, self.count, dtype=np.uint32)
+        new_hashes = self.hashes[self.merged:self.count]
+        for band, (shift, mask) in enumerate(self.bands):
+            new_keys = (new_hashes >> shift) & mask
+            order = np.argsort(new_keys, kind='stable')
+            new_keys, ids = new_keys[order], new_ids[order]
+            positions = np.searchsorted(self.band_keys[band], new_keys, side='right')
+            self.band_keys[band] = np.insert(self.band_keys[band], positions, new_keys)
+            self.band_ids[band] = np.insert(self.band_ids[band], positions, ids)
+        self.merged = self.count
+
+
+class NearDuplicateDetector:
+    """Finds pages whose main content is a near-copy of one already crawled.
+
+    The first URL seen with a given content becomes its canonical URL;
+    later pages within DEDUP_THRESHOLD bits of its SimHash map to it.
+    Pages shorter than DEDUP_MIN_WORDS are never treated as duplicates,
+    since boilerplate-only pages would all collide.
+
+    The index holds one entry per canonical URL: a recrawl replaces the
+    URL's entry, and a page that turns into a duplicate or too short
+    loses it.  With a ``store`` (see ``FingerprintStore``) entries are
+    written through and reloaded on startup.  ``check`` is blocking and
+    thread-safe; call it from an executor on the event loop.
+    """
+
+    def __init__(self, threshold: Optional[int] = None, min_words: Optional[int] = None, store=None):
+        self.threshold = threshold if threshold is not None else settings.DEDUP_THRESHOLD
+        self.min_words = min_words if min_words is not None else settings.DEDUP_MIN_WORDS
+        self.store = store
+        self.lock = threading.Lock()
+        self.index = SimHashIndex(self.threshold)
+        self.urls: List[Optional[str]] = []
+        self.ids: Dict[str, int] = {}
+        if store is not None:
+            self._load(store.canonical_simhashes())
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def check(self, url: str, simhash: int, num_words: int) -> Optional[str]:
+        """Return the canonical URL if this page is a near-duplicate, else record it and return None"""
+        with self.lock:
+            if num_words < self.min_words:
+                self._remove(url)
+                return None
+
+            matches, _ = self.index.query(simhash)
+            canonicals = [self.urls[doc_id] for doc_id in matches]
+            if canonicals and url not in canonicals:
+                # Its own earlier content no longer stands for anything
+                self._remove(url)
+                return canonicals[0]
+
+            # New content, or a recrawl of a canonical page (not a duplicate of itself)
+            self._remove(url, forget=False)
+            self.ids[url] = self.index.add(simhash)
+            self.urls.append(url)
+            if self.store is not None:
+                self.store.put_canonical(url, simhash)
+            return None
+
+    def _remove(self, url: str, forget: bool = True):
+        doc_id = self.ids.pop(url, None)
+        if doc_id is None:
+            return
+        self.index.remove(doc_id)
+        self.urls[doc_id] = None
+        if forget and self.store is not None:
+            self.store.delete_canonical(url)
+        if self.index.removed > max(len(self.ids), self.index.merge_size):
+            self._load([(live_url, int(self.index.hashes[doc_id])) for live_url, doc_id in self.ids.items()])
+
+    def _load(self, entries: Iterable[Tuple[str, int]]):
+        """(Re)build the index from (url, simhash) pairs, dropping removed entries"""
+        entries = list(entries)
+        self.index = SimHashIndex(self.threshold)
+        doc_ids = self.index.add_many(np.array([simhash for _, simhash in entries], dtype=np.uint64))
+        self.urls = [url for url, _ in entries]
+        self.ids = {url: int(doc_id) for (url, _), doc_id in zip(entries, doc_ids)}
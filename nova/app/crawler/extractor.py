@@ -0,0 +1,119 @@
+import json
+from typing import Dict, List, Tuple
+import lxml.html
+from lxml import etree
+
+# Single-pass counterpart of the BeautifulSoup extraction in parsing.py:
+# one walk over an lxml tree collects what the soup path finds in ~10 passes.
+
+SKIPPED_TAGS = {'script', 'style', 'nav', 'footer', 'iframe'}
+CONTENT_TAGS = {'article', 'main', 'div'}
+CONTENT_CLASSES = ('content', 'article', 'post')
+META_NAMES = {'description': 'meta_description', 'keywords': 'meta_keywords', 'author': 'author'}
+
+
+def _is_content_area(element) -> bool:
+    if element.tag not in CONTENT_TAGS:
+        return False
+    classes = element.get('class')
+    return bool(classes) and any(name in classes for name in CONTENT_CLASSES)
+
+
+def _parse_json_ld(text: str, schema_data: Dict):
+    try:
+        data = json.loads(text or '')
+    except ValueError:
+        return
+    for item in data if isinstance(data, list) else [data]:
+        if isinstance(item, dict):
+            schema_data.update(item)
+
+
+def scan_page(html: str) -> Tuple[Dict, List[str], str]:
+    """Return (metadata, hrefs, main_content) in the shapes the BeautifulSoup path produces"""
+    metadata = {
+        'title': '',
+        'meta_description': '',
+        'meta_keywords': '',
+        'og_data': {},
+        'schema_data': {},
+        'author': '',
+        'published_date': '',
+        'language': ''
+    }
+    links: List[str] = []
+    all_text: List[str] = []
+    areas: List[List[str]] = []
+
+    try:
+        root = lxml.html.document_fromstring(html)
+    except ValueError:
+        # str input carrying an XML encoding declaration
+        root = lxml.html.document_fromstring(html.encode('utf-8'))
+    except etree.ParserError:
+        return metadata, links, ''
+
+    metadata['language'] = root.get('lang', '')
+    title_found = False
+    skip_depth = 0
+    area_depth = 0
+
+    def add_text(text):
+        text = text.strip()
+        if text:
+            all_text.append(text)
+            if area_depth:
+                areas[-1].append(text)
+
+    for event, element in etree.iterwalk(root, events=('start', 'end')):
+        tag = element.tag
+        if not isinstance(tag, str):
+            # Comments and processing instructions only contribute their tail
+            if event == 'end' and skip_depth == 0 and element.tail:
+                add_text(element.tail)
+            continue
+
+        if event == 'start':
+            if tag == 'meta':
+                name = (element.get('name') or '').lower()
+                prop = element.get('property') or ''
+                content = element.get('content', '')
+                if name in META_NAMES and not metadata[META_NAMES[name]]:
+                    metadata[META_NAMES[name]] = content
+                if prop.startswith('og:'):
+                    metadata['og_data'][prop] = content
+                elif prop == 'article:published_time' and not metadata['published_date']:
+                    metadata['published_date'] = content
+            elif tag == 'a':
+                href = element.get('href')
+                if href is not None:
+                    links.append(href)
+            elif tag == 'title' and not title_found:
+                title_found = True
+                metadata['title'] = element.text_content()
+            elif tag == 'script' and element.get('type') == 'application/ld+json':
+                _parse_json_ld(element.text, metadata['schema_data'])
+
+            if tag in SKIPPED_TAGS:
+                skip_depth += 1
+            elif skip_depth == 0:
+                if _is_content_area(element):
+                    if area_depth == 0:
+                        areas.append([])
+                    area_depth += 1
+                if element.text:
+                    add_text(element.text)
+        else:
+            if tag in SKIPPED_TAGS:
+                skip_depth -= 1
+            elif skip_depth == 0 and _is_content_area(element):
+                area_depth -= 1
+            if skip_depth == 0 and element.tail:
+                add_text(element.tail)
+
+    if areas:
+        main_content = ' '.join(''.join(area) for area in areas)
+    else:
+        main_content = ''.join(all_text)
+
+    return metadata, links, main_content
@@ -0,0 +1,149 @@
+import asyncio
+import zlib
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import AsyncIterator, Dict, Optional
+import aiohttp
+from nova.app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; without it we don't advertise "br"
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+USER_AGENT = 'NovaSearchBot/1.0 (+http://novasearch.com/bot)'
+ACCEPT_ENCODING = 'gzip, deflate, br' if brotli else 'gzip, deflate'
+
+
+class BodyTooLarge(Exception):
+    """Raised when a response body exceeds the fetcher's size limit"""
+
+
+class ContentDecoder:
+    """Incremental decoder for a Content-Encoding (gzip, deflate, br or identity)"""
+
+    def __init__(self, encoding: Optional[str]):
+        encoding = (encoding or 'identity').strip().lower()
+        if encoding in ('gzip', 'x-gzip'):
+            self.decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif encoding == 'deflate':
+            self.decompressor = zlib.decompressobj()
+        elif encoding == 'br':
+            if brotli is None:
+                raise ValueError("Brotli-encoded response but no brotli module installed")
+            self.decompressor = brotli.Decompressor()
+        elif encoding == 'identity':
+            self.decompressor = None
+        else:
+            raise ValueError(f"Unsupported content encoding: {encoding}")
+
+    def decompress(self, chunk: bytes) -> bytes:
+        if self.decompressor is None:
+            return chunk
+        if hasattr(self.decompressor, 'process'):
+            return self.decompressor.process(chunk)
+        return self.decompressor.decompress(chunk)
+
+    def flush(self) -> bytes:
+        if self.decompressor is None or not hasattr(self.decompressor, 'flush'):
+            return b''
+        return self.decompressor.flush()
+
+
+class Fetcher:
+    """HTTP fetch layer shared by the crawler, sitemap and robots.txt parsers.
+
+    One ClientSession over a tuned TCPConnector: a global and per-host
+    connection cap, keep-alive, and a DNS cache with a TTL (resolved
+    asynchronously when aiodns is installed).  Bodies are streamed and
+    decompressed here rather than by aiohttp, so gzip/deflate/br are
+    handled the same way everywhere and a size cutoff applies to the
+    decoded bytes (guarding against compression bombs).
+    """
+
+    def __init__(self):
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.max_size = settings.FETCH_MAX_BYTES
+        self.chunk_size = 64 * 1024
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            resolver = None
+            try:
+                import aiodns  # noqa: F401
+                resolver = aiohttp.AsyncResolver()
+            except ImportError:
+                pass
+
+            connector = aiohttp.TCPConnector(
+                limit=settings.FETCH_MAX_CONNECTIONS,
+                limit_per_host=settings.FETCH_CONNECTIONS_PER_HOST,
+                ttl_dns_cache=settings.FETCH_DNS_CACHE_TTL,
+                use_dns_cache=True,
+                keepalive_timeout=settings.FETCH_KEEPALIVE_TIMEOUT,
+                enable_cleanup_closed=True,
+                resolver=resolver
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(
+                    total=settings.FETCH_TIMEOUT, sock_connect=settings.FETCH_CONNECT_TIMEOUT
+                ),
+                headers={'User-Agent': USER_AGENT, 'Accept-Encoding': ACCEPT_ENCODING},
+                auto_decompress=False
+            )
+        return self.session
+
+    @asynccontextmanager
+    async def get(self, url: str, headers: Optional[Dict[str, str]] = None, **kwargs):
+        """GET a URL; read the body with iter_body(), read() or text()"""
+        session = await self.get_session()
+        async with session.get(url, headers=headers, **kwargs) as response:
+            yield response
+
+    async def iter_body(self, response: aiohttp.ClientResponse,
+                        max_size: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Stream the decoded body, raising BodyTooLarge past max_size decoded bytes"""
+        limit = max_size or self.max_size
+        decoder = ContentDecoder(response.headers.get('Content-Encoding'))
+        received = 0
+
+        async for chunk in response.content.iter_chunked(self.chunk_size):
+            data = decoder.decompress(chunk)
+            received += len(data)
+            if received > limit:
+                raise BodyTooLarge(f"{response.url} exceeds {limit} bytes")
+            if data:
+                yield data
+
+        tail = decoder.flush()
+        if tail:
+            if received + len(tail) > limit:
+                raise BodyTooLarge(f"{response.url} exceeds {limit} bytes")
+            yield tail
+
+    async def read(self, response: aiohttp.ClientResponse, max_size: Optional[int] = None) -> bytes:
+        return b''.join([chunk async for chunk in self.iter_body(response, max_size)])
+
+    async def text(self, response: aiohttp.ClientResponse, max_size: Optional[int] = None) -> str:
+        body = await self.read(response, max_size)
+        try:
+            return body.decode(response.charset or 'utf-8', errors='replace')
+        except LookupError:  # unknown charset label
+            return body.decode('utf-8', errors='replace')
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+            # Let the connector finish closing transports before the loop goes away
+            await asyncio.sleep(0.25)
+
+
+@lru_cache()
+def get_fetcher() -> Fetcher:
+    """Shared Fetcher for the whole process"""
+    return Fetcher()
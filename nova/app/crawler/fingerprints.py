@@ -0,0 +1,123 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import List, NamedTuple, Optional, Tuple
+from prometheus_client import Counter
+from nova.app.core.config import settings
+
+RECRAWL_SKIPPED = Counter(
+    'recrawl_skipped_total', 'Recrawled pages that stopped early because nothing changed', ['reason']
+)
+
+
+class Fingerprint(NamedTuple):
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_hash: Optional[str]
+    simhash: Optional[int]
+
+
+def normalize_text(text: str) -> str:
+    return ' '.join(text.lower().split())
+
+
+def content_hash(text: str) -> str:
+    """Hash of the normalized main content, stable across whitespace and case changes"""
+    return hashlib.blake2b(normalize_text(text).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _to_signed(value: Optional[int]) -> Optional[int]:
+    # SQLite integers are signed 64-bit
+    if value is not None and value >= 1 << 63:
+        return value - (1 << 64)
+    return value
+
+
+def _to_unsigned(value: Optional[int]) -> Optional[int]:
+    if value is not None and value < 0:
+        return value + (1 << 64)
+    return value
+
+
+class FingerprintStore:
+    """Per-URL change-detection state kept in SQLite.
+
+    Holds the ETag and Last-Modified validators of the last fetch, used
+    for conditional GETs on recrawl, and the content hash and SimHash of
+    the last parsed main content.  A second table keeps the SimHash of
+    every canonical page, the near-duplicate index that
+    ``NearDuplicateDetector`` reloads on startup.
+
+    Methods are blocking; call them from an executor on the event loop.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.FINGERPRINT_PATH
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS fingerprints (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT,
+                simhash INTEGER,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS canonical_simhashes (
+                url TEXT PRIMARY KEY,
+                simhash INTEGER NOT NULL
+            )
+        """)
+
+    def get(self, url: str) -> Optional[Fingerprint]:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT etag, last_modified, content_hash, simhash FROM fingerprints WHERE url = ?",
+                (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, digest, simhash = row
+        return Fingerprint(etag, last_modified, digest, _to_unsigned(simhash))
+
+    def put(self, url: str, fingerprint: Fingerprint):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO fingerprints "
+                "(url, etag, last_modified, content_hash, simhash, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (url, fingerprint.etag, fingerprint.last_modified, fingerprint.content_hash,
+                 _to_signed(fingerprint.simhash), time.time())
+            )
+
+    def canonical_simhashes(self) -> List[Tuple[str, int]]:
+        with self.lock:
+            rows = self.conn.execute("SELECT url, simhash FROM canonical_simhashes").fetchall()
+        return [(url, _to_unsigned(simhash)) for url, simhash in rows]
+
+    def put_canonical(self, url: str, simhash: int):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO canonical_simhashes (url, simhash) VALUES (?, ?)",
+                (url, _to_signed(simhash))
+            )
+
+    def delete_canonical(self, url: str):
+        with self.lock:
+            self.conn.execute("DELETE FROM canonical_simhashes WHERE url = ?", (url,))
+
+    def close(self):
+        with self.lock:
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self.conn.close()
@@ -0,0 +1,168 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterable, List, Optional, Tuple
+from nova.app.core.config import settings
+
+PENDING = 0
+LEASED = 1
+DONE = 2
+
+
+class DiskFrontier:
+    """Durable crawl frontier backed by SQLite in WAL mode.
+
+    Every URL ever enqueued is kept on disk with its depth, priority and
+    state, so the frontier survives restarts and doubles as the persistent
+    visited set.  Only the batches handed out by ``pop_batch`` live in
+    memory.  URLs that were leased but never completed (e.g. the process
+    crashed mid-fetch) go back to pending on startup.
+
+    Methods are blocking; call them from an executor on the event loop.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.FRONTIER_PATH
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS frontier (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL UNIQUE,
+                depth INTEGER NOT NULL,
+                priority REAL NOT NULL,
+                state INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS frontier_pending "
+            "ON frontier (priority DESC, seq) WHERE state = 0"
+        )
+        self.recover()
+
+    def recover(self) -> int:
+        """Return leased URLs to the pending state after an unclean shutdown"""
+        with self.lock:
+            cursor = self.conn.execute(
+                "UPDATE frontier SET state = ?, updated_at = ? WHERE state = ?",
+                (PENDING, time.time(), LEASED)
+            )
+            return cursor.rowcount
+
+    def push_many(self, items: Iterable[Tuple[str, int, float]], requeue: bool = False) -> int:
+        """Enqueue (url, depth, priority) tuples in one transaction.
+
+        URLs already known to the frontier are ignored, unless ``requeue``
+        is set, in which case completed URLs become pending again.
+        """
+        now = time.time()
+        rows = [(url, depth, priority, PENDING, now) for url, depth, priority in items]
+        if not rows:
+            return 0
+
+        if requeue:
+            sql = (
+                "INSERT INTO frontier (url, depth, priority, state, updated_at) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET state = 0, depth = excluded.depth, "
+                "priority = excluded.priority, updated_at = excluded.updated_at "
+                "WHERE state = 2"
+            )
+        else:
+            sql = (
+                "INSERT OR IGNORE INTO frontier (url, depth, priority, state, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)"
+            )
+
+        with self.lock:
+            before = self.conn.total_changes
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.executemany(sql, rows)
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            return self.conn.total_changes - before
+
+    def pop_batch(self, size: int) -> List[Tuple[str, int, float]]:
+        """Lease up to ``size`` pending URLs, highest priority first"""
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self.conn.execute(
+                    "SELECT seq, url, depth, priority FROM frontier "
+                    "WHERE state = 0 ORDER BY priority DESC, seq LIMIT ?",
+                    (size,)
+                ).fetchall()
+                self.conn.executemany(
+                    "UPDATE frontier SET state = ?, updated_at = ? WHERE seq = ?",
+                    [(LEASED, time.time(), row[0]) for row in rows]
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return [(url, depth, priority) for _, url, depth, priority in rows]
+
+    def complete_many(self, urls: Iterable[str]) -> int:
+        """Mark leased URLs as crawled"""
+        now = time.time()
+        rows = [(DONE, now, url) for url in urls]
+        if not rows:
+            return 0
+        with self.lock:
+            before = self.conn.total_changes
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.executemany(
+                    "UPDATE frontier SET state = ?, updated_at = ? WHERE url = ?", rows
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            return self.conn.total_changes - before
+
+    def release_many(self, urls: Iterable[str]) -> int:
+        """Return leased URLs to pending, e.g. when a crawl ran out of page budget"""
+        now = time.time()
+        rows = [(PENDING, now, url, LEASED) for url in urls]
+        if not rows:
+            return 0
+        with self.lock:
+            before = self.conn.total_changes
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.executemany(
+                    "UPDATE frontier SET state = ?, updated_at = ? WHERE url = ? AND state = ?", rows
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            return self.conn.total_changes - before
+
+    def pending_count(self) -> int:
+        with self.lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM frontier WHERE state = 0"
+            ).fetchone()[0]
+
+    def checkpoint(self):
+        """Fold the WAL back into the main database file"""
+        with self.lock:
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        with self.lock:
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self.conn.close()
@@ -1,11 +1,13 @@
 from typing import List
+from functools import lru_cache
 import asyncio
 import structlog
 from prometheus_client import Counter, Gauge
 from concurrent.futures import ThreadPoolExecutor
-from datetime import datetime, timedelta
-import aiohttp
+import glob
+import json
 import logging
+import os
 from nova.app.core.config import settings
 
 
@@ -18,76 +20,158 @@ class CrawlerManager:
         from nova.app.crawler.crawler import WebCrawler
         from nova.app.crawler.url_prioritizer import URLPrioritizer
         from nova.app.crawler.sitemap import SitemapParser
+        from nova.app.crawler.frontier import DiskFrontier
+        from nova.app.crawler.fingerprints import FingerprintStore
+        from nova.app.crawler.recrawl import RecrawlScheduler
         from nova.app.storage.database import Database
         
-        self.crawler = WebCrawler()
         self.prioritizer = URLPrioritizer()
+        self.frontier = DiskFrontier()
+        self.fingerprints = FingerprintStore()
+        self.recrawl = RecrawlScheduler()
+        self.crawler = WebCrawler(
+            frontier=self.frontier, prioritizer=self.prioritizer,
+            fingerprints=self.fingerprints, recrawl=self.recrawl
+        )
         self.sitemap_parser = SitemapParser()
         self.db = Database()
         self.executor = ThreadPoolExecutor(max_workers=4)
-        self.queue = asyncio.Queue()
+        # The API and schedule_crawls share one crawler; only one crawl() runs at a time
+        self.crawl_lock = asyncio.Lock()
+        self.crawl_requested = False
 
     async def start_crawling(self, seed_urls: List[str]):
+        """Read the seeds' sitemaps, then crawl every URL that is new, changed or due"""
         try:
             logger.info("starting_crawl", urls=seed_urls)
             
             # Initialize monitoring
             CRAWL_QUEUE_SIZE.set(len(seed_urls))
-            
-            # Use thread pool for CPU-intensive tasks
-            with ThreadPoolExecutor() as pool:
-                sitemap_urls = await self.sitemap_parser.parse_multiple(seed_urls)
-                prioritized_urls = await asyncio.get_event_loop().run_in_executor(
-                    pool, self.prioritizer.prioritize_urls, sitemap_urls
-                )
-            
-            await self._process_urls(prioritized_urls)
+
+            await self.refresh_sitemaps(seed_urls)
+            for url in seed_urls:
+                # Picked up by schedule_crawls from now on
+                await self.db.update_crawl_schedule(url, settings.SITEMAP_REFRESH_INTERVAL)
+            await self.crawl_due()
             
         except Exception as e:
             logger.error("crawl_error", error=str(e))
             raise
 
-    async def _process_urls(self, urls: List[dict]):
+    async def refresh_sitemaps(self, seed_urls: List[str]):
+        """Stream sitemap entries into the recrawl schedule, batch by batch"""
+        loop = asyncio.get_event_loop()
+        canonicalize = self.crawler.canonicalizer.canonicalize
+        async for records in self.sitemap_parser.iter_batches(seed_urls, settings.FRONTIER_BATCH_SIZE):
+            canonical = []
+            for record in records:
+                url = canonicalize(record['url'])
+                if url:
+                    canonical.append({**record, 'url': url})
+            await loop.run_in_executor(self.executor, self.recrawl.observe, canonical)
+
+    async def crawl_due(self):
+        """Move URLs whose recrawl is due onto the frontier and crawl them"""
+        loop = asyncio.get_event_loop()
+        queued = 0
+        while True:
+            due = await loop.run_in_executor(self.executor, self.recrawl.due, settings.FRONTIER_BATCH_SIZE)
+            if not due:
+                break
+            prioritized_urls = await loop.run_in_executor(
+                self.executor, self.prioritizer.prioritize_urls, [url for url, _ in due]
+            )
+            await self._queue_urls(prioritized_urls)
+            queued += len(due)
+
+        if queued:
+            logger.info("recrawl_due", urls=queued)
+        # Also picks up URLs an earlier crawl left pending when it ran out of page budget
+        if queued or await loop.run_in_executor(self.executor, self.frontier.pending_count):
+            await self._run_crawl()
+
+    async def _run_crawl(self):
+        """Crawl the frontier, or leave new URLs to the crawl already running"""
+        self.crawl_requested = True
+        if self.crawl_lock.locked():
+            # Its feeder picks them up from the frontier; if it is already
+            # finishing, it runs once more for them
+            return
+        async with self.crawl_lock:
+            while self.crawl_requested:
+                self.crawl_requested = False
+                await self.crawler.crawl([])
+
+    async def _queue_urls(self, urls: List[dict]):
+        loop = asyncio.get_event_loop()
+        rows = []
         for url_data in urls:
-            await self.queue.put(url_data)
-            CRAWL_QUEUE_SIZE.inc()
+            url = self.crawler.canonicalizer.canonicalize(url_data['url'])
+            if url:
+                rows.append((url, 0, url_data['priority']))
+        await loop.run_in_executor(self.executor, self.frontier.push_many, rows, True)
+        CRAWL_QUEUE_SIZE.set(await loop.run_in_executor(self.executor, self.frontier.pending_count))
 
-        workers = [
-            asyncio.create_task(self._crawler_worker())
-            for _ in range(settings.CRAWLER_WORKERS)  # Use settings instead of CONFIG
-        ]
-        
-        await asyncio.gather(*workers)
+    async def resume_crawling(self):
+        """Finish whatever was left on the durable frontier by a previous run"""
+        loop = asyncio.get_event_loop()
+        pending = await loop.run_in_executor(self.executor, self.frontier.pending_count)
+        if pending:
+            logger.info("resuming_crawl", pending=pending)
+            CRAWL_QUEUE_SIZE.set(pending)
+            await self._run_crawl()
 
 
 
     async def schedule_crawls(self):
         """Schedule periodic crawls based on site update frequency"""
+        try:
+            await self.resume_crawling()
+        except Exception as e:
+            logging.error(f"Resume error: {str(e)}")
+
         while True:
             try:
-                # Get sites due for recrawl
+                # Re-read sitemaps that are due, then fetch only the URLs likely to have changed
                 sites = await self.db.get_sites_for_recrawl()
-                
                 for site in sites:
-                    await self.start_crawling([site['url']])
-                    
-                # Update crawl schedule
-                await self.db.update_crawl_schedule(site['url'])
+                    await self.refresh_sitemaps([site['url']])
+                    await self.db.update_crawl_schedule(site['url'], settings.SITEMAP_REFRESH_INTERVAL)
+
+                await self.crawl_due()
                 
             except Exception as e:
                 logging.error(f"Scheduling error: {str(e)}")
             
-            await asyncio.sleep(3600)  # Check every hour
+            await asyncio.sleep(settings.RECRAWL_CHECK_INTERVAL)
 
     async def index_crawled_data(self):
-        """Index newly crawled data into search database"""
+        """Index pages left in data/pages as JSON files by older crawler versions"""
+        from nova.app.storage.indexer import build_document
+
+        loop = asyncio.get_event_loop()
+        indexer = self.crawler.indexer
+        indexer.start()
         try:
-            # Get recently crawled pages
-            new_pages = await self.db.get_unindexed_pages()
-            
-            # Process and index pages
-            for page in new_pages:
-                await self.db.index_page(page)
-                
+            paths = glob.glob('data/pages/*.json')
+            for path in paths:
+                page = await loop.run_in_executor(self.executor, self._load_page, path)
+                await indexer.submit(build_document(page['url'], page['content'], page['metadata']))
+
+            await indexer.flush()
+            for path in paths:
+                os.remove(path)
+
         except Exception as e:
-            logging.error(f"Indexing error: {str(e)}")
\ No newline at end of file
+            logging.error(f"Indexing error: {str(e)}")
+
+    @staticmethod
+    def _load_page(path: str) -> dict:
+        with open(path) as f:
+            return json.load(f)
+
+
+@lru_cache()
+def get_crawler_manager() -> CrawlerManager:
+    """Shared CrawlerManager for the whole process"""
+    return CrawlerManager()
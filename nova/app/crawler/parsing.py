@@ -0,0 +1,106 @@
+from bs4 import BeautifulSoup
+from collections import Counter
+from typing import Dict, List
+import re
+from nltk.tokenize import sent_tokenize
+from nova.app.core.config import settings
+from nova.app.crawler.extractor import scan_page
+from nova.app.crawler.fingerprints import content_hash
+from nova.app.crawler.simhash import simhash
+from nova.app.storage.metadata import BasicMetadataExtractor
+
+# Everything in this module runs inside the crawler's parse process pool,
+# so it must stay importable without loading any ML models.
+
+CONTENT_CLASS = re.compile(r'content|article|post')
+WORD = re.compile(r'[a-zA-Z]{4,}')
+STOPWORDS = {
+    'this', 'that', 'with', 'from', 'have', 'will', 'your', 'what', 'when', 'were',
+    'they', 'their', 'there', 'which', 'about', 'would', 'been', 'more', 'also', 'into'
+}
+
+metadata_extractor = BasicMetadataExtractor()
+
+
+def parse_page(html: str, url: str) -> Dict:
+    """Parse a fetched page into its content, basic metadata, outgoing hrefs and content fingerprint"""
+    if settings.HTML_EXTRACTOR == 'lxml':
+        metadata, links, main_content = scan_page(html)
+        content = build_content(metadata['title'].strip(), metadata['meta_description'], main_content)
+    else:
+        soup = BeautifulSoup(html, 'lxml')
+
+        # Links and metadata first: extract_content() strips nav/footer/script tags
+        links = [link['href'] for link in soup.find_all('a', href=True)]
+        metadata = metadata_extractor.extract(soup, url)
+        content = extract_content(soup)
+
+    return {
+        'content': content,
+        'metadata': metadata,
+        'links': links,
+        'content_hash': content_hash(content['main_content']),
+        'simhash': simhash(content['main_content'])
+    }
+
+
+def extract_content(soup) -> Dict:
+    # Remove unwanted elements
+    for element in soup(['script', 'style', 'nav', 'footer', 'iframe']):
+        element.decompose()
+
+    # Extract main content
+    main_content = ''
+    content_areas = soup.find_all(['article', 'main', 'div'], class_=CONTENT_CLASS)
+
+    if content_areas:
+        main_content = ' '.join(area.get_text(strip=True) for area in content_areas)
+    else:
+        main_content = soup.get_text(strip=True)
+
+    return build_content(extract_title(soup), extract_description(soup), main_content)
+
+
+def build_content(title: str, description: str, main_content: str) -> Dict:
+    # Extract important sentences
+    sentences = sent_tokenize(main_content)
+    important_sentences = extract_important_sentences(sentences)
+
+    return {
+        'title': title,
+        'description': description,
+        'main_content': main_content,
+        'summary': ' '.join(important_sentences[:3]),
+        'keywords': extract_keywords(main_content)
+    }
+
+
+def extract_title(soup) -> str:
+    title = soup.find('title')
+    return title.get_text(strip=True) if title else ''
+
+
+def extract_description(soup) -> str:
+    meta_desc = soup.find('meta', attrs={'name': 'description'})
+    return meta_desc.get('content', '') if meta_desc else ''
+
+
+def extract_keywords(text: str, limit: int = 10) -> List[str]:
+    """Most frequent non-trivial words in the text"""
+    words = (word.lower() for word in WORD.findall(text))
+    counts = Counter(word for word in words if word not in STOPWORDS)
+    return [word for word, _ in counts.most_common(limit)]
+
+
+def extract_important_sentences(sentences: List[str]) -> List[str]:
+    # Simple importance scoring based on sentence length and keywords
+    scored_sentences = []
+    important_keywords = {'key', 'important', 'significant', 'primary', 'essential'}
+
+    for sentence in sentences:
+        score = len(sentence.split())  # Basic length score
+        words = set(sentence.lower().split())
+        score += sum(2 for word in words if word in important_keywords)
+        scored_sentences.append((score, sentence))
+
+    return [s[1] for s in sorted(scored_sentences, reverse=True)]
@@ -0,0 +1,168 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from nova.app.core.config import settings
+from nova.app.core.utils import parse_lastmod
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+# Sitemap changefreq hints, used as the prior for a URL's change interval
+CHANGEFREQ_SECONDS = {
+    'always': HOUR,
+    'hourly': HOUR,
+    'daily': DAY,
+    'weekly': 7 * DAY,
+    'monthly': 30 * DAY,
+    'yearly': 365 * DAY,
+}
+DEFAULT_INTERVAL = 7 * DAY
+
+
+class RecrawlScheduler:
+    """Decides which sitemap URLs are worth refetching, and when.
+
+    For every URL seen in a sitemap it keeps the last <lastmod>, the
+    <changefreq> hint and the changes observed on past crawls.  The change
+    interval is estimated as (observed time + prior) / (changes + 1), with
+    the changefreq hint as the prior, and the next fetch is scheduled one
+    interval after the last.  A newer <lastmod> makes a URL due at once.
+    URLs live in SQLite with an index on the due time, so each cycle only
+    reads the URLs that are due.
+
+    Methods are blocking; call them from an executor on the event loop.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.RECRAWL_PATH
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.min_interval = settings.RECRAWL_MIN_INTERVAL
+        self.max_interval = settings.RECRAWL_MAX_INTERVAL
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS recrawl (
+                url TEXT PRIMARY KEY,
+                lastmod REAL,
+                changefreq TEXT,
+                priority REAL,
+                last_crawled REAL,
+                changes INTEGER NOT NULL DEFAULT 0,
+                observed REAL NOT NULL DEFAULT 0,
+                next_due REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS recrawl_due ON recrawl (next_due)")
+
+    def _write(self, sql: str, rows: List[Tuple]) -> int:
+        if not rows:
+            return 0
+        with self.lock:
+            before = self.conn.total_changes
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.executemany(sql, rows)
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            return self.conn.total_changes - before
+
+    def observe(self, records: Iterable[Dict]) -> int:
+        """Record sitemap entries; new URLs, and URLs whose lastmod moved past their last crawl, become due"""
+        now = time.time()
+        rows = [
+            (record['url'], parse_lastmod(record.get('lastmod')), record.get('changefreq'),
+             record.get('priority'), now)
+            for record in records
+        ]
+        return self._write(
+            "INSERT INTO recrawl (url, lastmod, changefreq, priority, next_due) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(url) DO UPDATE SET "
+            "next_due = CASE WHEN excluded.lastmod > COALESCE(recrawl.lastmod, 0) "
+            "AND excluded.lastmod > COALESCE(recrawl.last_crawled, 0) "
+            "THEN MIN(recrawl.next_due, excluded.next_due) ELSE recrawl.next_due END, "
+            "lastmod = COALESCE(excluded.lastmod, recrawl.lastmod), "
+            "changefreq = excluded.changefreq, priority = excluded.priority",
+            rows
+        )
+
+    def due(self, limit: int) -> List[Tuple[str, float]]:
+        """Lease up to ``limit`` due (url, priority) pairs, most overdue first"""
+        now = time.time()
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self.conn.execute(
+                    "SELECT url, priority FROM recrawl WHERE next_due <= ? ORDER BY next_due LIMIT ?",
+                    (now, limit)
+                ).fetchall()
+                # Not handed out again until record_many() schedules them properly
+                self.conn.executemany(
+                    "UPDATE recrawl SET next_due = ? WHERE url = ?",
+                    [(now + settings.RECRAWL_LEASE, url) for url, _ in rows]
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return [(url, priority if priority is not None else 0.5) for url, priority in rows]
+
+    def interval(self, changefreq: Optional[str], changes: int, observed: float) -> float:
+        prior = CHANGEFREQ_SECONDS.get(changefreq or '', DEFAULT_INTERVAL)
+        if changefreq == 'never':
+            prior = self.max_interval
+        estimate = (observed + prior) / (changes + 1)
+        return min(self.max_interval, max(self.min_interval, estimate))
+
+    def record_many(self, outcomes: Iterable[Tuple[str, bool]]) -> int:
+        """Update change estimates from crawl outcomes, as (url, changed) pairs, and reschedule"""
+        outcomes = list(outcomes)
+        if not outcomes:
+            return 0
+        now = time.time()
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                updated = 0
+                for url, changed in outcomes:
+                    row = self.conn.execute(
+                        "SELECT changefreq, last_crawled, changes, observed FROM recrawl WHERE url = ?",
+                        (url,)
+                    ).fetchone()
+                    if row is None:
+                        continue  # not from a sitemap
+                    changefreq, last_crawled, changes, observed = row
+                    # The first fetch only establishes a baseline
+                    if last_crawled is not None:
+                        observed += now - last_crawled
+                        changes += 1 if changed else 0
+                    self.conn.execute(
+                        "UPDATE recrawl SET last_crawled = ?, changes = ?, observed = ?, next_due = ? "
+                        "WHERE url = ?",
+                        (now, changes, observed, now + self.interval(changefreq, changes, observed), url)
+                    )
+                    updated += 1
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return updated
+
+    def due_count(self) -> int:
+        with self.lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM recrawl WHERE next_due <= ?", (time.time(),)
+            ).fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self.conn.close()
@@ -1,68 +1,220 @@
-import urllib.robotparser
-import aiohttp
 import asyncio
+import json
+import re
 from urllib.parse import urlparse
 import logging
-from typing import Dict
-import time
+from typing import Dict, List, Optional, Tuple
 import redis
 from nova.app.core.config import settings
+from nova.app.crawler.fetcher import get_fetcher
+from nova.app.search.cache import LRUCache
+
+AGENT_TOKEN = 'novasearchbot'
+
+
+class RobotsRules:
+    """Compiled robots.txt rules for our user agent.
+
+    Matching follows RFC 9309: the longest matching pattern wins, Allow
+    wins a tie, ``*`` and a trailing ``$`` are supported, and a path no
+    rule matches is allowed.
+    """
+
+    def __init__(self, rules: List[Tuple[bool, str]], crawl_delay: Optional[float] = None,
+                 sitemaps: Optional[List[str]] = None):
+        self.rules = rules
+        self.crawl_delay = crawl_delay
+        self.sitemaps = sitemaps or []
+        # Most specific first, so the first match decides
+        ordered = sorted(rules, key=lambda rule: (len(rule[1]), rule[0]), reverse=True)
+        self.compiled = [(allow, self._compile(pattern)) for allow, pattern in ordered]
+
+    @staticmethod
+    def _compile(pattern: str):
+        anchored = pattern.endswith('$')
+        body = re.escape(pattern[:-1] if anchored else pattern).replace(r'\*', '.*')
+        return re.compile(body + ('$' if anchored else ''))
+
+    @classmethod
+    def allow_all(cls) -> 'RobotsRules':
+        return cls([])
+
+    @classmethod
+    def disallow_all(cls) -> 'RobotsRules':
+        return cls([(False, '/')])
+
+    @classmethod
+    def parse(cls, text: str) -> 'RobotsRules':
+        groups: List[Tuple[List[str], List[Tuple[bool, str]], Dict]] = []
+        sitemaps = []
+        current = None
+        in_rules = False
+
+        for line in text.splitlines():
+            line = line.split('#', 1)[0].strip()
+            if ':' not in line:
+                continue
+            key, value = (part.strip() for part in line.split(':', 1))
+            key = key.lower()
+
+            if key == 'user-agent':
+                # Consecutive user-agent lines share one group
+                if current is None or in_rules:
+                    current = ([], [], {})
+                    groups.append(current)
+                    in_rules = False
+                current[0].append(value.split('/', 1)[0].strip().lower())
+            elif key in ('allow', 'disallow') and current is not None:
+                in_rules = True
+                if value:
+                    current[1].append((key == 'allow', value))
+            elif key == 'crawl-delay' and current is not None:
+                in_rules = True
+                try:
+                    current[2]['crawl_delay'] = float(value)
+                except ValueError:
+                    pass
+            elif key == 'sitemap' and value:
+                sitemaps.append(value)
+
+        matched = [group for group in groups if AGENT_TOKEN in group[0]]
+        if not matched:
+            matched = [group for group in groups if '*' in group[0]]
+
+        rules, crawl_delay = [], None
+        for _, group_rules, extras in matched:
+            rules.extend(group_rules)
+            if crawl_delay is None:
+                crawl_delay = extras.get('crawl_delay')
+        return cls(rules, crawl_delay, sitemaps)
+
+    def allowed(self, path: str) -> bool:
+        if path == '/robots.txt':
+            return True
+        for allow, pattern in self.compiled:
+            if pattern.match(path):
+                return allow
+        return True
+
+    def to_json(self) -> str:
+        return json.dumps({'rules': self.rules, 'crawl_delay': self.crawl_delay, 'sitemaps': self.sitemaps})
+
+    @classmethod
+    def from_json(cls, data) -> 'RobotsRules':
+        payload = json.loads(data)
+        return cls([tuple(rule) for rule in payload['rules']], payload.get('crawl_delay'),
+                   payload.get('sitemaps'))
+
 
 class RobotsParser:
+    """robots.txt checks backed by per-host compiled rules.
+
+    Each origin's robots.txt is fetched once through the shared fetcher
+    (concurrent checks for the same host wait on a single fetch), compiled
+    into ``RobotsRules`` and cached in Redis for every worker process, and
+    in a local LRU for this one; a check is then an in-memory match.
+    Unreachable hosts and 5xx answers are cached as disallow-all for the
+    shorter ROBOTS_NEGATIVE_TTL.
+    """
+
     def __init__(self):
-        self.parsers: Dict[str, urllib.robotparser.RobotFileParser] = {}
-        self.cache_time = 3600  # Cache robots.txt for 1 hour
-        self.last_checked = {}
+        self.cache_time = settings.ROBOTS_CACHE_TTL
+        self.negative_cache_time = settings.ROBOTS_NEGATIVE_TTL
+        self.local = LRUCache(settings.ROBOTS_LOCAL_CACHE_SIZE, self.negative_cache_time)
         self.redis_client = redis.from_url(settings.REDIS_URL)  # Use settings.REDIS_URL
-        self.session = None
+        self.fetcher = get_fetcher()
+        self.in_flight: Dict[str, asyncio.Future] = {}
 
-
-    async def init_session(self):
-        if not self.session:
-            self.session = aiohttp.ClientSession()
+    @staticmethod
+    def origin(url: str) -> str:
+        parsed = urlparse(url)
+        return f"{parsed.scheme}://{parsed.netloc.lower()}"
 
     async def can_fetch(self, url: str) -> bool:
         try:
-            cached = await self._get_cached_result(url)
-            if cached is not None:
-                return cached
-
-            result = await self._fetch_and_check(url)
-            await self._cache_result(url, result)
-            return result
+            parsed = urlparse(url)
+            path = (parsed.path or '/') + (f"?{parsed.query}" if parsed.query else '')
+            rules = await self.get_rules(url)
+            return rules.allowed(path)
 
         except Exception as e:
             logging.error(f"Robots check error: {str(e)}")
             return False
 
-    async def _fetch_and_check(self, url: str) -> bool:
-        parsed_url = urlparse(url)
-        base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
-        
-        # Check if we need to update the cached parser
-        if self._should_update_parser(base_url):
-            await self._update_parser(base_url)
-
-        parser = self.parsers.get(base_url)
-        if parser:
-            return parser.can_fetch("NovaSearchBot/1.0", url)
-        
-        return True  # If no robots.txt, assume allowed
-
-    async def _get_cached_result(self, url: str) -> bool:
-        result = await self.redis_client.get(f"robots:{url}")
-        return bool(int(result)) if result else None
-
-    def _should_update_parser(self, base_url: str) -> bool:
-        last_check = self.last_checked.get(base_url, 0)
-        return time.time() - last_check > self.cache_time
-
-    async def _update_parser(self, base_url: str):
+    async def get_crawl_delay(self, url: str) -> Optional[float]:
+        """Return the robots.txt crawl-delay for the URL's host, if any"""
+        try:
+            return (await self.get_rules(url)).crawl_delay
+        except Exception as e:
+            logging.error(f"Crawl delay lookup error: {str(e)}")
+        return None
+
+    async def get_sitemaps(self, url: str) -> List[str]:
+        """Sitemap URLs listed in the host's robots.txt"""
+        try:
+            return (await self.get_rules(url)).sitemaps
+        except Exception as e:
+            logging.error(f"Sitemap lookup error: {str(e)}")
+        return []
+
+    async def get_rules(self, url: str) -> RobotsRules:
+        origin = self.origin(url)
+        rules = self.local.get(origin)
+        if rules is not None:
+            return rules
+
+        # Single-flight: concurrent misses for a host share one Redis lookup and fetch
+        pending = self.in_flight.get(origin)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        self.in_flight[origin] = future
+        try:
+            # The Redis client is synchronous; keep its round trips off the event loop
+            rules = await loop.run_in_executor(None, self._get_cached_rules, origin)
+            if rules is None:
+                rules, ttl = await self._fetch_rules(origin)
+                await loop.run_in_executor(None, self._cache_rules, origin, rules, ttl)
+            self.local.set(origin, rules)
+            future.set_result(rules)
+            return rules
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Waiters re-raise it; don't warn when there are none
+            raise
+        finally:
+            del self.in_flight[origin]
+
+    async def _fetch_rules(self, origin: str) -> Tuple[RobotsRules, int]:
+        try:
+            async with self.fetcher.get(f"{origin}/robots.txt") as response:
+                if response.status in (401, 403):
+                    return RobotsRules.disallow_all(), self.cache_time
+                if response.status >= 500:
+                    return RobotsRules.disallow_all(), self.negative_cache_time
+                if response.status >= 400:
+                    return RobotsRules.allow_all(), self.cache_time
+                text = await self.fetcher.text(response, settings.ROBOTS_MAX_BYTES)
+                return RobotsRules.parse(text), self.cache_time
+        except Exception as e:
+            logging.error(f"Error fetching robots.txt for {origin}: {str(e)}")
+            return RobotsRules.disallow_all(), self.negative_cache_time
+
+    def _get_cached_rules(self, origin: str) -> Optional[RobotsRules]:
+        try:
+            data = self.redis_client.get(f"robots:{origin}")
+            return RobotsRules.from_json(data) if data else None
+        except Exception as e:
+            logging.warning(f"Robots cache get error: {str(e)}")
+            return None
+
+    def _cache_rules(self, origin: str, rules: RobotsRules, ttl: int):
         try:
-            parser = urllib.robotparser.RobotFileParser()
-            parser.set_url(f"{base_url}/robots.txt")
-            await parser.read()
-            self.parsers[base_url] = parser
-            self.last_checked[base_url] = time.time()
+            self.redis_client.setex(f"robots:{origin}", ttl, rules.to_json())
         except Exception as e:
-            logging.error(f"Error updating robots parser for {base_url}: {str(e)}")
\ No newline at end of file
+            logging.warning(f"Robots cache set error: {str(e)}")
@@ -0,0 +1,162 @@
+import asyncio
+import heapq
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+from nova.app.core.config import settings
+
+
+class HostScheduler:
+    """Crawl frontier keyed by host with per-host politeness.
+
+    URLs are queued per host and a single heap orders hosts by the time
+    they may next be fetched from.  A worker only waits when every host
+    with pending URLs is cooling down or already at its concurrency cap.
+    Mirrors the ``asyncio.Queue`` interface used by the crawler workers
+    (``put``/``get``/``task_done``/``join``).
+
+    With a ``controller`` (see ``AdaptiveConcurrency``) the per-host
+    concurrency cap and any backoff pause come from it instead of the
+    fixed ``host_concurrency``.
+    """
+
+    def __init__(self, crawl_delay: Optional[float] = None, host_concurrency: Optional[int] = None,
+                 controller=None):
+        self.default_delay = settings.CRAWL_DELAY if crawl_delay is None else crawl_delay
+        self.host_concurrency = host_concurrency or settings.CRAWLER_HOST_CONCURRENCY
+        self.controller = controller
+        self.pending: Dict[str, Deque[Tuple[str, int]]] = {}
+        self.delays: Dict[str, float] = {}
+        self.ready_at: Dict[str, float] = {}
+        self.in_flight: Dict[str, int] = {}
+        self.heap: List[Tuple[float, str]] = []
+        self.scheduled: set = set()
+        self.size = 0
+        self.unfinished = 0
+        self.wakeup = asyncio.Event()
+        self.finished = asyncio.Event()
+        self.finished.set()
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        return urlparse(url).netloc.lower()
+
+    def set_crawl_delay(self, host: str, delay: Optional[float]):
+        """Override the politeness delay for a host (e.g. robots.txt crawl-delay)"""
+        if delay is None:
+            self.delays.pop(host, None)
+        else:
+            self.delays[host] = max(float(delay), 0.0)
+
+    def get_crawl_delay(self, host: str) -> float:
+        return self.delays.get(host, self.default_delay)
+
+    def host_limit(self, host: str) -> int:
+        if self.controller:
+            return self.controller.limit(host)
+        return self.host_concurrency
+
+    def _next_ready(self, host: str) -> float:
+        ready = self.ready_at.get(host, 0.0)
+        if self.controller:
+            ready = max(ready, self.controller.blocked_until(host))
+        return ready
+
+    def qsize(self) -> int:
+        return self.size
+
+    def empty(self) -> bool:
+        return self.size == 0
+
+    def put_nowait(self, item: Tuple[str, int]):
+        url, depth = item
+        host = self.host_of(url)
+        self.pending.setdefault(host, deque()).append((url, depth))
+        self.size += 1
+        self.unfinished += 1
+        self.finished.clear()
+        self._schedule(host)
+
+    async def put(self, item: Tuple[str, int]):
+        self.put_nowait(item)
+
+    async def get(self) -> Tuple[str, int]:
+        """Wait for the next URL whose host is ready to be fetched"""
+        while True:
+            now = time.monotonic()
+            while self.heap and self.heap[0][0] <= now:
+                _, host = heapq.heappop(self.heap)
+                self.scheduled.discard(host)
+                queue = self.pending.get(host)
+                if not queue:
+                    continue
+                if self.in_flight.get(host, 0) >= self.host_limit(host):
+                    # Rescheduled by release() once a slot frees up
+                    continue
+                if self._next_ready(host) > now:
+                    # Backed off after this entry was queued
+                    self._schedule(host)
+                    continue
+
+                url, depth = queue.popleft()
+                if not queue:
+                    del self.pending[host]
+                self.size -= 1
+                self.in_flight[host] = self.in_flight.get(host, 0) + 1
+                self.ready_at[host] = now + self.get_crawl_delay(host)
+                self._schedule(host)
+                return url, depth
+
+            self.wakeup.clear()
+            timeout = self.heap[0][0] - now if self.heap else None
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def drain(self) -> List[Tuple[str, int]]:
+        """Remove and return every queued item that get() has not handed out"""
+        items = [item for queue in self.pending.values() for item in queue]
+        self.pending.clear()
+        self.size = 0
+        self.unfinished -= len(items)
+        if self.unfinished == 0:
+            self.finished.set()
+        return items
+
+    def release(self, url: str):
+        """Free the host slot taken by get() once the fetch itself is over"""
+        host = self.host_of(url)
+        count = self.in_flight.get(host, 0) - 1
+        if count > 0:
+            self.in_flight[host] = count
+        else:
+            self.in_flight.pop(host, None)
+        self._schedule(host)
+        idle = host not in self.pending and host not in self.in_flight
+        if idle and self.ready_at.get(host, 0.0) <= time.monotonic():
+            self.ready_at.pop(host, None)
+
+    def task_done(self, url: Optional[str] = None):
+        """Mark an item from get() as processed, releasing its host slot if given"""
+        if url is not None:
+            self.release(url)
+
+        if self.unfinished <= 0:
+            raise ValueError('task_done() called too many times')
+        self.unfinished -= 1
+        if self.unfinished == 0:
+            self.finished.set()
+
+    async def join(self):
+        await self.finished.wait()
+
+    def _schedule(self, host: str):
+        if host in self.scheduled or not self.pending.get(host):
+            return
+        if self.in_flight.get(host, 0) >= self.host_limit(host):
+            return
+        self.scheduled.add(host)
+        heapq.heappush(self.heap, (self._next_ready(host), host))
+        self.wakeup.set()
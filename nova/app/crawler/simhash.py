@@ -0,0 +1,48 @@
+import hashlib
+import re
+from collections import Counter
+from typing import List
+import numpy as np
+
+SIMHASH_BITS = 64
+TOKEN = re.compile(r'\w+', re.UNICODE)
+BIT_POSITIONS = np.arange(SIMHASH_BITS, dtype=np.uint64)
+
+
+def shingles(text: str, size: int = 3) -> List[str]:
+    """Overlapping word n-grams of the lower-cased text"""
+    tokens = TOKEN.findall(text.lower())
+    if len(tokens) <= size:
+        return [' '.join(tokens)] if tokens else []
+    return [' '.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)]
+
+
+def feature_hash(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def simhash(text: str, size: int = 3) -> int:
+    """64-bit SimHash of the text's shingles, weighted by frequency.
+
+    Pages that differ only in a few words get fingerprints a few bits
+    apart, so near-duplicates can be found by Hamming distance.
+    """
+    counts = Counter(shingles(text, size))
+    if not counts:
+        return 0
+
+    hashes = np.fromiter((feature_hash(feature) for feature in counts), dtype=np.uint64, count=len(counts))
+    weights = np.fromiter(counts.values(), dtype=np.int64, count=len(counts))
+
+    # One row of +1/-1 votes per feature, summed per bit position
+    bits = ((hashes[:, None] >> BIT_POSITIONS) & np.uint64(1)).astype(np.int64)
+    votes = weights @ (2 * bits - 1)
+
+    value = 0
+    for position in np.flatnonzero(votes > 0):
+        value |= 1 << int(position)
+    return value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
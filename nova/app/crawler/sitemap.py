@@ -1,115 +1,148 @@
 import asyncio
-import aiohttp
-from typing import List, Set
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
 import logging
-from urllib.parse import urljoin
 import xml.etree.ElementTree as ET
-import gzip
-from io import BytesIO
+import zlib
 from aiohttp import ClientTimeout
-from ratelimit import limits, sleep_and_retry
+from nova.app.core.config import settings
+from nova.app.crawler.fetcher import BodyTooLarge, get_fetcher
+
+GZIP_MAGIC = b'\x1f\x8b'
+MAX_INDEX_DEPTH = 3  # sitemap indexes may not nest, but be lenient
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit('}', 1)[-1]
+
+
+def _parse_priority(value: Optional[str]) -> Optional[float]:
+    try:
+        return min(1.0, max(0.0, float(value))) if value else None
+    except ValueError:
+        return None
+
 
 class SitemapParser:
+    """Streaming sitemap reader.
+
+    Sitemaps are read chunk by chunk from the shared fetcher (which undoes
+    Content-Encoding), gunzipped incrementally when the file itself is a
+    .xml.gz, and fed to an XMLPullParser whose elements are cleared as soon
+    as they are consumed.  URL records are yielded as they are parsed, so
+    memory stays flat no matter how large the sitemap or how many files a
+    sitemap index points to.
+    """
+
     def __init__(self):
-        self.session = None
+        self.fetcher = get_fetcher()
         self.parsed_urls: Set[str] = set()
-        self.timeout = ClientTimeout(total=30)
-        self.rate_limit = 10  # requests per second
-
-    async def init_session(self):
-        if not self.session:
-            self.session = aiohttp.ClientSession(
-                headers={'User-Agent': 'NovaSearchBot/1.0 (+http://novasearch.com/bot)'}
-            )
+        self.timeout = ClientTimeout(total=settings.SITEMAP_TIMEOUT)
+        self.max_size = settings.SITEMAP_MAX_BYTES
 
     async def parse_multiple(self, seed_urls: List[str]) -> List[str]:
-        """Parse multiple sitemaps from seed URLs"""
-        await self.init_session()
-        all_urls = set()
+        """Parse multiple sitemaps from seed URLs into one list (buffers every URL; prefer iter_urls)"""
+        urls = {}
+        async for record in self.iter_urls(seed_urls):
+            urls[record['url']] = None
+        return list(urls)
 
-        try:
-            tasks = [self.parse_sitemap(url) for url in seed_urls]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            for urls in results:
-                if isinstance(urls, set):  # Filter out exceptions
-                    all_urls.update(urls)
+    async def iter_urls(self, seed_urls: List[str]) -> AsyncIterator[Dict]:
+        """Yield {'url', 'lastmod', 'changefreq', 'priority'} records from every seed sitemap"""
+        self.parsed_urls = set()
+        for url in seed_urls:
+            async for record in self.iter_sitemap(url):
+                yield record
 
-        except Exception as e:
-            logging.error(f"Error parsing multiple sitemaps: {str(e)}")
-        finally:
-            await self.session.close()
+    async def iter_batches(self, seed_urls: List[str], size: int) -> AsyncIterator[List[Dict]]:
+        batch = []
+        async for record in self.iter_urls(seed_urls):
+            batch.append(record)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
 
-        return list(all_urls)
+    async def iter_sitemap(self, url: str, depth: int = 0) -> AsyncIterator[Dict]:
+        """Stream the URL records of one sitemap, following sitemap index entries"""
+        if url in self.parsed_urls or depth > MAX_INDEX_DEPTH:
+            return
+        self.parsed_urls.add(url)
 
-    @sleep_and_retry
-    @limits(calls=10, period=1)  # Rate limit: 10 calls per second
-    async def parse_sitemap(self, url: str) -> Set[str]:
-        """Parse a single sitemap URL"""
-        urls = set()
+        children = []
         try:
-            if url in self.parsed_urls:
-                return urls
-
-            self.parsed_urls.add(url)
-            
-            # Fetch sitemap content
-            async with self.session.get(url, timeout=self.timeout) as response:
+            async with self.fetcher.get(url, timeout=self.timeout) as response:
                 if response.status != 200:
-                    return urls
-
-                # Add compression handling
-                if response.headers.get('Content-Encoding') == 'br':
-                    import brotli
-                    content = await response.read()
-                    return brotli.decompress(content).decode('utf-8')
-
-                content = await self._get_content(response)
-                if not content:
-                    return urls
-
-                # Parse XML content
-                root = ET.fromstring(content)
-                
-                # Handle sitemap index files
-                if 'sitemapindex' in root.tag:
-                    tasks = []
-                    for sitemap in root.findall('.//{*}loc'):
-                        sitemap_url = sitemap.text.strip()
-                        tasks.append(self.parse_sitemap(sitemap_url))
-                    
-                    results = await asyncio.gather(*tasks, return_exceptions=True)
-                    for result in results:
-                        if isinstance(result, set):
-                            urls.update(result)
-                
-                # Handle regular sitemaps
-                else:
-                    for url_elem in root.findall('.//{*}loc'):
-                        page_url = url_elem.text.strip()
-                        urls.add(page_url)
+                    return
+                async for kind, record in self._iter_entries(response):
+                    if kind == 'sitemap':
+                        # Child sitemaps are read after this one, so only one connection stays open
+                        children.append(record['url'])
+                    else:
+                        yield record
 
         except asyncio.TimeoutError:
             logging.error(f"Timeout while fetching {url}")
-            return set()
         except Exception as e:
             logging.error(f"Error parsing sitemap {url}: {str(e)}")
-            return set()
 
-        return urls
+        for child in children:
+            async for record in self.iter_sitemap(child, depth + 1):
+                yield record
 
-    async def _get_content(self, response) -> str:
-        """Handle different content encodings"""
-        try:
-            if response.headers.get('Content-Type', '').endswith('gzip'):
-                content = await response.read()
-                with gzip.GzipFile(fileobj=BytesIO(content)) as gz:
-                    return gz.read().decode('utf-8')
-            return await response.text()
-        except Exception as e:
-            logging.error(f"Error reading content: {str(e)}")
-            return ''
+    async def _iter_entries(self, response) -> AsyncIterator[Tuple[str, Dict]]:
+        parser = ET.XMLPullParser(events=('start', 'end'))
+        state = {'root': None}
+        gunzip = None
+        decoded = 0
+        first = True
+
+        async for chunk in self.fetcher.iter_body(response, self.max_size):
+            if first:
+                first = False
+                if chunk[:2] == GZIP_MAGIC:
+                    gunzip = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            if gunzip:
+                # Inflate no more than the remaining allowance, so a small chunk of a
+                # gzip bomb can't allocate far past max_size before it is checked
+                chunk = gunzip.decompress(chunk, self.max_size - decoded + 1)
+                decoded += len(chunk)
+                if decoded > self.max_size or gunzip.unconsumed_tail:
+                    raise BodyTooLarge(f"{response.url} exceeds {self.max_size} bytes uncompressed")
+
+            parser.feed(chunk)
+            for entry in self._drain(parser, state):
+                yield entry
+
+        parser.close()
+        for entry in self._drain(parser, state):
+            yield entry
+
+    def _drain(self, parser: ET.XMLPullParser, state: Dict):
+        for event, elem in parser.read_events():
+            if event == 'start':
+                if state['root'] is None:
+                    state['root'] = elem
+                continue
+
+            kind = _local_name(elem.tag)
+            if kind not in ('url', 'sitemap'):
+                continue
+
+            fields = {_local_name(child.tag): (child.text or '').strip() for child in elem}
+            loc = fields.get('loc')
+            # Drop consumed entries so the tree never grows past one element
+            state['root'].clear()
+
+            if not loc or not self._is_valid_url(loc):
+                continue
+            yield kind, {
+                'url': loc,
+                'lastmod': fields.get('lastmod') or None,
+                'changefreq': (fields.get('changefreq') or '').lower() or None,
+                'priority': _parse_priority(fields.get('priority'))
+            }
 
     def _is_valid_url(self, url: str) -> bool:
         """Basic URL validation"""
-        return url.startswith(('http://', 'https://'))
\ No newline at end of file
+        return url.startswith(('http://', 'https://'))
@@ -1,60 +1,206 @@
-from typing import List, Dict
-from urllib.parse import urlparse
-import re
+from typing import Dict, Iterable, List
+import logging
+import math
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier
 import joblib
 import redis
-from app.core.config import settings  # Changed from REDIS_URL
+from nova.app.core.config import settings
+from nova.app.search.cache import LRUCache
+
+PRIORITY_SECTIONS = {
+    'article': 0.8,
+    'blog': 0.7,
+    'news': 0.9,
+    'product': 0.6
+}
+
+TLD_SCORES = {'gov': 1.0, 'edu': 0.9, 'org': 0.7, 'com': 0.5, 'net': 0.5}
+
+# Feature matrix columns
+FEATURES = ['slashes', 'path_depth', 'query_length', 'url_length', 'tld_score', 'host_authority'] + \
+    [f'section_{name}' for name in PRIORITY_SECTIONS]
+SECTION_OFFSET = FEATURES.index('section_article')
+
+# HyperLogLog of the distinct hosts seen linking to a host
+REFERRERS_KEY = 'host_referrers:{}'
+# Hosts nobody is known to link to; also the value older models were trained on
+DEFAULT_AUTHORITY = 0.5
+
+# NumPy string arrays pad every URL to the longest one, as UTF-32: score in
+# chunks and look at no more than the first MAX_URL_LENGTH characters
+SCORE_CHUNK = 8192
+MAX_URL_LENGTH = 2048
+
 
 class URLPrioritizer:
     def __init__(self):
-        self.priority_patterns = [
-            (r'/article/', 0.8),
-            (r'/blog/', 0.7),
-            (r'/news/', 0.9),
-            (r'/product/', 0.6)
-        ]
+        self.section_scores = np.array(list(PRIORITY_SECTIONS.values()), dtype=np.float32)
         self.redis_client = redis.from_url(settings.REDIS_URL)  # Use settings.REDIS_URL
+        self.authority = LRUCache(settings.HOST_AUTHORITY_CACHE_SIZE, settings.HOST_AUTHORITY_CACHE_TTL)
         self.model = self._load_or_create_model()
-        
+
     def prioritize_urls(self, urls: List[str]) -> List[Dict]:
         cached_results = self._get_cached_priorities(urls)
         uncached_urls = [url for url in urls if url not in cached_results]
-        
+
         if uncached_urls:
             new_priorities = self._calculate_priorities(uncached_urls)
             self._cache_priorities(new_priorities)
             cached_results.update(new_priorities)
-            
+
         return [{'url': url, 'priority': cached_results[url]} for url in urls]
 
+    def _calculate_priorities(self, urls: List[str]) -> Dict[str, float]:
+        return dict(zip(urls, self.score_batch(urls).tolist()))
+
     def _get_cached_priorities(self, urls: List[str]) -> Dict:
-        return {url: float(score) for url, score in 
-                zip(urls, self.redis_client.mget(urls)) if score}
+        try:
+            return {url: float(score) for url, score in
+                    zip(urls, self.redis_client.mget(urls)) if score}
+        except Exception as e:
+            logging.warning(f"Priority cache get error: {str(e)}")
+            return {}
 
     def _cache_priorities(self, priorities: Dict):
-        pipeline = self.redis_client.pipeline()
-        for url, priority in priorities.items():
-            pipeline.setex(url, 3600, str(priority))  # Cache for 1 hour
-        pipeline.execute()
+        try:
+            pipeline = self.redis_client.pipeline()
+            for url, priority in priorities.items():
+                pipeline.setex(url, 3600, str(priority))  # Cache for 1 hour
+            pipeline.execute()
+        except Exception as e:
+            logging.warning(f"Priority cache set error: {str(e)}")
 
     def _load_or_create_model(self):
         try:
             return joblib.load('models/url_priority_model.joblib')
         except:
             return RandomForestClassifier(n_estimators=100)
-        
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        return url.split('/', 3)[2].rpartition('@')[2].partition(':')[0].lower() if '://' in url else ''
+
+    def record_links(self, source_url: str, urls: Iterable[str]):
+        """Count the source's host as a referrer of every other host it links to"""
+        source = self.host_of(source_url)
+        targets = {self.host_of(url) for url in urls} - {source, ''}
+        if not source or not targets:
+            return
+        try:
+            pipeline = self.redis_client.pipeline(transaction=False)
+            for host in targets:
+                pipeline.pfadd(REFERRERS_KEY.format(host), source)
+            pipeline.execute()
+        except Exception as e:
+            logging.warning(f"Host referrer update error: {str(e)}")
+
+    def host_authority(self, hosts: Iterable[str]) -> Dict[str, float]:
+        """Authority in [0.5, 1] from the number of distinct referring hosts.
+
+        Scores grow with the log of the referrer count and reach 1.0 at
+        HOST_AUTHORITY_SATURATION referrers; they are cached locally for
+        HOST_AUTHORITY_CACHE_TTL, so Redis sees one pipelined lookup for the
+        hosts a batch has not met recently.
+        """
+        scores, missing = {}, []
+        for host in hosts:
+            score = self.authority.get(host)
+            if score is None:
+                missing.append(host)
+            else:
+                scores[host] = score
+        if not missing:
+            return scores
+
+        try:
+            pipeline = self.redis_client.pipeline(transaction=False)
+            for host in missing:
+                pipeline.pfcount(REFERRERS_KEY.format(host))
+            counts = pipeline.execute()
+        except Exception as e:
+            logging.warning(f"Host authority lookup error: {str(e)}")
+            scores.update((host, DEFAULT_AUTHORITY) for host in missing)
+            return scores
+
+        saturation = math.log1p(settings.HOST_AUTHORITY_SATURATION)
+        for host, count in zip(missing, counts):
+            score = DEFAULT_AUTHORITY + (1 - DEFAULT_AUTHORITY) * min(1.0, math.log1p(count) / saturation)
+            self.authority.set(host, score)
+            scores[host] = score
+        return scores
+
+    @property
+    def model_ready(self) -> bool:
+        """True when the model has been trained on the current feature layout"""
+        return getattr(self.model, 'n_features_in_', None) == len(FEATURES)
+
+    def _url_array(self, urls: List[str]) -> np.ndarray:
+        return np.asarray([url[:MAX_URL_LENGTH] for url in urls], dtype=np.str_)
+
+    def _section_features(self, urls: np.ndarray) -> np.ndarray:
+        """One-hot columns for the priority sections present in each URL"""
+        sections = np.empty((len(urls), len(PRIORITY_SECTIONS)), dtype=np.float32)
+        for column, name in enumerate(PRIORITY_SECTIONS):
+            sections[:, column] = np.char.find(urls, f'/{name}/') >= 0
+        return sections
+
+    def extract_features(self, urls: List[str]) -> np.ndarray:
+        """Feature matrix with one row per URL and the columns in FEATURES"""
+        features = np.zeros((len(urls), len(FEATURES)), dtype=np.float32)
+        for start in range(0, len(urls), SCORE_CHUNK):
+            self._fill_features(urls[start:start + SCORE_CHUNK], features[start:start + SCORE_CHUNK])
+        return features
+
+    def _fill_features(self, urls: List[str], features: np.ndarray):
+        array = self._url_array(urls)
+        lengths = np.char.str_len(array)
+        query_start = np.char.find(array, '?')
+        path_end = np.where(query_start >= 0, query_start, lengths)
+        features[:, 0] = np.char.count(array, '/')
+        # Slashes before the query, less the two of "scheme://"
+        features[:, 1] = np.maximum(0, np.char.count(array, '/', 0, path_end) - 2)
+        full_lengths = np.fromiter(map(len, urls), dtype=np.int64, count=len(urls))
+        features[:, 2] = np.where(query_start >= 0, full_lengths - query_start - 1, 0)
+        features[:, 3] = full_lengths
+
+        # Host lookups are done once per distinct host
+        hosts = [self.host_of(url) for url in urls]
+        distinct = set(hosts)
+        tld_scores = {host: TLD_SCORES.get(host.rsplit('.', 1)[-1], 0.3) for host in distinct}
+        authority = self.host_authority(distinct)
+        features[:, 4] = np.fromiter((tld_scores[host] for host in hosts), dtype=np.float32, count=len(hosts))
+        features[:, 5] = np.fromiter((authority[host] for host in hosts), dtype=np.float32, count=len(hosts))
+
+        features[:, SECTION_OFFSET:] = self._section_features(array)
+
+    def heuristic_scores(self, slashes: np.ndarray, sections: np.ndarray) -> np.ndarray:
+        """Section and depth heuristic, the same rule calculate_priority always used"""
+        base = np.maximum(0.5, (sections * self.section_scores).max(axis=1))
+        depth_penalty = np.maximum(0.0, (slashes - 3) * 0.1)
+        return np.maximum(0.1, base - depth_penalty).astype(np.float32)
+
+    def score_batch(self, urls: List[str]) -> np.ndarray:
+        """Priorities for many URLs at once: vectorized features and one model call"""
+        if not urls:
+            return np.zeros(0, dtype=np.float32)
+
+        if self.model_ready:
+            try:
+                features = self.extract_features(urls)
+                # Probability of the "high priority" (last) class
+                return self.model.predict_proba(features)[:, -1].astype(np.float32)
+            except Exception as e:
+                logging.warning(f"URL model scoring failed, using heuristic: {str(e)}")
+
+        # The heuristic only needs slash counts and sections
+        scores = np.empty(len(urls), dtype=np.float32)
+        for start in range(0, len(urls), SCORE_CHUNK):
+            array = self._url_array(urls[start:start + SCORE_CHUNK])
+            scores[start:start + SCORE_CHUNK] = self.heuristic_scores(
+                np.char.count(array, '/'), self._section_features(array)
+            )
+        return scores
+
     def calculate_priority(self, url: str) -> float:
-        base_priority = 0.5
-        
-        # Check against priority patterns
-        for pattern, score in self.priority_patterns:
-            if re.search(pattern, url):
-                base_priority = max(base_priority, score)
-                
-        # Adjust priority based on URL depth
-        depth = url.count('/')
-        depth_penalty = max(0, (depth - 3) * 0.1)
-        
-        return max(0.1, base_priority - depth_penalty)
\ No newline at end of file
+        return float(self.score_batch([url])[0])
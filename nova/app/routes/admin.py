@@ -3,11 +3,11 @@ from fastapi import APIRouter, Depends, HTTPException
 from typing import List
 from pydantic import BaseModel
 from nova.app.core.auth import verify_admin_token
-from nova.app.search.engine import SearchEngine
+from nova.app.search.engine import SearchEngine, get_search_engine
 from nova.app.crawler.manager import CrawlerManager
 
 router = APIRouter(prefix="/api/admin", dependencies=[Depends(verify_admin_token)])
-search_engine = SearchEngine()
+search_engine = get_search_engine()
 
 
 class IndexStats(BaseModel):
@@ -25,7 +25,7 @@ async def get_stats():
 
 @router.post("/reindex")
 async def reindex(
-    search_engine: SearchEngine = Depends(lambda: SearchEngine())
+    search_engine: SearchEngine = Depends(get_search_engine)
 ):
     try:
         task_id = await search_engine.start_reindex()
@@ -35,7 +35,7 @@ async def reindex(
 
 @router.delete("/clear-cache")
 async def clear_cache(
-    search_engine: SearchEngine = Depends(lambda: SearchEngine())
+    search_engine: SearchEngine = Depends(get_search_engine)
 ):
     try:
         await search_engine.clear_cache()
@@ -1,15 +1,12 @@
 from fastapi import APIRouter, HTTPException, Query, Depends
-from typing import List, Dict, Optional
-from nova.app.search.engine import SearchEngine
+from typing import List, Dict, Literal, Optional
+from nova.app.search.engine import get_search_engine
 from nova.app.core.config import settings
-from nova.app.crawler.manager import CrawlerManager
+from nova.app.crawler.manager import CrawlerManager, get_crawler_manager
 from pydantic import BaseModel, HttpUrl
-from nova.app.crawler.crawler import WebCrawler
-from nova.app.search.engine import SearchEngine
 
 router = APIRouter(prefix="/api/v1")
-search_engine = SearchEngine()
-crawler = WebCrawler()
+search_engine = get_search_engine()
 
 
 class SearchFilters(BaseModel):
@@ -32,23 +29,34 @@ class CrawlRequest(BaseModel):
 async def search(
     q: str = Query(..., min_length=1),
     page: int = Query(1, ge=1),
-    per_page: int = Query(10, ge=1, le=100)
+    per_page: int = Query(10, ge=1, le=100),
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    categories: Optional[List[str]] = Query(None),
+    mode: Optional[Literal['lexical', 'semantic', 'hybrid']] = None,
+    lexical_weight: float = Query(1.0, ge=0),
+    vector_weight: float = Query(1.0, ge=0),
+    rerank: Optional[bool] = None
 ) -> Dict:
-    """Search endpoint"""
+    """Search endpoint; hybrid mode fuses BM25 and vector results with weighted RRF"""
     try:
-        results = await search_engine.search(q, page=page, per_page=per_page)
+        filters = SearchFilters(date_from=date_from, date_to=date_to, categories=categories)
+        results = await search_engine.search(
+            q, page=page, per_page=per_page, filters=filters.model_dump(),
+            mode=mode, lexical_weight=lexical_weight, vector_weight=vector_weight, rerank=rerank
+        )
         return results
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
-async def get_crawler_manager():
-    from nova.app.crawler.manager import CrawlerManager
-    return CrawlerManager()
+async def crawler_manager() -> CrawlerManager:
+    # Resolved on the event loop: the manager creates asyncio primitives
+    return get_crawler_manager()
 
 @router.post("/crawl")
 async def start_crawl(
     urls: List[str],
-    crawler: CrawlerManager = Depends(get_crawler_manager)
+    crawler: CrawlerManager = Depends(crawler_manager)
 ) -> Dict:
     try:
         await crawler.start_crawling(urls)
@@ -61,7 +69,7 @@ async def start_crawl(
 @router.get("/crawl/{task_id}")
 async def get_crawl_status(
     task_id: str,
-    crawler: CrawlerManager = Depends(lambda: CrawlerManager())
+    crawler: CrawlerManager = Depends(crawler_manager)
 ):
     status = await crawler.get_crawl_status(task_id)
     if not status:
@@ -0,0 +1,229 @@
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+import numpy as np
+from nova.app.core.config import settings
+from nova.app.core.monitoring import CACHE_HITS, EMBEDDING_CACHE_HITS, EMBEDDING_CACHE_MISSES
+
+
+class LRUCache:
+    """Thread-safe in-process LRU cache with a per-entry TTL"""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries: OrderedDict = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class EmbeddingCache:
+    """Two-tier cache of query embeddings.
+
+    An in-process LRU keyed by normalized query text sits in front of
+    Redis, which holds the vectors as compact float16 bytes so every worker
+    process shares them.
+    """
+
+    def __init__(self, redis_client=None, max_size: Optional[int] = None, ttl: Optional[int] = None):
+        self.redis = redis_client
+        self.ttl = ttl or settings.EMBEDDING_CACHE_TTL
+        self.local = LRUCache(max_size or settings.EMBEDDING_CACHE_SIZE, self.ttl)
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return ' '.join(text.lower().split())
+
+    @staticmethod
+    def redis_key(normalized: str) -> str:
+        return f"embedding:{hashlib.sha1(normalized.encode('utf-8')).hexdigest()}"
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        normalized = self.normalize(text)
+        vector = self.local.get(normalized)
+        if vector is not None:
+            EMBEDDING_CACHE_HITS.labels(tier='local').inc()
+            return vector
+
+        if self.redis is not None:
+            try:
+                data = self.redis.get(self.redis_key(normalized))
+            except Exception as e:
+                logging.warning(f"Embedding cache get error: {str(e)}")
+                data = None
+            if data:
+                vector = np.frombuffer(data, dtype=np.float16).astype(np.float32)
+                self.local.set(normalized, vector)
+                EMBEDDING_CACHE_HITS.labels(tier='redis').inc()
+                return vector
+
+        EMBEDDING_CACHE_MISSES.inc()
+        return None
+
+    def set(self, text: str, vector: np.ndarray):
+        normalized = self.normalize(text)
+        vector = np.asarray(vector, dtype=np.float32)
+        self.local.set(normalized, vector)
+
+        if self.redis is not None:
+            try:
+                self.redis.setex(self.redis_key(normalized), self.ttl, vector.astype(np.float16).tobytes())
+            except Exception as e:
+                logging.warning(f"Embedding cache set error: {str(e)}")
+
+    def get_or_compute(self, text: str, compute: Callable[[str], np.ndarray]) -> np.ndarray:
+        vector = self.get(text)
+        if vector is None:
+            vector = compute(self.normalize(text))
+            self.set(text, vector)
+        return vector
+
+
+GENERATION_KEY = 'search:generation'
+
+
+def bump_index_generation(redis_client) -> Optional[int]:
+    """Invalidate every cached search result; called by the indexing path"""
+    try:
+        return redis_client.incr(GENERATION_KEY)
+    except Exception as e:
+        logging.warning(f"Index generation bump error: {str(e)}")
+        return None
+
+
+class SearchResultCache:
+    """Two-tier cache of search responses with generation-based invalidation.
+
+    Keys combine the normalized (query, page, per_page, filters) with the
+    current index generation, a Redis counter the indexing path bumps, so a
+    recrawl makes every older entry unreachable at once.  Concurrent
+    misses on the same key share a single backend call.  Partial results
+    (a retrieval stage missed its budget) are returned but not cached.
+    """
+
+    def __init__(self, redis_client=None, max_size: Optional[int] = None, ttl: Optional[int] = None):
+        self.redis = redis_client
+        self.ttl = ttl or settings.CACHE_EXPIRY
+        self.local = LRUCache(max_size or settings.SEARCH_CACHE_SIZE, self.ttl)
+        self.in_flight: Dict[str, asyncio.Future] = {}
+        self.generation = 0
+        self.generation_checked = 0.0
+
+    @staticmethod
+    def make_key(query: str, page: int, per_page: int, filters: Optional[Dict] = None) -> str:
+        payload = json.dumps(
+            [EmbeddingCache.normalize(query), page, per_page, filters or {}],
+            sort_keys=True, default=str
+        )
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    async def _redis_call(method, *args):
+        # The Redis client is synchronous; keep its round trips off the event loop
+        return await asyncio.get_event_loop().run_in_executor(None, method, *args)
+
+    async def current_generation(self) -> int:
+        # Re-read the counter at most every SEARCH_CACHE_GENERATION_TTL seconds
+        now = time.monotonic()
+        if self.redis is not None and now - self.generation_checked >= settings.SEARCH_CACHE_GENERATION_TTL:
+            self.generation_checked = now
+            try:
+                self.generation = int(await self._redis_call(self.redis.get, GENERATION_KEY) or 0)
+            except Exception as e:
+                logging.warning(f"Index generation read error: {str(e)}")
+        return self.generation
+
+    async def _get(self, key: str) -> Optional[Dict]:
+        result = self.local.get(key)
+        if result is not None:
+            return result
+
+        if self.redis is not None:
+            try:
+                data = await self._redis_call(self.redis.get, key)
+            except Exception as e:
+                logging.warning(f"Search cache get error: {str(e)}")
+                data = None
+            if data:
+                result = json.loads(data)
+                self.local.set(key, result)
+                return result
+        return None
+
+    async def _set(self, key: str, result: Dict):
+        self.local.set(key, result)
+        if self.redis is not None:
+            try:
+                await self._redis_call(self.redis.setex, key, self.ttl, json.dumps(result, default=str))
+            except Exception as e:
+                logging.warning(f"Search cache set error: {str(e)}")
+
+    async def get_or_fetch(self, query: str, page: int, per_page: int, filters: Optional[Dict],
+                           fetch: Callable[[], Awaitable[Dict]]) -> Dict:
+        key = f"search:{await self.current_generation()}:{self.make_key(query, page, per_page, filters)}"
+
+        result = await self._get(key)
+        if result is not None:
+            CACHE_HITS.inc()
+            return result
+
+        # Single-flight: identical concurrent misses wait on the first caller
+        pending = self.in_flight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_event_loop().create_future()
+        self.in_flight[key] = future
+        try:
+            result = await fetch()
+            future.set_result(result)
+            if not result.get('partial'):
+                await self._set(key, result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Waiters re-raise it; don't warn when there are none
+            raise
+        finally:
+            del self.in_flight[key]
+
+    async def clear(self):
+        """Drop the local tier and invalidate shared entries by bumping the generation"""
+        self.local.clear()
+        if self.redis is not None and await self._redis_call(bump_index_generation, self.redis) is not None:
+            self.generation_checked = 0.0
+        else:
+            self.generation += 1
@@ -0,0 +1,83 @@
+import asyncio
+import logging
+import random
+import time
+from functools import lru_cache
+from typing import Optional
+from elasticsearch import AsyncElasticsearch
+from nova.app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ElasticsearchUnavailable(Exception):
+    """Raised while Elasticsearch can't be reached and the client is backing off"""
+
+
+class ElasticsearchClient:
+    """Process-wide AsyncElasticsearch client with reconnect backoff.
+
+    The underlying client keeps a pooled set of keep-alive connections
+    per node (ES_POOL_MAXSIZE) and is shared by every router and the
+    indexer.  When Elasticsearch is unreachable, connection attempts are
+    spaced out with jittered exponential backoff instead of being retried
+    on every request.
+    """
+
+    def __init__(self):
+        self.client: Optional[AsyncElasticsearch] = None
+        self.failures = 0
+        self.retry_at = 0.0
+        self.lock: Optional[asyncio.Lock] = None
+
+    async def get(self) -> AsyncElasticsearch:
+        if self.client is not None:
+            return self.client
+
+        if self.lock is None:
+            self.lock = asyncio.Lock()
+        async with self.lock:
+            if self.client is not None:
+                return self.client
+
+            wait = self.retry_at - time.monotonic()
+            if wait > 0:
+                raise ElasticsearchUnavailable(f"Elasticsearch unavailable, next attempt in {wait:.1f}s")
+
+            client = AsyncElasticsearch(
+                settings.ELASTICSEARCH_HOSTS,
+                verify_certs=False,
+                timeout=settings.ES_REQUEST_TIMEOUT,
+                retry_on_timeout=True,
+                max_retries=3,
+                maxsize=settings.ES_POOL_MAXSIZE
+            )
+            try:
+                if not await client.ping():
+                    raise ElasticsearchUnavailable("Failed to ping Elasticsearch")
+            except Exception as e:
+                await client.close()
+                self._schedule_retry()
+                logger.error(f"Failed to connect to Elasticsearch: {str(e)}")
+                raise ElasticsearchUnavailable(str(e)) from e
+
+            logger.info("Successfully connected to Elasticsearch")
+            self.failures = 0
+            self.client = client
+            return client
+
+    def _schedule_retry(self):
+        self.failures += 1
+        backoff = min(settings.ES_RECONNECT_MAX_BACKOFF, 2 ** (self.failures - 1))
+        self.retry_at = time.monotonic() + backoff * random.uniform(0.5, 1.0)
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.close()
+            self.client = None
+
+
+@lru_cache()
+def get_es_client() -> ElasticsearchClient:
+    """Shared Elasticsearch client for the whole process"""
+    return ElasticsearchClient()
@@ -1,93 +1,290 @@
-from elasticsearch import Elasticsearch, ConnectionError
+from elasticsearch import AsyncElasticsearch, ConnectionError
+import asyncio
 from datetime import datetime
+from functools import lru_cache
 import logging
-from transformers import AutoTokenizer, AutoModel
-import torch
-from typing import List, Dict, Optional
+from typing import Any, Awaitable, List, Dict, Optional, Tuple
 import numpy as np
 from nova.app.core.config import settings
+from nova.app.core.embeddings import QUERY, get_embedding_service
+from nova.app.core.models import registry
+from nova.app.core.monitoring import SEARCH_STAGE_LATENCY, SEARCH_STAGE_SKIPPED
+from nova.app.core.utils import document_id, parse_lastmod
+from nova.app.search.cache import EmbeddingCache, SearchResultCache
+from nova.app.search.client import ElasticsearchUnavailable, get_es_client
+from nova.app.search.vector_index import get_vector_index, normalize
+import redis
 import time
-import pymongo
 
 logger = logging.getLogger(__name__)
 
+SEARCH_MODES = ('lexical', 'semantic', 'hybrid')
+
+
+def reciprocal_rank_fusion(ranked_lists: List[Tuple[float, List[Dict]]], k: int = 60) -> List[Dict]:
+    """Merge ranked result lists by weighted RRF: score = sum of weight / (k + rank)"""
+    scores: Dict[str, float] = {}
+    results: Dict[str, Dict] = {}
+    for weight, ranked in ranked_lists:
+        for rank, result in enumerate(ranked, start=1):
+            url = result['url']
+            scores[url] = scores.get(url, 0.0) + weight / (k + rank)
+            # The first list's copy wins, so lexical highlights are kept
+            results.setdefault(url, result)
+    order = sorted(scores, key=scores.get, reverse=True)
+    return [{**results[url], 'score': scores[url]} for url in order]
+
 class SearchEngine:
     def __init__(self):
-        self.es = None
-        self.ml_enabled = False
-        self.connect()
-        self._init_ml()
+        self.es_client = get_es_client()
+        self.embedder = registry.handle('distilbert')
+        self.redis = redis.from_url(settings.REDIS_URL)
+        self.embedding_cache = EmbeddingCache(self.redis)
+        self.embeddings = get_embedding_service()
+        self.result_cache = SearchResultCache(self.redis)
+        self.vector_index = get_vector_index() if settings.VECTOR_INDEX_ENABLED else None
+        self.embedder_loading = False
+        self.prioritizer = None
 
-    def connect(self):
-        try:
-            self.es = Elasticsearch(
-                settings.ELASTICSEARCH_HOSTS,
-                verify_certs=False,
-                timeout=30,
-                retry_on_timeout=True,
-                max_retries=3
-            )
-            if not self.es.ping():
-                raise ConnectionError("Failed to ping Elasticsearch")
-            logger.info("Successfully connected to Elasticsearch")
-        except Exception as e:
-            logger.error(f"Failed to connect to Elasticsearch: {str(e)}")
-            self.es = None
+    async def connect(self) -> AsyncElasticsearch:
+        """Shared async client; connects on first use and backs off while ES is down"""
+        return await self.es_client.get()
 
-    def _init_ml(self):
-        """Initialize ML models if available"""
-        try:
-            from transformers import AutoTokenizer, AutoModel
-            import torch
-            
-            self.tokenizer = AutoTokenizer.from_pretrained('distilbert-base-uncased')
-            self.model = AutoModel.from_pretrained('distilbert-base-uncased')
-            self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-            self.model.to(self.device)
-            self.ml_enabled = True
-            logger.info("ML features enabled")
-        except Exception as e:
-            logger.warning(f"ML features disabled: {str(e)}")
-            self.ml_enabled = False
-
-    async def search(self, query: str, page: int = 1, per_page: int = 10) -> Dict:
-        if not self.es:
-            try:
-                self.connect()
-            except Exception as e:
-                logger.error(f"Failed to reconnect to Elasticsearch: {str(e)}")
-                return {"results": [], "total": 0, "time_taken": 0}
+    @property
+    def ml_enabled(self) -> bool:
+        """True once the embedding model has been loaded (on first use or by preloading)"""
+        return self.embedder.loaded
+
+    async def search(self, query: str, page: int = 1, per_page: int = 10,
+                     filters: Optional[Dict] = None, mode: Optional[str] = None,
+                     lexical_weight: float = 1.0, vector_weight: float = 1.0,
+                     rerank: Optional[bool] = None) -> Dict:
+        filters = {k: v for k, v in (filters or {}).items() if v}
+        mode = mode or settings.SEARCH_DEFAULT_MODE
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {mode}")
+        if self.vector_index is None:
+            mode = 'lexical'
+        weights = (lexical_weight, vector_weight)
+        rerank = settings.SEARCH_RERANK if rerank is None else rerank
 
+        # The mode and weights are part of the cache key
+        cache_filters = dict(filters, mode=mode)
+        if mode == 'hybrid':
+            cache_filters['weights'] = list(weights)
         try:
             start_time = time.time()
-            body = self._build_query(query)
-            body.update({
-                "from": (page - 1) * per_page,
-                "size": per_page
-            })
-
-            response = await self.es.search(index="web_pages", body=body)
-            results = self._process_results(response)
+            if rerank and page * per_page <= settings.RERANK_TOP_K:
+                # Every page within the top K is sliced from one cached, re-ranked list
+                deadline = asyncio.get_event_loop().time() + settings.SEARCH_DEADLINE
+                ranked = await self.result_cache.get_or_fetch(
+                    query, 1, settings.RERANK_TOP_K, dict(cache_filters, rerank=True),
+                    lambda: self._reranked(query, filters, mode, weights, deadline)
+                )
+                start = (page - 1) * per_page
+                results = dict(ranked, results=ranked["results"][start:start + per_page])
+            else:
+                results = dict(await self.result_cache.get_or_fetch(
+                    query, page, per_page, cache_filters,
+                    lambda: self._search_backend(query, page, per_page, filters, mode, weights)
+                ))
             results["time_taken"] = time.time() - start_time
             
             return results
 
-        except ConnectionError as e:
+        except (ConnectionError, ElasticsearchUnavailable) as e:
             logger.error(f"Elasticsearch connection error: {str(e)}")
             return {"results": [], "total": 0, "time_taken": 0}
         except Exception as e:
             logger.error(f"Search error: {str(e)}")
             raise
 
-    def _build_query(self, query: str) -> Dict:
-        """Build search query with or without ML features"""
+    async def _search_backend(self, query: str, page: int, per_page: int, filters: Dict,
+                              mode: str = 'lexical', weights: Tuple[float, float] = (1.0, 1.0)) -> Dict:
+        """Retrieve one page of results for the mode; results are cached by search()"""
+        start = (page - 1) * per_page
+        if mode == 'lexical':
+            results, total = await self._lexical_search(query, start, per_page, filters)
+            return {"results": results, "total": total}
+
+        # Ranked modes page through the top candidates of each stage
+        depth = min(max(page * per_page, settings.HYBRID_CANDIDATES), settings.MAX_SEARCH_RESULTS)
+        if mode == 'semantic':
+            results = await self._within_budget('vector', self._vector_search(query, depth, filters),
+                                                settings.SEARCH_VECTOR_BUDGET)
+            if results is None:
+                # Model still loading, or the stage failed or ran out of time: lexical results, not cached
+                results, total = await self._lexical_search(query, start, per_page, filters)
+                return {"results": results, "total": total, "partial": True}
+            return {"results": results[start:start + per_page], "total": len(results)}
+
+        lexical, vector = await asyncio.gather(
+            self._within_budget('lexical', self._lexical_search(query, 0, depth, filters),
+                                settings.SEARCH_LEXICAL_BUDGET),
+            self._within_budget('vector', self._vector_search(query, depth, filters),
+                                settings.SEARCH_VECTOR_BUDGET)
+        )
+        ranked, total = [], 0
+        if lexical is not None:
+            ranked.append((weights[0], lexical[0]))
+            total = lexical[1]
+        if vector is not None:
+            ranked.append((weights[1], vector))
+        fused = reciprocal_rank_fusion(ranked, settings.SEARCH_RRF_K)
+        return {
+            "results": fused[start:start + per_page],
+            "total": max(total, len(fused)),
+            # A stage that missed its budget: served, but not cached
+            "partial": lexical is None or vector is None
+        }
+
+    async def _reranked(self, query: str, filters: Dict, mode: str, weights: Tuple[float, float],
+                        deadline: float) -> Dict:
+        """The top RERANK_TOP_K results, re-ranked unless the request deadline has passed"""
+        candidates = await self._search_backend(query, 1, settings.RERANK_TOP_K, filters, mode, weights)
+        results = candidates["results"]
+        if len(results) < 2 or self.vector_index is None:
+            return candidates
+
+        loop = asyncio.get_event_loop()
+        start_time = time.time()
+        try:
+            if loop.time() >= deadline:
+                raise asyncio.TimeoutError()
+            if not self.ml_enabled:
+                self._load_embedder()
+                raise RuntimeError("Embedding model is still loading")
+            vector = await asyncio.wait_for(self._get_embedding(query), deadline - loop.time())
+            scores = await asyncio.wait_for(
+                loop.run_in_executor(None, self._rerank_scores, vector, results), deadline - loop.time()
+            )
+        except asyncio.TimeoutError:
+            SEARCH_STAGE_SKIPPED.labels(stage='rerank', reason='deadline').inc()
+            # Retrieval order this time; not cached, so the next request tries again
+            return dict(candidates, partial=True)
+        except Exception as e:
+            SEARCH_STAGE_SKIPPED.labels(stage='rerank', reason='error').inc()
+            logger.warning(f"Re-ranking failed: {str(e)}")
+            return dict(candidates, partial=True)
+        finally:
+            SEARCH_STAGE_LATENCY.labels(stage='rerank').observe(time.time() - start_time)
+
+        order = np.argsort(-scores, kind='stable')
+        return dict(candidates, results=[dict(results[i], score=float(scores[i])) for i in order])
+
+    def _rerank_scores(self, vector: np.ndarray, results: List[Dict]) -> np.ndarray:
+        """Blend of retrieval score, query-document cosine, freshness and URL priority"""
+        urls = [result['url'] for result in results]
+        embeddings, found = self.vector_index.get_vectors(urls)
+        # Stored embeddings are unit length, so one matmul gives every cosine
+        semantic = embeddings @ normalize(vector)[0]
+        # Pages not embedded yet get the average, neither promoted nor buried
+        semantic[~found] = semantic[found].mean() if found.any() else 0.0
+
+        retrieval = np.array([result.get('score') or 0.0 for result in results], dtype=np.float32)
+        retrieval /= max(float(np.abs(retrieval).max()), 1e-12)
+
+        now = time.time()
+        indexed = [parse_lastmod(result.get('indexed_at')) for result in results]
+        age = np.array([now - ts if ts is not None else np.inf for ts in indexed], dtype=np.float64)
+        freshness = np.power(0.5, np.maximum(age, 0.0) / settings.RERANK_FRESHNESS_HALF_LIFE)
+
+        priority = self._get_prioritizer().score_batch(urls)
+        return (settings.RERANK_RETRIEVAL_WEIGHT * retrieval
+                + settings.RERANK_SEMANTIC_WEIGHT * semantic
+                + settings.RERANK_FRESHNESS_WEIGHT * freshness
+                + settings.RERANK_PRIORITY_WEIGHT * priority).astype(np.float32)
+
+    def _get_prioritizer(self):
+        if self.prioritizer is None:
+            from nova.app.crawler.url_prioritizer import URLPrioritizer
+            self.prioritizer = URLPrioritizer()
+        return self.prioritizer
+
+    async def _within_budget(self, stage: str, coro: Awaitable, budget: float) -> Optional[Any]:
+        """Result of a retrieval stage, or None if it failed or ran past its time budget"""
+        start_time = time.time()
+        try:
+            return await asyncio.wait_for(coro, budget)
+        except asyncio.TimeoutError:
+            SEARCH_STAGE_SKIPPED.labels(stage=stage, reason='timeout').inc()
+            logger.warning(f"{stage} retrieval exceeded its {budget}s budget")
+        except Exception as e:
+            SEARCH_STAGE_SKIPPED.labels(stage=stage, reason='error').inc()
+            logger.warning(f"{stage} retrieval failed: {str(e)}")
+        finally:
+            SEARCH_STAGE_LATENCY.labels(stage=stage).observe(time.time() - start_time)
+        return None
+
+    async def _lexical_search(self, query: str, offset: int, size: int,
+                              filters: Dict) -> Tuple[List[Dict], int]:
+        """BM25 results from Elasticsearch and the total number of matches"""
+        es = await self.connect()
+        body = self._build_query(query, filters)
+        body.update({
+            "from": offset,
+            "size": size
+        })
+
+        response = await es.search(index="web_pages", body=body)
+        processed = self._process_results(response)
+        return processed["results"], processed["total"]
+
+    async def _vector_search(self, query: str, limit: int, filters: Dict) -> List[Dict]:
+        """Pages nearest to the query embedding, best first, restricted to the filters"""
+        if not self.ml_enabled:
+            # Don't make the request wait for the model to load
+            self._load_embedder()
+            raise RuntimeError("Embedding model is still loading")
+
+        loop = asyncio.get_event_loop()
+        vector = await self._get_embedding(query)
+        hits = await loop.run_in_executor(None, self.vector_index.search, vector, limit)
+        if not hits:
+            return []
+
+        # One ES request applies the filters and fetches titles and snippets
+        es = await self.connect()
+        response = await es.search(index="web_pages", body={
+            "size": len(hits),
+            "_source": ["url", "title", "meta_description", "content", "indexed_at"],
+            "query": {"bool": {"filter": [
+                {"ids": {"values": [document_id(url) for url, _ in hits]}}
+            ] + self._build_filters(filters)}}
+        })
+        sources = {hit["_source"]["url"]: hit["_source"] for hit in response["hits"]["hits"]}
+        return [
+            {
+                "url": url,
+                "title": sources[url].get("title", ""),
+                "content": sources[url].get("meta_description") or sources[url].get("content", "")[:200],
+                "score": score,
+                "indexed_at": sources[url].get("indexed_at")
+            }
+            for url, score in hits if url in sources
+        ]
+
+    def _load_embedder(self):
+        if not self.embedder_loading:
+            self.embedder_loading = True
+            registry.preload([self.embedder.name])
+
+    async def clear_cache(self):
+        """Drop cached search results and query embeddings"""
+        await self.result_cache.clear()
+        self.embedding_cache.local.clear()
+
+    def _build_query(self, query: str, filters: Optional[Dict] = None) -> Dict:
+        """Build the lexical (BM25) query"""
         base_query = {
             "query": {
                 "bool": {
                     "should": [
                         {"match": {"title": {"query": query, "boost": 3}}},
                         {"match": {"content": {"query": query, "boost": 1}}}
-                    ]
+                    ],
+                    "minimum_should_match": 1,
+                    "filter": self._build_filters(filters or {})
                 }
             },
             "highlight": {
@@ -98,12 +295,21 @@ class SearchEngine:
             }
         }
 
-        if self.ml_enabled:
-            # Add ML-enhanced query components
-            base_query = self._enhance_query_with_ml(base_query, query)
-
         return base_query
 
+    def _build_filters(self, filters: Dict) -> List[Dict]:
+        clauses = []
+        date_range = {}
+        if filters.get("date_from"):
+            date_range["gte"] = filters["date_from"]
+        if filters.get("date_to"):
+            date_range["lte"] = filters["date_to"]
+        if date_range:
+            clauses.append({"range": {"indexed_at": date_range}})
+        if filters.get("categories"):
+            clauses.append({"terms": {"categories": filters["categories"]}})
+        return clauses
+
     async def _mongodb_fallback_search(self, query: str, page: int, per_page: int) -> Dict:
         """Fallback search using MongoDB text search"""
         try:
@@ -142,25 +348,28 @@ class SearchEngine:
             logger.error(f"MongoDB fallback search error: {str(e)}")
             return {"results": [], "total": 0, "time_taken": 0}
 
-    def _get_embedding(self, text: str) -> np.ndarray:
-        """Generate BERT embedding for text"""
-        with torch.no_grad():
-            inputs = self.tokenizer(text, return_tensors="pt", 
-                                  truncation=True, max_length=512)
-            inputs = {k: v.to(self.device) for k, v in inputs.items()}
-            outputs = self.model(**inputs)
-            return outputs.last_hidden_state.mean(dim=1).cpu().numpy()[0]
+    async def _get_embedding(self, text: str) -> np.ndarray:
+        """BERT embedding for a query, served from the embedding cache when possible"""
+        loop = asyncio.get_event_loop()
+        vector = await loop.run_in_executor(None, self.embedding_cache.get, text)
+        if vector is None:
+            # Batched with other concurrent queries by the embedding service
+            vector = await self.embeddings.embed_one(EmbeddingCache.normalize(text), QUERY)
+            await loop.run_in_executor(None, self.embedding_cache.set, text, vector)
+        return vector
 
     def _process_results(self, response: Dict) -> Dict:
         """Process Elasticsearch response into searchable results"""
         results = []
         for hit in response['hits']['hits']:
+            highlight = hit.get('highlight', {})
             result = {
                 'url': hit['_source']['url'],
-                'title': hit['highlight'].get('title', [hit['_source']['title']])[0],
-                'content': '...'.join(hit['highlight'].get('content', 
+                'title': highlight.get('title', [hit['_source']['title']])[0],
+                'content': '...'.join(highlight.get('content', 
                     [hit['_source'].get('meta_description', hit['_source']['content'][:200])])),
-                'score': hit['_score']
+                'score': hit['_score'],
+                'indexed_at': hit['_source'].get('indexed_at')
             }
             results.append(result)
 
@@ -185,7 +394,8 @@ class SearchEngine:
                     }
                 }
             }
-            response = await self.es.search(index="web_pages", body=body)
+            es = await self.connect()
+            response = await es.search(index="web_pages", body=body)
             return [
                 suggestion['text'] 
                 for suggestion in response['suggest']['completion'][0]['options']
@@ -197,7 +407,8 @@ class SearchEngine:
     async def get_total_pages(self) -> int:
         """Get total number of indexed pages"""
         try:
-            stats = await self.es.count(index="web_pages")
+            es = await self.connect()
+            stats = await es.count(index="web_pages")
             return stats['count']
         except Exception as e:
             logger.error(f"Stats error: {str(e)}")
@@ -211,10 +422,17 @@ class SearchEngine:
                 "sort": [{"indexed_at": "desc"}],
                 "_source": ["indexed_at"]
             }
-            response = await self.es.search(index="web_pages", body=body)
+            es = await self.connect()
+            response = await es.search(index="web_pages", body=body)
             if response['hits']['hits']:
                 return response['hits']['hits'][0]['_source']['indexed_at']
             return None
         except Exception as e:
             logger.error(f"Last crawl time error: {str(e)}")
-            return None
\ No newline at end of file
+            return None
+
+
+@lru_cache()
+def get_search_engine() -> SearchEngine:
+    """Shared SearchEngine for the whole process"""
+    return SearchEngine()
@@ -0,0 +1,348 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+from prometheus_client import Gauge, Histogram
+from nova.app.core.config import settings
+
+VECTOR_INDEX_SIZE = Gauge('vector_index_size', 'Live vectors in the semantic index')
+VECTOR_QUERY_LATENCY = Histogram('vector_query_seconds', 'Semantic index query time')
+VECTOR_CANDIDATES = Histogram(
+    'vector_query_candidates', 'Vectors scored per semantic query',
+    buckets=(100, 1000, 5000, 10000, 50000, 100000, 500000)
+)
+
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE = 50000
+SCORE_CHUNK = 65536  # rows scored per matmul, bounds the memory of brute-force scans
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """Unit-length float32 rows, so a dot product is the cosine similarity"""
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def spherical_kmeans(vectors: np.ndarray, num_clusters: int, iterations: int = KMEANS_ITERATIONS,
+                     seed: int = 0) -> np.ndarray:
+    """Unit-length centroids of normalized vectors, clustered by cosine similarity"""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), num_clusters, replace=False)].copy()
+
+    for _ in range(iterations):
+        assignments = assign(vectors, centroids)
+        order = np.argsort(assignments, kind='stable')
+        counts = np.bincount(assignments, minlength=num_clusters)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        filled = counts > 0
+        # reduceat sums each cluster's contiguous run of sorted rows
+        sums = np.add.reduceat(vectors[order], starts[filled], axis=0)
+        centroids[filled] = normalize(sums)
+        # Re-seed empty clusters from random points
+        empty = np.flatnonzero(~filled)
+        if len(empty):
+            centroids[empty] = vectors[rng.choice(len(vectors), len(empty), replace=False)]
+    return centroids
+
+
+def assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the nearest centroid for each row"""
+    result = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), SCORE_CHUNK):
+        chunk = np.asarray(vectors[start:start + SCORE_CHUNK], dtype=np.float32)
+        result[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+    return result
+
+
+class VectorIndex:
+    """Approximate nearest-neighbour index over page embeddings (IVF-Flat).
+
+    Vectors are normalized and appended to a float32 file that is read
+    through a memory map, with the owning URL appended to a text file and
+    the inverted-list assignment to an int32 file; nothing but the list
+    layout is held in memory.  Once TRAIN_SIZE vectors exist, spherical
+    k-means splits them into ~4*sqrt(n) lists, and a query scores only
+    the rows of the ``probes`` lists whose centroids are closest.  Until
+    then, and for rows added since the last merge, the scan is exact.
+    The lists are retrained whenever the index has grown fourfold.
+
+    A URL indexed again gets a new row and its old one is skipped; once
+    dead rows make up more than ``compact_ratio`` of the files (and at
+    least ``merge_size`` rows), ``add()`` rewrites them without.  One
+    process writes the files; queries may run on any thread.
+    """
+
+    def __init__(self, path: Optional[str] = None, dim: Optional[int] = None,
+                 probes: Optional[int] = None, train_size: Optional[int] = None,
+                 merge_size: Optional[int] = None, compact_ratio: Optional[float] = None):
+        self.path = path or settings.VECTOR_INDEX_PATH
+        os.makedirs(self.path, exist_ok=True)
+        self.probes = probes or settings.VECTOR_INDEX_PROBES
+        self.train_size = train_size or settings.VECTOR_INDEX_TRAIN_SIZE
+        self.merge_size = merge_size or settings.VECTOR_INDEX_MERGE_SIZE
+        self.compact_ratio = settings.VECTOR_INDEX_COMPACT_RATIO if compact_ratio is None else compact_ratio
+        self.lock = threading.Lock()  # guards the state swapped by writers
+        self.write_lock = threading.Lock()  # serializes writers
+
+        meta = self._read_meta()
+        self.dim = meta.get('dim') or dim or settings.EMBEDDING_DIM
+        self.trained_count = meta.get('trained_count', 0)
+        self.centroids: Optional[np.ndarray] = None
+        if self.trained_count and os.path.exists(self._file('centroids.npy')):
+            self.centroids = np.load(self._file('centroids.npy'))
+        else:
+            self.trained_count = 0
+        self._load()
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _read_meta(self) -> dict:
+        try:
+            with open(self._file('meta.json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_meta(self):
+        self._replace('meta.json', lambda f: f.write(
+            json.dumps({'dim': self.dim, 'trained_count': self.trained_count}).encode('utf-8')
+        ))
+
+    def _replace(self, name: str, write):
+        """Write a file atomically: a crash leaves either the old or the new version"""
+        temporary = self._file(name + '.tmp')
+        with open(temporary, 'wb') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self._file(name))
+
+    def _load(self):
+        row_bytes = self.dim * 4
+        vector_rows = os.path.getsize(self._file('vectors.f32')) // row_bytes \
+            if os.path.exists(self._file('vectors.f32')) else 0
+        try:
+            with open(self._file('urls.txt'), encoding='utf-8') as f:
+                urls = f.read().splitlines()
+        except OSError:
+            urls = []
+        assignments = np.fromfile(self._file('lists.i32'), dtype=np.int32) \
+            if os.path.exists(self._file('lists.i32')) else np.empty(0, dtype=np.int32)
+
+        # A write interrupted part-way leaves files of different lengths; trust the shortest
+        count = min(vector_rows, len(urls), len(assignments))
+        for name, size in (('vectors.f32', count * row_bytes), ('lists.i32', count * 4)):
+            if os.path.exists(self._file(name)) and os.path.getsize(self._file(name)) != size:
+                os.truncate(self._file(name), size)
+        if len(urls) != count:
+            urls = urls[:count]
+            self._replace('urls.txt', lambda f: f.write(''.join(url + '\n' for url in urls).encode('utf-8')))
+
+        self.urls: List[str] = urls
+        self.rows = {url: row for row, url in enumerate(urls)}
+        self.live = np.zeros(max(count, 1024), dtype=bool)
+        self.live[list(self.rows.values())] = True
+        self.assignments = assignments[:count].copy()
+        self.count = count
+        self.vectors = self._map(count)
+        self._merge()
+        VECTOR_INDEX_SIZE.set(len(self.rows))
+
+    def _map(self, count: int) -> Optional[np.ndarray]:
+        if not count:
+            return None
+        return np.memmap(self._file('vectors.f32'), dtype=np.float32, mode='r', shape=(count, self.dim))
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def add(self, urls: Sequence[str], vectors: np.ndarray) -> int:
+        """Append embeddings for pages; a URL already present is replaced. Blocking."""
+        if not len(urls):
+            return 0
+        vectors = normalize(vectors)
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-dimensional vectors, got {vectors.shape[1]}")
+
+        with self.write_lock:
+            if not self.count:
+                self._write_meta()
+            if self.centroids is not None:
+                assignments = assign(vectors, self.centroids)
+            else:
+                assignments = np.full(len(urls), -1, dtype=np.int32)
+
+            with open(self._file('vectors.f32'), 'ab') as f:
+                f.write(vectors.tobytes())
+            with open(self._file('lists.i32'), 'ab') as f:
+                f.write(assignments.tobytes())
+            with open(self._file('urls.txt'), 'a', encoding='utf-8') as f:
+                f.write(''.join(url + '\n' for url in urls))
+
+            count = self.count + len(urls)
+            live = self.live
+            if count > len(live):
+                live = np.resize(live, max(count, len(live) * 2))
+                live[self.count:] = False
+            mapped = self._map(count)
+
+            with self.lock:
+                # Set before superseding, so a URL repeated within the batch keeps one live row
+                live[self.count:count] = True
+                for offset, url in enumerate(urls):
+                    previous = self.rows.get(url)
+                    if previous is not None:
+                        live[previous] = False
+                    self.rows[url] = self.count + offset
+                    self.urls.append(url)
+                self.live = live
+                self.assignments = np.concatenate((self.assignments, assignments))
+                self.vectors = mapped
+                self.count = count
+
+            if count >= self.train_size and count >= 4 * max(self.trained_count, self.train_size // 4):
+                self._train()
+            elif count - self.merged >= self.merge_size:
+                with self.lock:
+                    self._merge()
+
+            # Recrawls re-embed pages; don't let superseded rows grow the files and scans forever
+            dead = count - len(self.rows)
+            if dead >= self.merge_size and dead > self.compact_ratio * count:
+                self._compact()
+        VECTOR_INDEX_SIZE.set(len(self.rows))
+        return len(urls)
+
+    def train(self, num_lists: Optional[int] = None):
+        """(Re)build the inverted lists with k-means over a sample of the stored vectors. Blocking."""
+        with self.write_lock:
+            self._train(num_lists)
+
+    def _train(self, num_lists: Optional[int] = None):
+        count, vectors = self.count, self.vectors
+        if not count:
+            return
+        num_lists = min(count, num_lists or settings.VECTOR_INDEX_LISTS or int(4 * np.sqrt(count)))
+        rng = np.random.default_rng(count)
+        sample = np.sort(rng.choice(count, min(count, KMEANS_SAMPLE), replace=False))
+        centroids = spherical_kmeans(np.asarray(vectors[sample]), num_lists)
+        assignments = assign(vectors, centroids)
+
+        self._replace('lists.i32', lambda f: f.write(assignments.tobytes()))
+        np.save(self._file('centroids.tmp.npy'), centroids)
+        os.replace(self._file('centroids.tmp.npy'), self._file('centroids.npy'))
+        self.trained_count = count
+        self._write_meta()
+
+        with self.lock:
+            self.centroids = centroids
+            self.assignments = assignments
+            self._merge()
+        logging.info(f"Trained vector index: {count} vectors in {num_lists} lists")
+
+    def _merge(self):
+        """Fold rows added since the last merge into the sorted list layout"""
+        if self.centroids is None:
+            self.order = np.empty(0, dtype=np.int64)
+            self.offsets = np.zeros(1, dtype=np.int64)
+            self.merged = 0
+            return
+        self.order = np.argsort(self.assignments, kind='stable')
+        counts = np.bincount(self.assignments, minlength=len(self.centroids))
+        self.offsets = np.concatenate(([0], np.cumsum(counts)))
+        self.merged = self.count
+
+    def search(self, vector: np.ndarray, limit: int = 10,
+               probes: Optional[int] = None) -> List[Tuple[str, float]]:
+        """(url, cosine similarity) pairs for the nearest pages, best first. Blocking."""
+        with self.lock:
+            count, vectors, live = self.count, self.vectors, self.live
+            centroids, order, offsets, merged = self.centroids, self.order, self.offsets, self.merged
+        if not count or limit <= 0:
+            return []
+
+        with VECTOR_QUERY_LATENCY.time():
+            query = normalize(vector)[0]
+            if centroids is None:
+                candidates = np.arange(count)
+            else:
+                probes = min(probes or self.probes, len(centroids))
+                nearest = np.argpartition(-(centroids @ query), probes - 1)[:probes]
+                parts = [order[offsets[cluster]:offsets[cluster + 1]] for cluster in nearest]
+                parts.append(np.arange(merged, count))  # not yet merged into the lists
+                # Sorted rows read the memory map sequentially
+                candidates = np.sort(np.concatenate(parts))
+            candidates = candidates[live[candidates]]
+            VECTOR_CANDIDATES.observe(len(candidates))
+            if not len(candidates):
+                return []
+
+            scores = np.empty(len(candidates), dtype=np.float32)
+            for start in range(0, len(candidates), SCORE_CHUNK):
+                rows = candidates[start:start + SCORE_CHUNK]
+                scores[start:start + len(rows)] = vectors[rows] @ query
+
+            limit = min(limit, len(candidates))
+            top = np.argpartition(-scores, limit - 1)[:limit]
+            top = top[np.argsort(-scores[top], kind='stable')]
+            urls = self.urls
+            return [(urls[candidates[i]], float(scores[i])) for i in top]
+
+    def get_vectors(self, urls: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Stored unit-length embeddings for URLs in one read, and a mask of the URLs that have one"""
+        with self.lock:
+            vectors = self.vectors
+            rows = np.array([self.rows.get(url, -1) for url in urls], dtype=np.int64)
+        found = rows >= 0
+        result = np.zeros((len(urls), self.dim), dtype=np.float32)
+        if found.any():
+            result[found] = vectors[rows[found]]
+        return result, found
+
+    def compact(self):
+        """Rewrite the files without rows superseded by a newer embedding of the same URL"""
+        with self.write_lock:
+            self._compact()
+
+    def _compact(self):
+        rows = np.flatnonzero(self.live[:self.count])
+        if len(rows) == self.count:
+            return
+        dead = self.count - len(rows)
+        vectors = np.asarray(self.vectors[rows])
+        urls = [self.urls[row] for row in rows]
+        self._replace('vectors.f32', lambda f: f.write(vectors.tobytes()))
+        self._replace('urls.txt', lambda f: f.write(''.join(url + '\n' for url in urls).encode('utf-8')))
+        self._replace('lists.i32', lambda f: f.write(self.assignments[rows].tobytes()))
+        with self.lock:
+            self._load()
+        logging.info(f"Compacted vector index: dropped {dead} superseded rows, {len(rows)} left")
+
+
+@lru_cache()
+def get_vector_index() -> VectorIndex:
+    """Shared VectorIndex for the whole process"""
+    return VectorIndex()
+
+
+async def build_from_database(index: Optional[VectorIndex] = None, db=None) -> int:
+    """Load the embeddings stored on pages in MongoDB into an empty index"""
+    from nova.app.storage.database import Database
+
+    index = index or get_vector_index()
+    if len(index):
+        return 0
+    db = db or Database()
+    loop = asyncio.get_event_loop()
+    added = 0
+    async for urls, vectors in db.iter_embeddings(settings.VECTOR_INDEX_BUILD_BATCH):
+        added += await loop.run_in_executor(None, index.add, urls, vectors)
+    if added:
+        logging.info(f"Loaded {added} stored page embeddings into the vector index")
+    return added
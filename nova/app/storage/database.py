@@ -1,9 +1,13 @@
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import IndexModel, UpdateOne
+from pymongo.errors import BulkWriteError, OperationFailure
 import redis
-from typing import Dict, List
+from typing import AsyncIterator, Dict, List, Tuple
+import numpy as np
+import asyncio
 import logging
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 from nova.app.core.config import settings
 
 class Database:
@@ -12,52 +16,130 @@ class Database:
         self.db = self.client.nova_search
         self.redis = redis.from_url(settings.REDIS_URL)  # Use settings
         self.cache_timeout = 3600  # 1 hour
+        self.indexes_ready = False
 
-    async def index_page(self, page_data: Dict):
+    async def ensure_indexes(self):
+        """Create the collection indexes once per process"""
+        if self.indexes_ready:
+            return
+        await self.db.pages.create_indexes([
+            IndexModel([('url', 1)]),
+            IndexModel([('created_at', -1)]),
+            IndexModel([('title', 'text'), ('content', 'text')])
+        ])
+        # Older deployments created a 2dsphere index on embedding, which rejects 768-d vectors
         try:
-            # Add vector embedding
-            page_data['embedding'] = self._generate_embedding(
-                f"{page_data['title']} {page_data['content']}"
-            )
+            await self.db.pages.drop_index('embedding_2dsphere')
+        except OperationFailure:
+            pass
+        self.indexes_ready = True
+
+    async def index_page(self, page_data: Dict):
+        failed = await self.index_pages([page_data])
+        if failed:
+            raise RuntimeError(f"Failed to index {page_data['url']}")
+
+    async def index_pages(self, pages: List[Dict]) -> List[Dict]:
+        """Upsert a batch of pages in one round trip; returns the pages that failed"""
+        if not pages:
+            return []
+        await self.ensure_indexes()
 
-            # Add timestamps
-            page_data['created_at'] = datetime.utcnow()
-            page_data['updated_at'] = datetime.utcnow()
-
-            # Create compound indexes
-            await self.db.pages.create_indexes([
-                [('url', 1)],
-                [('embedding', '2dsphere')],
-                [('created_at', -1)],
-                [('title', 'text'), ('content', 'text')]
-            ])
-
-            result = await self.db.pages.update_one(
-                {'url': page_data['url']},
-                {'$set': page_data},
+        now = datetime.utcnow()
+        requests = [
+            UpdateOne(
+                {'url': page['url']},
+                {'$set': {**page, 'updated_at': now}, '$setOnInsert': {'created_at': now}},
                 upsert=True
             )
+            for page in pages
+        ]
+        try:
+            await self.db.pages.bulk_write(requests, ordered=False)
+            failed = []
+        except BulkWriteError as e:
+            failed = [pages[error['index']] for error in e.details.get('writeErrors', [])]
+            logging.warning(f"Bulk upsert: {len(failed)} of {len(pages)} pages failed")
 
-            # Invalidate cache
-            self._invalidate_cache(page_data['url'])
-            
-            return result
+        # Invalidate cache; cached search results are invalidated by the indexer
+        # once Elasticsearch can serve the new documents
+        await self._redis_call(self._invalidate_cache, *[page['url'] for page in pages])
+        return failed
 
+    async def update_page_metadata(self, updates: List[Tuple[str, Dict]]):
+        """Merge late-arriving fields (e.g. AI enrichment) into pages in one round trip"""
+        if not updates:
+            return None
+        try:
+            result = await self.db.pages.bulk_write(
+                [UpdateOne({'url': url}, {'$set': fields}, upsert=True) for url, fields in updates],
+                ordered=False
+            )
+            await self._redis_call(self._invalidate_cache, *[url for url, _ in updates])
+            return result
         except Exception as e:
-            logging.error(f"Database indexing error: {str(e)}", exc_info=True)
+            logging.error(f"Metadata update error: {str(e)}", exc_info=True)
             raise
 
+    async def link_duplicate(self, url: str, canonical_url: str):
+        """Record a near-duplicate URL on its canonical page instead of indexing it separately"""
+        try:
+            await self.db.pages.update_one(
+                {'url': canonical_url},
+                {'$addToSet': {'duplicate_urls': url}},
+                upsert=True  # the canonical page may still be waiting in the indexer
+            )
+            await self._redis_call(self._invalidate_cache, canonical_url)
+        except Exception as e:
+            logging.error(f"Duplicate link error: {str(e)}")
+
+    async def get_sites_for_recrawl(self) -> List[Dict]:
+        """Sites whose sitemaps are due to be re-read"""
+        cursor = self.db.sites.find({'$or': [
+            {'next_crawl': {'$lte': datetime.utcnow()}},
+            {'next_crawl': {'$exists': False}}
+        ]})
+        return await cursor.to_list(length=None)
+
+    async def update_crawl_schedule(self, url: str, interval: int):
+        now = datetime.utcnow()
+        await self.db.sites.update_one(
+            {'url': url},
+            {'$set': {'last_crawl': now, 'next_crawl': now + timedelta(seconds=interval)}},
+            upsert=True
+        )
+
+    async def iter_embeddings(self, batch_size: int = 1000) -> AsyncIterator[Tuple[List[str], np.ndarray]]:
+        """Stream stored page embeddings as (urls, matrix) batches"""
+        cursor = self.db.pages.find(
+            {'embedding': {'$exists': True}}, {'_id': 0, 'url': 1, 'embedding': 1}
+        ).batch_size(batch_size)
+        urls, vectors = [], []
+        async for doc in cursor:
+            urls.append(doc['url'])
+            vectors.append(doc['embedding'])
+            if len(urls) >= batch_size:
+                yield urls, np.asarray(vectors, dtype=np.float32)
+                urls, vectors = [], []
+        if urls:
+            yield urls, np.asarray(vectors, dtype=np.float32)
+
     async def get_by_url(self, url: str) -> Dict:
         # Try cache first
-        cached = self._get_from_cache(url)
+        cached = await self._redis_call(self._get_from_cache, url)
         if cached:
             return cached
 
         result = await self.db.pages.find_one({'url': url})
         if result:
-            self._set_in_cache(url, result)
+            await self._redis_call(self._set_in_cache, url, result)
         return result
 
+    @staticmethod
+    async def _redis_call(method, *args):
+        # The Redis client is synchronous; keep its round trips off the event loop
+        return await asyncio.get_event_loop().run_in_executor(None, method, *args)
+
     def _get_from_cache(self, key: str) -> Dict:
         try:
             data = self.redis.get(key)
@@ -76,9 +158,9 @@ class Database:
         except Exception as e:
             logging.warning(f"Cache set error: {str(e)}")
 
-    def _invalidate_cache(self, key: str):
+    def _invalidate_cache(self, *keys: str):
         try:
-            self.redis.delete(key)
+            self.redis.delete(*keys)
         except Exception as e:
             logging.warning(f"Cache invalidation error: {str(e)}")
 
@@ -0,0 +1,156 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from prometheus_client import Counter, Histogram
+from nova.app.core.config import settings
+from nova.app.core.embeddings import DOCUMENT, get_embedding_service
+
+ENRICHMENT_BATCH = Histogram(
+    'enrichment_batch_size', 'Pages per AI enrichment batch',
+    buckets=(1, 2, 4, 8, 16, 32, 64)
+)
+ENRICHMENT_LATENCY = Histogram('enrichment_batch_seconds', 'AI enrichment batch inference time')
+ENRICHMENT_DROPPED = Counter('enrichment_dropped_total', 'Pages skipped because the enrichment queue was full')
+
+
+class MetadataEnricher:
+    """AI metadata enrichment that runs beside the crawl instead of inside it.
+
+    Pages are submitted without waiting; a background task gathers them
+    into micro-batches (up to ENRICHMENT_BATCH_SIZE pages or
+    ENRICHMENT_MAX_WAIT seconds, whichever comes first), runs the models
+    on one dedicated inference thread and writes the results to MongoDB.
+    Pages are indexed first and picked up by enrichment later; with an
+    ``indexer`` the searchable fields (summary and top categories) also
+    reach Elasticsearch as partial updates.
+
+    Each page's title and text are also embedded through the shared
+    EmbeddingService; the vector is stored on the page and appended to
+    the semantic VectorIndex.
+    """
+
+    def __init__(self, extractor=None, db=None, vector_index=None, indexer=None):
+        self.extractor = extractor
+        self.db = db
+        self.indexer = indexer
+        self.ai_metadata = settings.ENRICHMENT_ENABLED
+        if vector_index is None and settings.VECTOR_INDEX_ENABLED:
+            from nova.app.search.vector_index import get_vector_index
+            vector_index = get_vector_index()
+        self.vector_index = vector_index
+        self.embeddings = get_embedding_service() if vector_index is not None else None
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.ENRICHMENT_QUEUE_SIZE)
+        self.batch_size = settings.ENRICHMENT_BATCH_SIZE
+        self.max_wait = settings.ENRICHMENT_MAX_WAIT
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    def submit(self, url: str, content: str, title: str = '') -> bool:
+        """Queue a page for enrichment without blocking the caller"""
+        if not content:
+            return False
+        try:
+            self.queue.put_nowait((url, content, title))
+            return True
+        except asyncio.QueueFull:
+            ENRICHMENT_DROPPED.inc()
+            logging.warning(f"Enrichment queue full, skipping {url}")
+            return False
+
+    async def close(self):
+        """Wait for queued pages to be enriched, then stop the background task"""
+        if self.task:
+            await self.queue.join()
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._enrich(batch)
+            except Exception as e:
+                logging.error(f"Enrichment error: {str(e)}")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def _next_batch(self) -> List[Tuple[str, str, str]]:
+        batch = [await self.queue.get()]
+        loop = asyncio.get_event_loop()
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _enrich(self, batch: List[Tuple[str, str, str]]):
+        loop = asyncio.get_event_loop()
+        if self.extractor is None:
+            from nova.app.storage.metadata import MetadataExtractor
+            self.extractor = MetadataExtractor()
+        if self.db is None:
+            from nova.app.storage.database import Database
+            self.db = Database()
+        ENRICHMENT_BATCH.observe(len(batch))
+        updates = [(url, {}) for url, _, _ in batch]
+
+        if self.ai_metadata:
+            # The first batch also pays for loading the models, on the inference thread
+            try:
+                with ENRICHMENT_LATENCY.time():
+                    results = await loop.run_in_executor(
+                        self.executor, self.extractor.extract_ai_batch, [content for _, content, _ in batch]
+                    )
+                enriched_at = datetime.utcnow()
+                for (_, fields), metadata in zip(updates, results):
+                    fields.update(metadata, enriched_at=enriched_at)
+            except Exception as e:
+                logging.error(f"AI metadata error: {str(e)}")
+
+        if self.vector_index is not None:
+            try:
+                vectors = await self.embeddings.embed(
+                    [f"{title} {content}" for _, content, title in batch], DOCUMENT
+                )
+                await loop.run_in_executor(
+                    self.executor, self.vector_index.add, [url for url, _, _ in batch], vectors
+                )
+                for (_, fields), vector in zip(updates, vectors):
+                    fields['embedding'] = vector.tolist()
+            except Exception as e:
+                logging.error(f"Page embedding error: {str(e)}")
+
+        await self.db.update_page_metadata([(url, fields) for url, fields in updates if fields])
+        if self.indexer is not None:
+            for url, fields in updates:
+                if 'categories' in fields:
+                    await self.indexer.update(url, search_fields(fields))
+
+
+def search_fields(fields: Dict) -> Dict:
+    """The enrichment fields that go to Elasticsearch.
+
+    The classifier ranks every candidate label, so only the top one and
+    any others scoring at least ENRICHMENT_CATEGORY_MIN_SCORE are indexed
+    as the page's categories.
+    """
+    labels, scores = fields['categories'], fields.get('category_scores') or []
+    categories = [label for label, score in zip(labels, scores) if score >= settings.ENRICHMENT_CATEGORY_MIN_SCORE]
+    return {'ai_summary': fields.get('ai_summary', ''), 'categories': categories or labels[:1]}
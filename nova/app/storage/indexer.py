@@ -0,0 +1,246 @@
+import asyncio
+import logging
+import random
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from prometheus_client import Counter, Histogram
+from nova.app.core.config import settings
+from nova.app.core.utils import document_id
+from nova.app.search.cache import bump_index_generation
+from nova.app.search.client import get_es_client
+
+INDEX_NAME = "web_pages"
+INDEX_MAPPINGS = {
+    "properties": {
+        "url": {"type": "keyword"},
+        "title": {"type": "text"},
+        "content": {"type": "text"},
+        "meta_description": {"type": "text"},
+        "summary": {"type": "text"},
+        "ai_summary": {"type": "text"},
+        "keywords": {"type": "keyword"},
+        "categories": {"type": "keyword"},
+        "metadata": {"type": "object", "enabled": False},
+        "suggest": {"type": "completion"},
+        "crawled_at": {"type": "date"},
+        "indexed_at": {"type": "date"}
+    }
+}
+
+# Bulk item statuses worth another attempt; anything else (e.g. a mapping error) won't improve
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+INDEX_BATCH = Histogram(
+    'index_batch_size', 'Documents per bulk indexing batch',
+    buckets=(1, 10, 50, 100, 250, 500, 1000, 2000)
+)
+INDEX_LATENCY = Histogram('index_batch_seconds', 'Bulk indexing batch write time')
+INDEX_DOCS = Counter('index_documents_total', 'Documents written by the bulk indexer', ['target'])
+INDEX_FAILED = Counter('index_failed_total', 'Documents given up on after retries', ['target'])
+
+
+def build_document(url: str, content: Dict, metadata: Dict) -> Dict:
+    """Flatten a parsed page into the document stored in MongoDB and Elasticsearch"""
+    now = datetime.utcnow()
+    title = content.get('title') or metadata.get('title', '')
+    return {
+        'url': url,
+        'title': title,
+        'content': content.get('main_content', ''),
+        'meta_description': content.get('description', ''),
+        'summary': content.get('summary', ''),
+        'keywords': content.get('keywords', []),
+        'metadata': metadata,
+        'crawled_at': now,
+        'indexed_at': now
+    }
+
+
+class BulkIndexer:
+    """Streams crawled pages into MongoDB and Elasticsearch in bulk.
+
+    Documents are gathered into batches of up to INDEX_BATCH_SIZE or
+    INDEX_MAX_WAIT seconds, whichever comes first, and each batch goes out
+    as one MongoDB bulk_write and one Elasticsearch _bulk request.  Items
+    that fail are retried with backoff up to INDEX_MAX_RETRIES times.
+    Indexes are created once, before the first batch.
+
+    Late-arriving fields (AI enrichment) go through ``update`` as partial
+    Elasticsearch updates, queued behind the page's own index action.
+    """
+
+    def __init__(self, db=None):
+        self.db = db
+        self.es_client = get_es_client()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.INDEX_QUEUE_SIZE)
+        self.batch_size = settings.INDEX_BATCH_SIZE
+        self.max_wait = settings.INDEX_MAX_WAIT
+        self.max_retries = settings.INDEX_MAX_RETRIES
+        self.indexes_ready = False
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    async def submit(self, document: Dict):
+        """Queue a document; waits while the indexer is saturated (backpressure)"""
+        await self.queue.put(('index', document))
+
+    async def update(self, url: str, fields: Dict):
+        """Queue a partial update of a page's Elasticsearch document"""
+        await self.queue.put(('update', dict(fields, url=url)))
+
+    async def flush(self):
+        """Wait until every queued document has been written"""
+        if self.task:
+            await self.queue.join()
+
+    async def close(self):
+        if self.task:
+            await self.flush()
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    async def link_duplicate(self, url: str, canonical_url: str):
+        await self._database().link_duplicate(url, canonical_url)
+
+    def _database(self):
+        if self.db is None:
+            from nova.app.storage.database import Database
+            self.db = Database()
+        return self.db
+
+    async def ensure_indexes(self):
+        if self.indexes_ready:
+            return
+        await self._database().ensure_indexes()
+
+        es = await self.es_client.get()
+        if not await es.indices.exists(index=INDEX_NAME):
+            try:
+                await es.indices.create(index=INDEX_NAME, body={"mappings": INDEX_MAPPINGS})
+            except Exception as e:
+                # Another process may have created it first
+                logging.warning(f"Index creation error: {str(e)}")
+        else:
+            try:
+                # Adds fields introduced since the index was created
+                await es.indices.put_mapping(index=INDEX_NAME, body=INDEX_MAPPINGS)
+            except Exception as e:
+                logging.warning(f"Index mapping update error: {str(e)}")
+        self.indexes_ready = True
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._index(batch)
+            except Exception as e:
+                logging.error(f"Bulk indexing error: {str(e)}")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def _next_batch(self) -> List[Tuple[str, Dict]]:
+        batch = [await self.queue.get()]
+        loop = asyncio.get_event_loop()
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _index(self, batch: List[Tuple[str, Dict]]):
+        await self.ensure_indexes()
+        INDEX_BATCH.observe(len(batch))
+
+        documents: Dict[str, Dict] = {}
+        sources: Dict[str, Dict] = {}
+        updates: Dict[str, Dict] = {}
+        for action, document in batch:
+            url = document['url']
+            if action == 'index':
+                # The same URL may be queued twice in one window; keep the latest copy
+                documents[url] = sources[url] = document
+                updates.pop(url, None)
+            elif url in sources:
+                # Indexed in this same batch: send the fields along with the document
+                sources[url] = {**sources[url], **document}
+            else:
+                updates[url] = {**updates.get(url, {}), **document}
+
+        # Updates only touch Elasticsearch; MongoDB gets the enrichment from the enricher
+        operations = [('index', source) for source in sources.values()]
+        operations += [('update', fields) for fields in updates.values()]
+        with INDEX_LATENCY.time():
+            _, searchable = await asyncio.gather(
+                self._with_retries('mongodb', self.db.index_pages, list(documents.values())),
+                self._with_retries('elasticsearch', self._bulk_elasticsearch, operations)
+            )
+
+        if searchable:
+            # Only now can a search see the new documents; a bump any earlier
+            # would let it cache the old results under the new generation
+            await asyncio.get_event_loop().run_in_executor(None, bump_index_generation, self.db.redis)
+
+    async def _with_retries(self, target: str, write: Callable[[List], Awaitable[List]], documents: List) -> int:
+        """Write documents, resending only the ones that failed; returns how many were written"""
+        total = len(documents)
+        for attempt in range(self.max_retries + 1):
+            try:
+                documents = await write(documents)
+            except Exception as e:
+                logging.warning(f"Bulk write to {target} failed: {str(e)}")
+            if not documents:
+                break
+            if attempt < self.max_retries:
+                await asyncio.sleep(min(2 ** attempt, 30) * random.uniform(0.5, 1.0))
+
+        INDEX_DOCS.labels(target=target).inc(total - len(documents))
+        if documents:
+            INDEX_FAILED.labels(target=target).inc(len(documents))
+            logging.error(f"Giving up on {len(documents)} documents for {target}")
+        return total - len(documents)
+
+    async def _bulk_elasticsearch(self, operations: List[Tuple[str, Dict]]) -> List[Tuple[str, Dict]]:
+        """One _bulk request of (action, document) pairs; returns the ones that should be retried"""
+        es = await self.es_client.get()
+        body = []
+        for action, document in operations:
+            body.append({action: {'_index': INDEX_NAME, '_id': document_id(document['url'])}})
+            if action == 'update':
+                body.append({'doc': {key: value for key, value in document.items() if key != 'url'}})
+                continue
+            source = dict(document)
+            if document.get('title'):
+                source['suggest'] = {'input': [document['title']]}
+            body.append(source)
+
+        # Returns once a refresh has made the batch searchable
+        response = await es.bulk(body=body, refresh='wait_for')
+        if not response.get('errors'):
+            return []
+
+        retry = []
+        for (action, document), item in zip(operations, response['items']):
+            result = item.get(action, {})
+            status = result.get('status', 500)
+            if status < 300:
+                continue
+            if status in RETRYABLE_STATUS:
+                retry.append((action, document))
+            else:
+                # An update answers 404 if its page never made it into the index
+                logging.error(f"Dropping {action} of {document['url']}: {result.get('error')}")
+        return retry
@@ -1,18 +1,18 @@
 from bs4 import BeautifulSoup
-from typing import Dict
+from typing import Dict, List
 import re
-from transformers import pipeline
+import json
 import numpy as np
 from concurrent.futures import ThreadPoolExecutor
+from nova.app.core.models import registry
 
-class MetadataExtractor:
-    def __init__(self):
-        self.summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
-        self.classifier = pipeline("zero-shot-classification")
-        self.executor = ThreadPoolExecutor(max_workers=4)
+CATEGORY_LABELS = ["technology", "business", "science", "entertainment"]
+
+class BasicMetadataExtractor:
+    """HTML metadata extraction only; safe to use in parse worker processes"""
 
     def extract(self, soup: BeautifulSoup, url: str) -> Dict:
-        basic_metadata = {
+        return {
             'title': self._extract_title(soup),
             'meta_description': self._extract_meta_description(soup),
             'meta_keywords': self._extract_meta_keywords(soup),
@@ -22,12 +22,6 @@ class MetadataExtractor:
             'published_date': self._extract_published_date(soup),
             'language': self._extract_language(soup)
         }
-        
-        # Add AI-powered metadata
-        content = self._extract_main_content(soup)
-        ai_metadata = self._extract_ai_metadata(content)
-        
-        return {**basic_metadata, **ai_metadata}
 
     def _extract_title(self, soup: BeautifulSoup) -> str:
         title = soup.find('title')
@@ -50,7 +44,13 @@ class MetadataExtractor:
     def _extract_schema_data(self, soup: BeautifulSoup) -> Dict:
         schema_data = {}
         for tag in soup.find_all('script', attrs={'type': 'application/ld+json'}):
-            schema_data.update(json.loads(tag.string))
+            try:
+                data = json.loads(tag.string or '')
+            except ValueError:
+                continue
+            for item in data if isinstance(data, list) else [data]:
+                if isinstance(item, dict):
+                    schema_data.update(item)
         return schema_data
 
     def _extract_author(self, soup: BeautifulSoup) -> str:
@@ -65,19 +65,57 @@ class MetadataExtractor:
         html_tag = soup.find('html')
         return html_tag['lang'] if html_tag and 'lang' in html_tag.attrs else ''
 
+
+class MetadataExtractor(BasicMetadataExtractor):
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=4)
+
+    @property
+    def summarizer(self):
+        return registry.get('summarizer')
+
+    @property
+    def classifier(self):
+        return registry.get('zero-shot')
+
+    def extract(self, soup: BeautifulSoup, url: str) -> Dict:
+        basic_metadata = super().extract(soup, url)
+        
+        # Add AI-powered metadata
+        content = self._extract_main_content(soup)
+        ai_metadata = self._extract_ai_metadata(content)
+        
+        return {**basic_metadata, **ai_metadata}
+
+    def _extract_main_content(self, soup: BeautifulSoup) -> str:
+        main = soup.find(['article', 'main']) or soup.find('body') or soup
+        return main.get_text(' ', strip=True)
+
     def _extract_ai_metadata(self, content: str) -> Dict:
-        summary = self.executor.submit(
-            self.summarizer, content[:1024], max_length=130, min_length=30
-        ).result()
+        return self.extract_ai_batch([content])[0]
 
-        categories = self.executor.submit(
-            self.classifier,
-            content,
-            candidate_labels=["technology", "business", "science", "entertainment"]
-        ).result()
+    def extract_ai_batch(self, contents: List[str]) -> List[Dict]:
+        """Summarize and classify a batch of page texts in one pass per model"""
+        if not contents:
+            return []
 
-        return {
-            'ai_summary': summary[0]['summary_text'],
-            'categories': categories['labels'],
-            'category_scores': categories['scores']
-        }
\ No newline at end of file
+        summaries = self.summarizer(
+            [content[:1024] for content in contents],
+            max_length=130, min_length=30, truncation=True, batch_size=len(contents)
+        )
+        categories = self.classifier(
+            [content[:2048] for content in contents],
+            candidate_labels=CATEGORY_LABELS,
+            batch_size=len(contents)
+        )
+        if isinstance(categories, dict):
+            categories = [categories]
+
+        return [
+            {
+                'ai_summary': summary['summary_text'],
+                'categories': category['labels'],
+                'category_scores': category['scores']
+            }
+            for summary, category in zip(summaries, categories)
+        ]
@@ -0,0 +1,52 @@
+import pytest
+
+from nova.app.crawler import adaptive
+from nova.app.crawler.adaptive import AdaptiveConcurrency
+
+HOST = 'site.test'
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(adaptive.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def respond(controller, clock, latency, times=1):
+    for _ in range(times):
+        clock[0] += 1.0
+        controller.on_response(HOST, 200, latency)
+
+
+def test_one_fast_response_does_not_keep_shrinking_the_limit(clock):
+    controller = AdaptiveConcurrency(min_limit=1, max_limit=8, initial=4)
+    respond(controller, clock, 0.1, times=5)
+    limit = controller.limit(HOST)
+
+    # e.g. a cached 304 among ordinary responses
+    respond(controller, clock, 0.001)
+    respond(controller, clock, 0.1, times=50)
+
+    assert controller.limit(HOST) >= limit
+
+
+def test_rising_latency_still_backs_off(clock):
+    controller = AdaptiveConcurrency(min_limit=1, max_limit=8, initial=4)
+    respond(controller, clock, 0.1, times=5)
+    limit = controller.limit(HOST)
+
+    respond(controller, clock, 1.0, times=5)
+
+    assert controller.limit(HOST) < limit
+
+
+def test_baseline_is_relearned_after_idle(clock, monkeypatch):
+    monkeypatch.setattr(adaptive.settings, 'HOST_IDLE_RESET', 60)
+    controller = AdaptiveConcurrency(min_limit=1, max_limit=8, initial=4)
+    respond(controller, clock, 0.01, times=5)
+
+    clock[0] += 3600
+    respond(controller, clock, 0.5)
+
+    assert controller.hosts[HOST].baseline == 0.5
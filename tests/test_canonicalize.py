@@ -0,0 +1,13 @@
+from nova.app.crawler.canonicalize import URLCanonicalizer
+
+
+def test_ipv6_host_keeps_brackets():
+    canonicalizer = URLCanonicalizer()
+    assert canonicalizer.canonicalize('http://[::1]:8080/a/') == 'http://[::1]:8080/a'
+    assert canonicalizer.canonicalize('https://[2001:DB8::1]:443/') == 'https://[2001:db8::1]/'
+
+
+def test_sid_is_not_a_tracking_param():
+    canonicalizer = URLCanonicalizer()
+    assert canonicalizer.canonicalize('http://example.com/item?utm_source=x&sid=42') == \
+        'http://example.com/item?sid=42'
@@ -0,0 +1,189 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+import pytest
+
+from nova.app.core.config import settings
+from nova.app.crawler import crawler as crawler_module
+from nova.app.crawler import parsing
+from nova.app.crawler.frontier import DiskFrontier
+from nova.app.crawler.seen import BloomSeenSet
+
+SITE = 'http://site.test'
+
+
+class FakeResponse:
+    def __init__(self, status: int, body: str = ''):
+        self.status = status
+        self.body = body
+        self.headers = {}
+
+
+class FakeFetcher:
+    """Serves a fixed site: path -> (status, links on the page)"""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.fetched = []
+
+    @asynccontextmanager
+    async def get(self, url, headers=None):
+        path = url[len(SITE):] or '/'
+        self.fetched.append(path)
+        status, links = self.pages.get(path, (404, []))
+        yield FakeResponse(status, ' '.join(links))
+
+    async def text(self, response, max_size=None):
+        return response.body
+
+
+class FakeRobots:
+    def __init__(self, disallowed=()):
+        self.disallowed = set(disallowed)
+
+    async def can_fetch(self, url):
+        return url[len(SITE):] not in self.disallowed
+
+    async def get_crawl_delay(self, url):
+        return None
+
+
+class FakeIndexer:
+    def __init__(self):
+        self.urls = []
+
+    def start(self):
+        pass
+
+    async def submit(self, document):
+        self.urls.append(document['url'])
+
+    async def flush(self):
+        pass
+
+
+def fake_parse_page(html, url):
+    content = {'title': '', 'main_content': html, 'description': ''}
+    return {'content': content, 'metadata': {}, 'links': html.split(),
+            'content_hash': str(hash(html)), 'simhash': 0}
+
+
+@pytest.fixture
+def make_crawler(monkeypatch):
+    monkeypatch.setattr(crawler_module.nltk, 'download', lambda *args, **kwargs: None)
+    monkeypatch.setattr(parsing, 'parse_page', fake_parse_page)
+    for name, value in (('CRAWL_DELAY', 0), ('ADAPTIVE_CONCURRENCY', False), ('ENRICHMENT_ENABLED', False),
+                        ('VECTOR_INDEX_ENABLED', False), ('DEDUP_ENABLED', False), ('CRAWLER_WORKERS', 4),
+                        ('PARSE_WORKERS', 1)):
+        monkeypatch.setattr(settings, name, value)
+
+    def make(pages, disallowed=(), **kwargs):
+        crawler = crawler_module.WebCrawler(**kwargs)
+        crawler.fetcher = FakeFetcher(pages)
+        crawler.robots_parser = FakeRobots(disallowed)
+        crawler.indexer = FakeIndexer()
+        crawler.parse_pool = ThreadPoolExecutor(max_workers=1)
+        return crawler
+
+    return make
+
+
+@pytest.mark.asyncio
+async def test_failed_fetch_frees_host_for_next_url(make_crawler):
+    crawler = make_crawler({
+        '/': (200, [f'{SITE}/missing', f'{SITE}/about']),
+        '/about': (200, []),
+    })
+
+    await asyncio.wait_for(crawler.crawl([f'{SITE}/']), timeout=5)
+
+    assert sorted(crawler.fetcher.fetched) == ['/', '/about', '/missing']
+    assert sorted(crawler.indexer.urls) == [f'{SITE}/', f'{SITE}/about']
+    assert crawler.url_queue.in_flight == {}
+
+
+@pytest.mark.asyncio
+async def test_robots_disallow_frees_host_for_next_url(make_crawler):
+    crawler = make_crawler({
+        '/': (200, [f'{SITE}/private', f'{SITE}/about']),
+        '/private': (200, []),
+        '/about': (200, []),
+    }, disallowed={'/private'})
+
+    await asyncio.wait_for(crawler.crawl([f'{SITE}/']), timeout=5)
+
+    assert sorted(crawler.fetcher.fetched) == ['/', '/about']
+    assert crawler.url_queue.in_flight == {}
+
+
+@pytest.mark.asyncio
+async def test_page_budget_leaves_rest_pending_for_next_crawl(make_crawler, tmp_path):
+    frontier = DiskFrontier(str(tmp_path / 'frontier.db'))
+    crawler = make_crawler({
+        '/': (200, [f'{SITE}/a', f'{SITE}/b']),
+        '/a': (200, []),
+        '/b': (200, []),
+    }, max_pages=1, frontier=frontier)
+
+    await asyncio.wait_for(crawler.crawl([f'{SITE}/']), timeout=5)
+    assert crawler.indexer.urls == [f'{SITE}/']
+    assert frontier.pending_count() == 2
+
+    # The budget is per crawl, so the next one picks up where this one stopped
+    await asyncio.wait_for(crawler.crawl([]), timeout=5)
+    assert len(crawler.indexer.urls) == 2
+    assert frontier.pending_count() == 1
+
+
+@pytest.mark.asyncio
+async def test_recrawl_refetches_pages_already_seen(make_crawler, tmp_path):
+    frontier = DiskFrontier(str(tmp_path / 'frontier.db'))
+    crawler = make_crawler({'/': (200, [f'{SITE}/a']), '/a': (200, [])}, frontier=frontier)
+    await asyncio.wait_for(crawler.crawl([f'{SITE}/']), timeout=5)
+    assert sorted(crawler.fetcher.fetched) == ['/', '/a']
+
+    # What the manager does with URLs whose recrawl is due
+    frontier.push_many([(f'{SITE}/', 0, 1.0), (f'{SITE}/a', 0, 1.0)], True)
+    await asyncio.wait_for(crawler.crawl([]), timeout=5)
+    assert sorted(crawler.fetcher.fetched) == ['/', '/', '/a', '/a']
+
+
+@pytest.mark.asyncio
+async def test_crawl_without_frontier_snapshots_bloom_seen_set(make_crawler, monkeypatch, tmp_path):
+    path = str(tmp_path / 'seen.bloom')
+    monkeypatch.setattr(settings, 'SEEN_SET_BACKEND', 'bloom')
+    monkeypatch.setattr(settings, 'SEEN_SET_CAPACITY', 1000)
+    monkeypatch.setattr(settings, 'SEEN_SET_PATH', path)
+    crawler = make_crawler({'/': (200, [f'{SITE}/a']), '/a': (200, [])})
+
+    await asyncio.wait_for(crawler.crawl([f'{SITE}/']), timeout=5)
+
+    reopened = BloomSeenSet.open(path)
+    assert len(reopened) == 2
+    assert f'{SITE}/a' in reopened
+
+
+class LatePushFrontier(DiskFrontier):
+    """Links pushed just after a pop came back empty, as a parse worker can"""
+
+    late = None
+
+    def pop_batch(self, size):
+        batch = super().pop_batch(size)
+        if not batch and self.late:
+            self.push_many(self.late)
+            self.late = None
+        return batch
+
+
+@pytest.mark.asyncio
+async def test_links_pushed_during_an_empty_pop_are_crawled(make_crawler, tmp_path):
+    frontier = LatePushFrontier(str(tmp_path / 'frontier.db'))
+    frontier.late = [(f'{SITE}/late', 1, 0.5)]
+    crawler = make_crawler({'/': (200, []), '/late': (200, [])}, frontier=frontier)
+
+    await asyncio.wait_for(crawler.crawl([f'{SITE}/']), timeout=5)
+
+    assert sorted(crawler.fetcher.fetched) == ['/', '/late']
+    assert frontier.pending_count() == 0
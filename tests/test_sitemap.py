@@ -0,0 +1,56 @@
+import gzip
+import tracemalloc
+
+import pytest
+
+from nova.app.crawler.fetcher import BodyTooLarge
+from nova.app.crawler.sitemap import SitemapParser
+
+URLSET = '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{}</urlset>'
+
+
+class FakeResponse:
+    url = 'http://site.test/sitemap.xml.gz'
+
+
+class FakeFetcher:
+    def __init__(self, body: bytes):
+        self.body = body
+
+    async def iter_body(self, response, max_size=None):
+        yield self.body
+
+
+def make_parser(body: bytes, max_size: int) -> SitemapParser:
+    parser = SitemapParser()
+    parser.fetcher = FakeFetcher(body)
+    parser.max_size = max_size
+    return parser
+
+
+@pytest.mark.asyncio
+async def test_gzipped_sitemap_is_parsed():
+    body = gzip.compress(URLSET.format('<url><loc>http://site.test/a</loc></url>').encode())
+    parser = make_parser(body, 1 << 20)
+
+    entries = [entry async for entry in parser._iter_entries(FakeResponse())]
+
+    assert [(kind, record['url']) for kind, record in entries] == [('url', 'http://site.test/a')]
+
+
+@pytest.mark.asyncio
+async def test_gzip_bomb_is_cut_off_at_max_size():
+    # ~50 MB of padding in one ~50 KB chunk
+    body = gzip.compress(URLSET.format(' ' * (50 << 20)).encode())
+    parser = make_parser(body, 1 << 20)
+
+    tracemalloc.start()
+    try:
+        with pytest.raises(BodyTooLarge):
+            async for _ in parser._iter_entries(FakeResponse()):
+                pass
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert peak < 8 << 20
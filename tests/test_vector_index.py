@@ -0,0 +1,40 @@
+import numpy as np
+
+from nova.app.search.vector_index import VectorIndex
+
+DIM = 8
+
+
+def vectors(count, seed):
+    return np.random.default_rng(seed).normal(size=(count, DIM)).astype(np.float32)
+
+
+def test_reembedding_compacts_superseded_rows(tmp_path):
+    index = VectorIndex(path=str(tmp_path), dim=DIM, train_size=10_000, merge_size=4, compact_ratio=0.5)
+    urls = [f'http://site.test/{i}' for i in range(8)]
+    index.add(urls, vectors(8, 0))
+
+    # Three recrawls re-embed every page; the dead rows never pass half the files for long
+    for seed in range(1, 4):
+        latest = vectors(8, seed)
+        index.add(urls, latest)
+        assert index.count <= 2 * len(urls)
+
+    assert len(index) == len(urls)
+    assert (tmp_path / 'vectors.f32').stat().st_size == index.count * DIM * 4
+    stored, found = index.get_vectors(urls)
+    assert found.all()
+    expected = latest / np.linalg.norm(latest, axis=1, keepdims=True)
+    assert np.allclose(stored, expected, atol=1e-6)
+    assert index.search(latest[3], limit=1)[0][0] == urls[3]
+
+    # The compacted files load back as the same index
+    reopened = VectorIndex(path=str(tmp_path), dim=DIM, train_size=10_000, merge_size=4)
+    assert len(reopened) == len(urls) and reopened.count == index.count
+
+
+def test_repeated_url_in_one_batch_keeps_one_live_row(tmp_path):
+    index = VectorIndex(path=str(tmp_path), dim=DIM, train_size=10_000, merge_size=100)
+    index.add(['http://site.test/a', 'http://site.test/a'], vectors(2, 0))
+    assert len(index) == 1
+    assert int(index.live[:index.count].sum()) == 1